@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import json
+import platform
+from datetime import datetime, timezone
+from benchmarks import load, micro
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Person API benchmark suite")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--people", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Mongo round trip")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--write-batching", action="store_true", help="coalesce POST /person/ inserts")
+    parser.add_argument("--store", choices=("stand_in", "memory"), default="stand_in", help="Mongo stand-in or the in-memory repository")
+    args = parser.parse_args(argv)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version()
+    }
+    if not args.skip_micro:
+        results["micro"] = micro.run()
+    if not args.skip_load:
+        results["load"] = asyncio.run(load.run(args.people, args.requests, args.concurrency, args.latency_ms, not args.no_cache, args.write_batching, args.store))
+
+    rendered = json.dumps(results, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(rendered + "\n")
+
+if __name__ == "__main__":
+    main()
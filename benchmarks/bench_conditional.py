@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from infra.person_repository import PersonRepository
+from benchmarks.load import StandInDatabase, seed
+from tests.mongo_stand_in import create_collection
+
+VARIANTS = {
+    "identity": {"Accept-Encoding": "identity"},
+    "gzip": {"Accept-Encoding": "gzip"},
+    "zstd": {"Accept-Encoding": "zstd"},
+    "not_modified": {"Accept-Encoding": "gzip"}
+}
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict, requests: int) -> dict:
+    wire_bytes = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        async with client.stream("GET", path, headers=headers) as response:
+            async for chunk in response.aiter_raw():
+                wire_bytes += len(chunk)
+
+    return {
+        "ms_per_request": round((time.perf_counter() - started) * 1000 / requests, 3),
+        "status": response.status_code,
+        "bytes_per_response": wire_bytes // requests
+    }
+
+async def run(people: int = 1000, limit: int = 1000, requests: int = 50) -> dict:
+    # Repeated polls of one unchanged page, served in-process from the Mongo
+    # stand-in: full body, compressed bodies, and 304 revalidation.
+    from main import app, create_person_repository, get_mediator, get_settings
+    from features.mediator import build_mediator
+
+    settings = get_settings()
+    collection = create_collection()
+    await seed(PersonRepository(collection), people)
+    mediator = build_mediator(create_person_repository(StandInDatabase(settings, collection), None, None))
+    app.dependency_overrides[get_mediator] = lambda: mediator
+    path = f"/person/?limit={limit}"
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            etag = (await client.get(path)).headers["ETag"]
+            results = {"items": limit}
+            for variant, headers in VARIANTS.items():
+                if variant == "not_modified":
+                    headers = {**headers, "If-None-Match": etag}
+                results[variant] = await measure(client, path, headers, requests)
+    finally:
+        app.dependency_overrides = {}
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes and time per poll of an unchanged person page")
+    parser.add_argument("--people", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.people, args.limit, args.requests)), indent=2))
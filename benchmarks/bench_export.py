@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from features.export_person.export_person_handler import ExportPersonHandler
+from features.export_person.get_export_person_job_query import GetExportPersonJobQuery
+from features.export_person.start_export_person_job_command import StartExportPersonJobCommand
+from models.person_columns import PersonColumns
+from benchmarks.bench_get_all import make_docs
+
+class GeneratedRepository:
+    # Stands in for the Mongo cursor so only encoding and disk writes are measured.
+    def __init__(self, count: int):
+        self.count = count
+
+    def stream_all(self, after=None, filters=None, fields=None, batch_size=None):
+        return self._batches(batch_size)
+
+    async def _batches(self, batch_size: int):
+        for start in range(0, self.count, batch_size):
+            yield PersonColumns.from_documents(make_docs(min(batch_size, self.count - start), start))
+
+async def export(format: str, count: int, batch_size: int, export_dir: str) -> dict:
+    handler = ExportPersonHandler(GeneratedRepository(count), export_dir, batch_size)
+    started = time.perf_counter()
+    job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format=format))
+    await handler.tasks[job.id]
+    elapsed = time.perf_counter() - started
+
+    job = await handler.handle_get_export_person_job(GetExportPersonJobQuery(id=job.id))
+    return {"rows": job.rows, "mb": round(job.bytes / 1024 / 1024, 1), "rows_per_s": round(job.rows / elapsed), "mb_per_s": round(job.bytes / 1024 / 1024 / elapsed, 1)}
+
+def traced_peak_mb(format: str, count: int, batch_size: int, export_dir: str) -> float:
+    tracemalloc.start()
+    asyncio.run(export(format, count, batch_size, export_dir))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024 / 1024, 1)
+
+def run(count: int = 100000, batch_size: int = 2000, formats=("csv", "ndjson", "parquet")) -> dict:
+    results = {"items": count, "batch_size": batch_size}
+    with tempfile.TemporaryDirectory() as export_dir:
+        for format in formats:
+            try:
+                result = asyncio.run(export(format, count, batch_size, export_dir))
+            except ValueError as error:
+                results[format] = {"skipped": str(error)}
+                continue
+
+            # Peak traced memory for a tenth and for all of the rows: the two
+            # stay level because only one batch is held at a time.
+            result["peak_mb_tenth"] = traced_peak_mb(format, count // 10, batch_size, export_dir)
+            result["peak_mb_full"] = traced_peak_mb(format, count, batch_size, export_dir)
+            results[format] = result
+            for name in os.listdir(export_dir):
+                os.remove(os.path.join(export_dir, name))
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export job throughput and memory")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.count, args.batch_size), indent=2))
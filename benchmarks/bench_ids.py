@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_right
+from bson import BSON
+from infra.person_ids import id_generator, stored_id
+from infra.person_repository import PERSON_INDEXES, PersonRepository
+from benchmarks.load import seed
+
+VARIANTS = [("uuid4", "string"), ("uuid7", "string"), ("ulid", "string"), ("uuid4", "binary"), ("uuid7", "binary")]
+
+# WiredTiger's default leaf_page_max, and the record id stored with each key.
+PAGE_BYTES = 32 * 1024
+ENTRY_OVERHEAD = 8
+
+def key_bytes(value) -> int:
+    # The encoded value without the document length, name and terminator.
+    return len(BSON.encode({"": value})) - 7
+
+def model_index(ids, storage: str) -> dict:
+    # Leaf pages of a B-tree over the id index. A full page splits in half,
+    # except the rightmost one, which keeps its keys and starts a new page as
+    # WiredTiger does for appends. Random keys therefore leave pages about
+    # ln 2 (69%) full and touch leaves all over the index; ordered keys fill
+    # pages and only touch the last one.
+    capacity = PAGE_BYTES // (key_bytes(stored_id(ids[0], storage)) + ENTRY_OVERHEAD)
+    firsts, pages = [], []
+    splits = 0
+    touched = set()
+    window = max(len(ids) // 10, 1)
+    for count, key in enumerate(ids):
+        index = max(bisect_right(firsts, key) - 1, 0)
+        if not pages:
+            firsts.append(key)
+            pages.append([])
+        page = pages[index]
+        page.insert(bisect_right(page, key), key)
+        firsts[index] = page[0]
+        if len(page) > capacity:
+            splits += 1
+            middle = len(page) - 1 if index == len(pages) - 1 and page[-1] == key else len(page) // 2
+            pages.insert(index + 1, page[middle:])
+            firsts.insert(index + 1, page[middle])
+            del page[middle:]
+        if count >= len(ids) - window:
+            touched.add(id(page))
+
+    return {
+        "key_bytes": key_bytes(stored_id(ids[0], storage)),
+        "leaf_pages": len(pages),
+        "index_mb": round(len(pages) * PAGE_BYTES / 1e6, 2),
+        "fill": round(len(ids) / (len(pages) * capacity), 2),
+        "splits": splits,
+        f"leaves_touched_by_last_{window}_inserts": len(touched)
+    }
+
+def run_model(people: int) -> dict:
+    results = {"people": people, "source": "model"}
+    for generator, storage in VARIANTS:
+        new_id = id_generator(generator)
+        started = time.perf_counter()
+        ids = [new_id() for _ in range(people)]
+        elapsed = time.perf_counter() - started
+        results[f"{generator}_{storage}"] = {"ids_per_second": round(people / elapsed), **model_index(ids, storage)}
+
+    return results
+
+async def run_mongo(url: str, people: int) -> dict:
+    # Real index sizes and insert throughput; needs a MongoDB to write to.
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(url)
+    database = client["personapi_bench"]
+    results = {"people": people, "source": "mongodb"}
+    try:
+        for generator, storage in VARIANTS:
+            collection = database[f"persons_{generator}_{storage}"]
+            await collection.drop()
+            await collection.create_indexes(PERSON_INDEXES[:1])
+            started = time.perf_counter()
+            await seed(PersonRepository(collection, id_storage=storage), people, id_generator(generator))
+            elapsed = time.perf_counter() - started
+            stats = await database.command("collStats", collection.name)
+            results[f"{generator}_{storage}"] = {
+                "inserts_per_second": round(people / elapsed),
+                "id_index_mb": round(stats["indexSizes"]["id_unique"] / 1e6, 2),
+                "total_index_mb": round(stats["totalIndexSize"] / 1e6, 2)
+            }
+            await collection.drop()
+    finally:
+        client.close()
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Id generators and storage: id index size and insert throughput")
+    parser.add_argument("--people", type=int, default=200000)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_TEST_URL"), help="measure on this MongoDB instead of the B-tree model")
+    args = parser.parse_args()
+    results = asyncio.run(run_mongo(args.mongo_url, args.people)) if args.mongo_url else run_model(args.people)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from models.person_filter import PersonFilter
+from infra.in_memory_person_repository import InMemoryPersonRepository
+from infra.person_repository import PersonRepository
+from benchmarks.load import seed
+from tests.mongo_stand_in import create_collection
+
+# The same reads against the mongomock stand-in and InMemoryPersonRepository,
+# seeded with the same people. Both have to return the same answer; the
+# stand-in scans every document per query, the in-memory engine walks its
+# smallest usable index.
+
+def queries(ids: list) -> dict:
+    return {
+        "get_by_id": lambda repo: repo.get_by_id(random.choice(ids)),
+        "first_page": lambda repo: repo.get_all(100),
+        "city_page": lambda repo: repo.get_all(100, None, PersonFilter(city="City 3")),
+        "age_range_page": lambda repo: repo.get_all(100, None, PersonFilter(min_age=30, max_age=32)),
+        "name_prefix_page": lambda repo: repo.get_all(100, None, PersonFilter(name="Person 12")),
+        "stats": lambda repo: repo.get_stats(PersonFilter(is_pep=True), 10, 5)
+    }
+
+async def measure(query, repo, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await query(repo)
+
+    return (time.perf_counter() - started) / rounds * 1000
+
+async def run(people: int = 2000, rounds: int = 5) -> dict:
+    collection = create_collection(name="persons_in_memory_bench")
+    await collection.drop()
+    stand_in = PersonRepository(collection)
+    await stand_in.ensure_indexes()
+    await seed(stand_in, people)
+    # Copied over so both hold the same documents, _ids included.
+    memory = InMemoryPersonRepository()
+    memory.load([doc async for doc in collection.find({})])
+    memory.finish_load()
+    ids = [doc["id"] for doc in memory.documents.values()]
+
+    results = {"people": people}
+    random.seed(7)
+    for name, query in queries(ids).items():
+        if name != "get_by_id":
+            assert await query(stand_in) == await query(memory), name
+        stand_in_ms = await measure(query, stand_in, rounds)
+        memory_ms = await measure(query, memory, rounds)
+        results[name] = {
+            "stand_in_ms": round(stand_in_ms, 3),
+            "memory_ms": round(memory_ms, 3),
+            "speedup": round(stand_in_ms / memory_ms, 1)
+        }
+
+    await collection.drop()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Person reads: mongomock stand-in versus the in-memory repository")
+    parser.add_argument("--people", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.people, args.rounds)), indent=2))
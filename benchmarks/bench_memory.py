@@ -0,0 +1,68 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from models.person_columns import PersonColumns
+from infra.person_json import render_columns, render_people
+from infra.person_documents import to_person
+from benchmarks.bench_get_all import make_docs
+
+BATCH_SIZE = 500
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def batches(count: int):
+    # Documents arrive from the cursor one batch at a time, so only the
+    # result set being built is kept alive.
+    for start in range(0, count, BATCH_SIZE):
+        yield make_docs(min(BATCH_SIZE, count - start), start)
+
+def build_models(count: int):
+    people = []
+    for batch in batches(count):
+        people.extend(to_person(doc) for doc in batch)
+
+    return people, render_people
+
+def build_columns(count: int):
+    columns = PersonColumns()
+    for batch in batches(count):
+        for doc in batch:
+            columns.append(doc)
+
+    return columns, render_columns
+
+VARIANTS = {"models": build_models, "columns": build_columns}
+
+def measure(variant: str, count: int) -> dict:
+    make_docs(BATCH_SIZE)
+    baseline = peak_rss_mb()
+    rows, render = VARIANTS[variant](count)
+    held = peak_rss_mb()
+    body = render(rows)
+    return {
+        "held_mb": round(held - baseline, 1),
+        "peak_mb": round(peak_rss_mb() - baseline, 1),
+        "body_mb": round(len(body) / 1024 / 1024, 1)
+    }
+
+def run(count: int = 200000) -> dict:
+    # Each variant runs in a fresh interpreter because peak RSS never goes down.
+    results = {"items": count}
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_memory", "--variant", variant, "--count", str(count)],
+            check=True, capture_output=True, text=True).stdout
+        results[variant] = json.loads(output)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak RSS of holding and rendering a large person result set")
+    parser.add_argument("--variant", choices=VARIANTS)
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.variant, args.count) if args.variant else run(args.count), indent=2))
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import httpx
+from functools import partial
+from fastapi import FastAPI, HTTPException
+from infra.concurrency import DEADLINE_HEADER, AdaptiveLimit, ConcurrencyLimitMiddleware
+from infra.person_repository import PersonRepository
+from benchmarks.load import seed
+from tests.mongo_stand_in import RoundTrip, create_collection
+
+# GET /person/{id} offered more traffic than the database can serve. The
+# stand-in serves capacity operations at a time, each taking latency_ms, and
+# queues the rest the way a saturated mongod does. Clients give up after
+# timeout_ms and send it as X-Request-Timeout-Ms. Arrivals are open loop:
+# they keep coming at rate whether or not earlier requests have finished.
+# Up to a second at half the capacity comes first, as traffic rarely starts at
+# overload, and is not counted.
+
+def build_app(repo: PersonRepository, limited: bool, initial_limit: int) -> FastAPI:
+    app = FastAPI()
+    if limited:
+        app.add_middleware(ConcurrencyLimitMiddleware, limit_factory=partial(AdaptiveLimit, initial_limit))
+
+    @app.get("/person/{id}")
+    async def get_person(id: str):
+        person = await repo.get_by_id(id)
+        if person is None:
+            raise HTTPException(status_code=404)
+        return person
+
+    return app
+
+async def offer(client: httpx.AsyncClient, ids, rate: float, seconds: float, timeout_ms: float) -> dict:
+    latencies = []
+    shed = 0
+    late = 0
+
+    async def request(at: float):
+        nonlocal shed, late
+        await asyncio.sleep(max(at - time.perf_counter(), 0))
+        started = time.perf_counter()
+        response = await client.get(f"/person/{random.choice(ids)}", headers={DEADLINE_HEADER: str(timeout_ms)})
+        elapsed = time.perf_counter() - started
+        if response.status_code == 503:
+            shed += 1
+        elif elapsed * 1000 > timeout_ms:
+            # The client stopped waiting; the server did the work for nothing.
+            late += 1
+        else:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    total = int(rate * seconds)
+    await asyncio.gather(*(request(start + i / rate) for i in range(total)))
+    latencies.sort()
+    return {
+        "offered": total,
+        "goodput_rps": round(len(latencies) / (time.perf_counter() - start), 1),
+        "ok": len(latencies),
+        "shed": shed,
+        "too_late": late,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1) if latencies else None
+    }
+
+async def run(
+    people: int = 100,
+    capacity: int = 4,
+    latency_ms: float = 20.0,
+    load: float = 2.0,
+    seconds: float = 5.0,
+    timeout_ms: float = 500,
+    initial_limit: int = 100) -> dict:
+    # load is the offered rate as a multiple of what the database can serve.
+    rate = load * capacity * 1000 / latency_ms
+    results = {"capacity_rps": round(capacity * 1000 / latency_ms), "offered_rps": round(rate)}
+    for limited in (False, True):
+        collection = create_collection(name="persons_overload")
+        repo = PersonRepository(collection)
+        await repo.ensure_indexes()
+        ids = await seed(repo, people)
+        collection.round_trip = RoundTrip(latency_ms / 1000, capacity)
+        transport = httpx.ASGITransport(app=build_app(repo, limited, initial_limit))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await offer(client, ids, rate / load / 2, min(seconds, 1.0), timeout_ms)
+            results["limited" if limited else "unlimited"] = await offer(client, ids, rate, seconds, timeout_ms)
+        await collection.drop()
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /person/{id} under overload, with and without adaptive concurrency limiting")
+    parser.add_argument("--people", type=int, default=100)
+    parser.add_argument("--capacity", type=int, default=4, help="operations the stand-in MongoDB serves at once")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--load", type=float, default=2.0, help="offered rate as a multiple of capacity")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--timeout-ms", type=float, default=500)
+    parser.add_argument("--initial-limit", type=int, default=100)
+    args = parser.parse_args()
+    results = asyncio.run(run(args.people, args.capacity, args.latency_ms, args.load, args.seconds, args.timeout_ms, args.initial_limit))
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.create_person_command_handler import CreatePersonCommandHandler
+from features.create_person.idempotent_create_person_command import IdempotentCreatePersonCommand
+from infra.idempotency import IdempotencyStore
+from infra.person_repository import PersonRepository
+from tests.mongo_stand_in import create_collection
+
+# POST /person/ behind an upstream that retries on timeouts. For a share of
+# the creates the first answer is lost, and the caller sends the same
+# request again retry_after_ms later while the first one may still be
+# running. Without an Idempotency-Key every attempt is a new person.
+
+def person(number: int) -> dict:
+    return {
+        "name": f"Person {number}",
+        "age": number % 100,
+        "street": "Main Street",
+        "number": number + 1,
+        "neighbor": f"Neighbor {number % 50}",
+        "city": f"City {number % 10}",
+        "is_pep": False
+    }
+
+async def run_variant(idempotent: bool, creates: int, rate: float, timeout_rate: float, retries: int, retry_after_ms: float, latency_ms: float) -> dict:
+    rng = random.Random(7)
+    collection = create_collection(latency_ms, name="persons_retries")
+    repo = PersonRepository(collection)
+    await repo.ensure_indexes()
+    store = IdempotencyStore(create_collection(latency_ms, name="persons_retries_idempotency_keys"), poll_interval_ms=latency_ms)
+    handler = CreatePersonCommandHandler(repo, idempotency_store=store)
+    latencies = []
+
+    async def attempt(number: int):
+        started = time.perf_counter()
+        if idempotent:
+            await handler.handle_idempotent_create_person(IdempotentCreatePersonCommand(**person(number), idempotency_key=f"create-{number}"))
+        else:
+            await handler.handle_create_person(CreatePersonCommand(**person(number)))
+        latencies.append(time.perf_counter() - started)
+
+    async def create(number: int):
+        await asyncio.sleep(number / rate)
+        tries = 1 + (retries if rng.random() < timeout_rate else 0)
+        attempts = []
+        for _ in range(tries):
+            attempts.append(asyncio.create_task(attempt(number)))
+            await asyncio.sleep(retry_after_ms / 1000)
+        await asyncio.gather(*attempts)
+        return tries
+
+    attempts = sum(await asyncio.gather(*(create(number) for number in range(creates))))
+    documents = await collection.count_documents({})
+    await collection.drop()
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "attempts": attempts,
+        "documents": documents,
+        "duplicates": documents - creates,
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2)
+    }
+
+async def run(creates: int = 1000, rate: float = 200, timeout_rate: float = 0.05, retries: int = 2, retry_after_ms: float = 1.0, latency_ms: float = 2.0) -> dict:
+    results = {"creates": creates, "rate": rate, "timeout_rate": timeout_rate, "retries": retries}
+    for idempotent in (False, True):
+        name = "idempotency_key" if idempotent else "no_key"
+        results[name] = await run_variant(idempotent, creates, rate, timeout_rate, retries, retry_after_ms, latency_ms)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Duplicate people created by retried POST /person/, with and without Idempotency-Key")
+    parser.add_argument("--creates", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200, help="creates per second")
+    parser.add_argument("--timeout-rate", type=float, default=0.05, help="share of creates whose first answer is lost")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--retry-after-ms", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated Mongo round trip")
+    args = parser.parse_args()
+    results = asyncio.run(run(args.creates, args.rate, args.timeout_rate, args.retries, args.retry_after_ms, args.latency_ms))
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,101 @@
+import argparse
+import json
+import random
+import statistics
+import time
+from infra.person_search import PersonSearchIndex, trigrams, words
+
+FIRST_NAMES = [
+    "Maria", "Ana", "Joao", "Jose", "Antonio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas",
+    "Luiz", "Marcos", "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe", "Rodrigo",
+    "Fernando", "Leonardo", "Gustavo", "Guilherme", "Tiago", "Ricardo", "Jorge", "Alexandre", "Roberto", "Diego",
+    "Juliana", "Adriana", "Marcia", "Fernanda", "Patricia", "Aline", "Sandra", "Camila", "Amanda", "Bruna",
+    "Jessica", "Leticia", "Julia", "Luciana", "Vanessa", "Mariana", "Gabriela", "Beatriz", "Renata", "Simone"
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Goncalves", "Santana", "Teixeira", "Araujo", "Pinto", "Correia", "Moura", "Cavalcanti",
+    "Monteiro", "Campos", "Batista", "Castro", "Reis", "Borges", "Leite", "Bezerra", "Medeiros", "Farias",
+    "Miranda", "Cunha", "Pires", "Macedo", "Tavares", "Pinheiro", "Azevedo", "Melo", "Brito", "Coelho"
+]
+
+def person_names(count: int, rng: random.Random):
+    for _ in range(count):
+        yield f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def misspell(name: str, rng: random.Random) -> str:
+    # What support staff type: part of the name with one letter dropped,
+    # doubled or swapped with its neighbour.
+    parts = name.split()[:rng.choice((1, 2, 3))]
+    word = rng.randrange(len(parts))
+    letters = list(parts[word])
+    at = rng.randrange(1, len(letters) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        del letters[at]
+    elif edit == "double":
+        letters.insert(at, letters[at])
+    else:
+        letters[at], letters[at + 1] = letters[at + 1], letters[at]
+    parts[word] = "".join(letters)
+    return " ".join(parts)
+
+def scan(names, query: str, limit: int):
+    # Without an index: score every name the way the index does.
+    query_grams = [trigrams(word) for word in words(query)]
+    scored = []
+    for number, name in enumerate(names):
+        name_grams = [trigrams(word) for word in words(name)]
+        score = sum(max(len(q & n) / len(q | n) for n in name_grams) for q in query_grams)
+        scored.append((-score, number))
+
+    return sorted(scored)[:limit]
+
+def percentile(values, q: int) -> float:
+    return round(statistics.quantiles(values, n=100, method="inclusive")[q - 1], 3)
+
+def run(people: int = 1_000_000, queries: int = 1000, limit: int = 10, scans: int = 1) -> dict:
+    rng = random.Random(42)
+    names = list(person_names(people, rng))
+    index = PersonSearchIndex()
+    started = time.perf_counter()
+    for number, name in enumerate(names):
+        index.add(f"person-{number}", name)
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    found = 0
+    for query in (misspell(rng.choice(names), rng) for _ in range(queries)):
+        started = time.perf_counter()
+        found += bool(index.search(query, limit))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    scan_ms = []
+    for query in (misspell(rng.choice(names), rng) for _ in range(scans)):
+        started = time.perf_counter()
+        scan(names, query, limit)
+        scan_ms.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "people": people,
+        "distinct_names": len(index.terms),
+        "words": len(index.vocabulary),
+        "build_s": round(build_seconds, 2),
+        "queries": queries,
+        "queries_with_hits": found,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "scan_ms": round(statistics.mean(scan_ms), 1)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzzy name search latency with the trigram index and with a full scan")
+    parser.add_argument("--people", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--scans", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.people, args.queries, args.limit, args.scans), indent=2))
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+import httpx
+from infra.person_repository import PersonRepository
+from benchmarks.load import StandInDatabase, seed
+from tests.mongo_stand_in import create_collection
+
+async def client_side_stats(client: httpx.AsyncClient) -> dict:
+    # What the dashboards did: page through every person and count locally.
+    received = 0
+    ages, cities, peps, total = Counter(), Counter(), 0, 0
+    path = "/person/?limit=1000"
+    while path:
+        response = await client.get(path, headers={"Accept-Encoding": "identity"})
+        received += len(response.content)
+        for person in response.json():
+            total += 1
+            peps += person["is_pep"]
+            ages[person["age"] // 10 * 10] += 1
+            cities[person["address"]["city"]] += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        path = f"/person/?limit=1000&after={cursor}" if cursor else None
+
+    return {"bytes": received, "total": total}
+
+async def server_side_stats(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/person/stats", headers={"Accept-Encoding": "identity"})
+    return {"bytes": len(response.content), "total": response.json()["total"]}
+
+async def timed(measure, client: httpx.AsyncClient) -> dict:
+    started = time.perf_counter()
+    result = await measure(client)
+    return {**result, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+async def run(people: int = 20000) -> dict:
+    # Against the mongomock stand-in, so the aggregation runs in Python; the
+    # bytes are what a real deployment would send.
+    from main import app, create_person_repository, get_mediator, get_settings
+    from features.mediator import build_mediator
+
+    settings = get_settings()
+    collection = create_collection(name="persons_stats_bench")
+    await collection.drop()
+    await seed(PersonRepository(collection), people)
+    repo = create_person_repository(StandInDatabase(settings, collection), None, None)
+    mediator = build_mediator(repo, stats_cache_ttl_seconds=settings.stats_cache_ttl_seconds)
+    app.dependency_overrides[get_mediator] = lambda: mediator
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return {
+                "people": people,
+                "client_side": await timed(client_side_stats, client),
+                "stats_endpoint": await timed(server_side_stats, client),
+                "stats_endpoint_cached": await timed(server_side_stats, client)
+            }
+    finally:
+        app.dependency_overrides = {}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard statistics: paging the whole list versus GET /person/stats")
+    parser.add_argument("--people", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.people)), indent=2))
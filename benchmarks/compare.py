@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+
+    return metrics
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith(".rps")
+
+def is_tracked(metric: str) -> bool:
+    return metric.endswith((".rps", "_ms", ".ns_per_op"))
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    old = flatten(baseline)
+    new = flatten(current)
+    regressions = []
+    for metric in sorted(old.keys() & new.keys()):
+        if not is_tracked(metric) or not old[metric]:
+            continue
+
+        change = (new[metric] - old[metric]) / old[metric]
+        if higher_is_better(metric):
+            change = -change
+        if change > tolerance:
+            regressions.append((metric, old[metric], new[metric], change))
+
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown (default 0.10)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline, open(args.current) as current:
+        regressions = compare(json.load(baseline), json.load(current), args.tolerance)
+
+    for metric, old, new, change in regressions:
+        print(f"REGRESSION {metric}: {old} -> {new} ({change:+.1%} worse)")
+    if not regressions:
+        print("No regressions")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+import random
+import statistics
+import time
+import httpx
+from typing import Callable, List, Optional
+from features.create_person.bulk_create_person_command import BulkCreatePersonCommand
+from features.create_person.create_person_command_handler import CreatePersonCommandHandler
+from infra.person_cache import CachedPersonRepository, PersonCache
+from infra.in_memory_person_repository import InMemoryPersonRepository
+from infra.person_repository import PersonRepository
+from infra.person_store import PersonStore
+from infra.write_coalescer import WriteCoalescer
+from tests.mongo_stand_in import create_collection
+
+class StandInDatabase:
+    def __init__(self, settings, collection):
+        self.settings = settings
+        self.persons_collection = collection
+        self.person_read_collections = {}
+
+async def seed(repo: PersonStore, count: int, id_generator: Optional[Callable[[], str]] = None) -> List[str]:
+    handler = CreatePersonCommandHandler(repo, id_generator)
+    items = [
+        {
+            "name": f"Person {i}",
+            "age": i % 100,
+            "street": "Main Street",
+            "number": i + 1,
+            "neighbor": f"Neighbor {i % 50}",
+            "city": f"City {i % 10}",
+            "is_pep": i % 20 == 0
+        }
+        for i in range(count)
+    ]
+    results = await handler.handle_bulk_create_person(BulkCreatePersonCommand(items=items))
+    return [result.id for result in results]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3)
+    }
+
+async def drive(client: httpx.AsyncClient, paths, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            request = next(paths)
+            if isinstance(request, str):
+                response = await client.get(request)
+            else:
+                method, path, body = request
+                response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def hot_ids(ids: List[str], hot_fraction: float = 0.01):
+    # 80% of lookups go to the hottest 1% of people, like production traffic.
+    hot = ids[:max(1, int(len(ids) * hot_fraction))]
+    while True:
+        yield f"/person/{random.choice(hot if random.random() < 0.8 else ids)}"
+
+def list_pages():
+    while True:
+        yield "/person/?limit=100"
+
+def new_people():
+    for i in itertools.count():
+        yield "POST", "/person/", {
+            "name": f"New Person {i}",
+            "age": i % 100,
+            "street": "Main Street",
+            "number": i + 1,
+            "neighbor": f"Neighbor {i % 50}",
+            "city": f"City {i % 10}",
+            "is_pep": False
+        }
+
+async def run(
+    people: int = 1000,
+    requests: int = 2000,
+    concurrency: int = 32,
+    latency_ms: float = 0.0,
+    cache: bool = True,
+    write_batching: bool = False,
+    store: str = "stand_in") -> dict:
+    from main import app, create_person_repository, get_mediator, get_person_cache, get_settings
+    from features.mediator import build_mediator
+
+    # "memory" runs the API on InMemoryPersonRepository instead of the Mongo
+    # stand-in, so the numbers leave out the driver and mongomock.
+    if store not in ("stand_in", "memory"):
+        raise ValueError(f"Unknown store: '{store}', expected stand_in or memory")
+    if store == "memory" and write_batching:
+        raise ValueError("Write batching needs the Mongo stand-in")
+
+    settings = get_settings()
+    person_cache = PersonCache(settings.cache_max_size, settings.cache_ttl_seconds, settings.cache_negative_ttl_seconds) if cache else None
+    coalescer = None
+    if store == "memory":
+        repo = InMemoryPersonRepository(settings.mongo_batch_size)
+        ids = await seed(repo, people)
+        mediator = build_mediator(CachedPersonRepository(repo, person_cache) if person_cache is not None else repo)
+    else:
+        collection = create_collection(latency_ms)
+        repo = PersonRepository(collection, settings.mongo_batch_size, settings.bulk_insert_chunk_size)
+        await repo.ensure_indexes()
+        ids = await seed(repo, people)
+        coalescer = WriteCoalescer(collection, settings.write_batch_max_size, settings.write_batch_max_delay_ms) if write_batching else None
+        mediator = build_mediator(create_person_repository(StandInDatabase(settings, collection), person_cache, coalescer))
+    app.dependency_overrides[get_mediator] = lambda: mediator
+    app.dependency_overrides[get_person_cache] = lambda: person_cache
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return {
+                "get_person": await drive(client, hot_ids(ids), requests, concurrency),
+                "list_persons": await drive(client, list_pages(), requests // 10, concurrency),
+                "create_person": await drive(client, new_people(), requests // 2, concurrency)
+            }
+    finally:
+        app.dependency_overrides = {}
+        if coalescer is not None:
+            await coalescer.close()
@@ -0,0 +1,50 @@
+import timeit
+from models.person import Person
+from models.address import Address
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.create_person_command_handler import CreatePersonCommandHandler
+from infra.person_documents import to_person
+from infra.person_repository import PersonRepository
+from benchmarks.bench_get_all import make_docs, trusted_path, validated_path
+
+ADDRESS_DATA = {
+    "id": "1c2d3e4f-5a6b-4c7d-8e9f-000000000001",
+    "street": "Main Street",
+    "number": 123,
+    "neighbor": "Downtown",
+    "city": "Test City"
+}
+
+PERSON_DATA = {
+    "id": "9b2f8a3e-5d4c-4f6a-8e1b-000000000001",
+    "name": "John Doe",
+    "age": 30,
+    "address": ADDRESS_DATA,
+    "is_pep": False
+}
+
+def time_per_op(function, repeat: int = 5) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1_000_000_000
+
+def run() -> dict:
+    person = Person(**PERSON_DATA)
+    repo = PersonRepository(None)
+    handler = CreatePersonCommandHandler(repo)
+    command = CreatePersonCommand(name="John Doe", age=30, street="Main Street", number=123, neighbor="Downtown", city="Test City", is_pep=False)
+    doc = make_docs(1)[0]
+    page = make_docs(1000)
+
+    cases = {
+        "address_validation": lambda: Address(**ADDRESS_DATA),
+        "person_validation": lambda: Person(**PERSON_DATA),
+        "person_model_dump": person.model_dump,
+        "person_model_dump_json": person.model_dump_json,
+        "repository_to_person": lambda: to_person(doc),
+        "command_to_person": lambda: handler._build_person(command),
+        "get_all_page_validated": lambda: validated_path(page),
+        "get_all_page_trusted": lambda: trusted_path(page),
+    }
+
+    return {name: {"ns_per_op": round(time_per_op(case), 1)} for name, case in cases.items()}
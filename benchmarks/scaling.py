@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from benchmarks.load import summarize
+from benchmarks.startup import wait_for
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+async def keep_alive_client(port: int, deadline: float, latencies: List[float]) -> int:
+    # Minimal HTTP/1.1 client on one keep-alive connection. httpx spends more
+    # CPU per request than the server does, which would measure the client.
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(REQUEST)
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            if not headers.startswith(b"HTTP/1.1 200"):
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+    return errors
+
+async def drive(port: int, connections: int, seconds: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    errors = await asyncio.gather(*(keep_alive_client(port, deadline, latencies) for _ in range(connections)))
+    return latencies, sum(errors)
+
+def drive_process(port: int, connections: int, seconds: float):
+    return asyncio.run(drive(port, connections, seconds))
+
+def measure(workers: int, port: int, clients: int, connections: int, seconds: float, loop: str, http: str) -> dict:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), ENV="production")
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port), "--loop", loop, "--http", http],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if wait_for(f"http://127.0.0.1:{port}/", time.perf_counter(), 30) is None:
+            raise RuntimeError(f"server with {workers} workers did not start")
+        # Let every worker finish starting before load begins.
+        time.sleep(1)
+
+        with ProcessPoolExecutor(clients) as pool:
+            results = list(pool.map(drive_process, [port] * clients, [connections] * clients, [seconds] * clients))
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [latency for process_latencies, _ in results for latency in process_latencies]
+    # Every client runs for the same window, so rates exclude pool startup.
+    return summarize(latencies, sum(errors for _, errors in results), seconds)
+
+def run(worker_counts: List[int], port: int = 8766, clients: int = 2, connections: int = 32, seconds: float = 5, loop: str = "auto", http: str = "auto") -> dict:
+    # GET / exercises the HTTP stack, middleware and routing without MongoDB,
+    # so the numbers show how request handling scales with workers. The load
+    # generator shares the machine, so leave it cores of its own.
+    results = {"cpus": os.cpu_count(), "loop": loop, "http": http}
+    for workers in worker_counts:
+        results[f"workers_{workers}"] = measure(workers, port, clients, connections, seconds, loop, http)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of server.py with 1..N workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--connections", type=int, default=32, help="keep-alive connections per client process")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--loop", choices=("auto", "asyncio", "uvloop"), default="auto")
+    parser.add_argument("--http", choices=("auto", "h11", "httptools"), default="auto")
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers, args.port, args.clients, args.connections, args.seconds, args.loop, args.http), indent=2))
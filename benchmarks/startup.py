@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+def wait_for(url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return round((time.perf_counter() - started) * 1000)
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+
+    return None
+
+def measure(port: int, timeout: float) -> dict:
+    # Time from spawning a uvicorn worker to its first answered request, and
+    # to /ready once the Mongo pool is warm and indexes exist. Without a
+    # reachable Mongo time_to_ready_ms stays None.
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy())
+    try:
+        first_request = wait_for(f"http://127.0.0.1:{port}/", started, timeout)
+        ready = wait_for(f"http://127.0.0.1:{port}/ready", started, timeout)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {"time_to_first_request_ms": first_request, "time_to_ready_ms": ready}
+
+def run(runs: int = 3, port: int = 8765, timeout: float = 30) -> dict:
+    results = [measure(port, timeout) for _ in range(runs)]
+    return {"runs": results, "best_first_request_ms": min(result["time_to_first_request_ms"] or float("inf") for result in results)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start time of a single worker")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, args.port, args.timeout), indent=2))
@@ -0,0 +1,5 @@
+from typing import Any, List
+from pydantic import BaseModel
+
+class BulkCreatePersonCommand(BaseModel):
+    items: List[Any]
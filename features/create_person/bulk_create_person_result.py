@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class BulkCreatePersonResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
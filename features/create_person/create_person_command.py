@@ -1,11 +1,11 @@
-from pydantic import BaseModel
-
-class CreatePersonCommand(BaseModel):
-    name: str
-    age: int
-    street: str
-    number: int
-    neighbor: str
-    city: str
-    is_pep: bool
+from pydantic import BaseModel
+
+class CreatePersonCommand(BaseModel):
+    name: str
+    age: int
+    street: str
+    number: int
+    neighbor: str
+    city: str
+    is_pep: bool
     
\ No newline at end of file
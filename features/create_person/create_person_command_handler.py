@@ -1,28 +1,88 @@
-from uuid import uuid4
-from models.person import Person
-from features.create_person.create_person_command import CreatePersonCommand
-from infra.person_repository import PersonRepository
-
-class CreatePersonCommandHandler:
-    def __init__(self, repo: PersonRepository):
-        self.repo = repo
-
-    async def handle_create_person(self, cmd: CreatePersonCommand) -> str:
-        person = Person(
-            id=str(uuid4()),
-            name=cmd.name,
-            age=cmd.age,
-            address={
-                 "id": str(uuid4()),
-                 "street": cmd.street,
-                 "number": cmd.number,
-                 "neighbor": cmd.neighbor,
-                 "city": cmd.city
-             },
-            is_pep=cmd.is_pep
-        )
-
-        await self.repo.save(person)
-
-        return person.id
- 
\ No newline at end of file
+from typing import Callable, List, Optional
+from pydantic import ValidationError
+from models.person import Person
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.idempotent_create_person_command import IdempotentCreatePersonCommand
+from features.create_person.bulk_create_person_command import BulkCreatePersonCommand
+from features.create_person.bulk_create_person_result import BulkCreatePersonResult
+from infra.idempotency import IdempotencyStore, request_fingerprint
+from infra.person_ids import UUID7Generator
+from infra.person_store import PersonStore
+from infra.person_search import PersonSearchIndex
+
+class CreatePersonCommandHandler:
+    def __init__(
+        self,
+        repo: PersonStore,
+        id_generator: Optional[Callable[[], str]] = None,
+        search_index: Optional[PersonSearchIndex] = None,
+        idempotency_store: Optional[IdempotencyStore] = None):
+        self.repo = repo
+        self.new_id = id_generator or UUID7Generator()
+        self.search_index = search_index
+        self.idempotency_store = idempotency_store
+
+    async def handle_create_person(self, cmd: CreatePersonCommand) -> str:
+        return await self._create_person(cmd, self.new_id())
+
+    async def handle_idempotent_create_person(self, cmd: IdempotentCreatePersonCommand) -> str:
+        if self.idempotency_store is None:
+            return await self.handle_create_person(cmd)
+
+        # The key is not part of what was asked for: the same body under the
+        # same key is a retry, a different body under it is a conflict.
+        body = cmd.model_dump(exclude={"idempotency_key"})
+        return await self.idempotency_store.create_once(
+            cmd.idempotency_key,
+            request_fingerprint(body),
+            self.new_id(),
+            lambda id: self._create_person(cmd, id))
+
+    async def handle_bulk_create_person(self, cmd: BulkCreatePersonCommand) -> List[BulkCreatePersonResult]:
+        results = []
+        people = []
+        for index, item in enumerate(cmd.items):
+            try:
+                person = self._build_person(CreatePersonCommand.model_validate(item))
+            except ValidationError as error:
+                results.append(BulkCreatePersonResult(index=index, error=self._describe(error)))
+                continue
+
+            results.append(BulkCreatePersonResult(index=index, id=person.id))
+            people.append((index, person))
+
+        errors = await self.repo.save_many([person for _, person in people])
+        for (index, person), error in zip(people, errors):
+            if error:
+                results[index] = BulkCreatePersonResult(index=index, error=error)
+            elif self.search_index is not None:
+                self.search_index.add(person.id, person.name)
+
+        return results
+
+    async def _create_person(self, cmd: CreatePersonCommand, id: str) -> str:
+        person = self._build_person(cmd, id)
+
+        await self.repo.save(person)
+        if self.search_index is not None:
+            self.search_index.add(person.id, person.name)
+
+        return person.id
+
+    def _build_person(self, cmd: CreatePersonCommand, id: Optional[str] = None) -> Person:
+        return Person(
+            id=id or self.new_id(),
+            name=cmd.name,
+            age=cmd.age,
+            address={
+                 "id": self.new_id(),
+                 "street": cmd.street,
+                 "number": cmd.number,
+                 "neighbor": cmd.neighbor,
+                 "city": cmd.city
+             },
+            is_pep=cmd.is_pep
+        )
+
+    def _describe(self, error: ValidationError) -> str:
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'item'}: {e['msg']}" for e in error.errors())
@@ -0,0 +1,4 @@
+from features.create_person.create_person_command import CreatePersonCommand
+
+class IdempotentCreatePersonCommand(CreatePersonCommand):
+    idempotency_key: str
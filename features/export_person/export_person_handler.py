@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+from features.export_person.export_person_job import ExportPersonJob
+from features.export_person.export_person_query import ExportPersonQuery
+from features.export_person.get_export_person_job_query import GetExportPersonJobQuery
+from features.export_person.resume_export_person_job_command import ResumeExportPersonJobCommand
+from features.export_person.start_export_person_job_command import StartExportPersonJobCommand
+from models.person_columns import PersonColumns
+from models.person_filter import PersonFilter
+from infra.cursor import decode_cursor
+from infra.person_export import create_export_writer, export_file_name
+from infra.person_store import PersonStore
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class ExportPersonHandler:
+    def __init__(self, repo: PersonStore, export_dir: str = "exports", batch_size: int = 2000):
+        self.repo = repo
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.tasks = {}
+
+    def handle_export_person(self, query: ExportPersonQuery) -> AsyncIterator[bytes]:
+        writer = create_export_writer(query.format)
+        batches = self.repo.stream_all(query.after, self._to_filter(query), batch_size=self.batch_size, read="export")
+        return self._chunks(writer, batches)
+
+    async def handle_start_export_person_job(self, cmd: StartExportPersonJobCommand) -> ExportPersonJob:
+        writer = create_export_writer(cmd.format)
+        if cmd.after is not None:
+            decode_cursor(cmd.after)
+
+        job = ExportPersonJob(id=str(uuid4()), query=ExportPersonQuery(**cmd.model_dump()), checkpoint=cmd.after)
+        lock = await asyncio.to_thread(self._lock, job.id)
+        if lock is None:
+            raise ValueError(f"Export job '{job.id}' is running in another worker")
+
+        await self._save(job)
+        self._start(job, writer, lock)
+        return job
+
+    async def handle_get_export_person_job(self, query: GetExportPersonJobQuery) -> Optional[ExportPersonJob]:
+        job = await self._load(query.id)
+        if job is not None and job.status == "running" and fcntl is not None and job.id not in self.tasks:
+            lock = await asyncio.to_thread(self._lock, job.id)
+            if lock is not None:
+                # Nobody holds the job's lock: its worker died before it
+                # could record the interruption.
+                lock.close()
+                job.status = "interrupted"
+
+        return job
+
+    async def handle_resume_export_person_job(self, cmd: ResumeExportPersonJobCommand) -> Optional[ExportPersonJob]:
+        job = await self._load(cmd.id)
+        if job is None:
+            return None
+
+        if job.status == "completed" or job.id in self.tasks:
+            raise ValueError(f"Export job '{job.id}' is {'running' if job.id in self.tasks else job.status}")
+
+        writer = create_export_writer(job.query.format)
+        lock = await asyncio.to_thread(self._lock, job.id)
+        if lock is None:
+            raise ValueError(f"Export job '{job.id}' is running in another worker")
+
+        if not writer.resumable:
+            job.rows, job.bytes, job.checkpoint = 0, 0, job.query.after
+
+        job.status, job.error = "running", None
+        await self._save(job)
+        self._start(job, writer, lock)
+        return job
+
+    async def close(self):
+        # Interrupted jobs keep their last checkpoint and can be resumed.
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _chunks(self, writer, batches: AsyncIterator[PersonColumns]) -> AsyncIterator[bytes]:
+        header = writer.header()
+        if header:
+            yield header
+
+        async for columns in batches:
+            yield writer.write(columns)
+
+        tail = writer.close()
+        if tail:
+            yield tail
+
+    def _start(self, job: ExportPersonJob, writer, lock):
+        task = asyncio.create_task(self._run(job, writer))
+        self.tasks[job.id] = task
+
+        def finished(_):
+            self.tasks.pop(job.id, None)
+            lock.close()
+
+        task.add_done_callback(finished)
+
+    async def _run(self, job: ExportPersonJob, writer):
+        try:
+            await self._export(job, writer)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "interrupted"
+            await self._save(job)
+            raise
+        except Exception as error:
+            logger.exception("Export job %s failed", job.id)
+            job.status, job.error = "failed", str(error)
+
+        await self._save(job)
+
+    async def _export(self, job: ExportPersonJob, writer):
+        batches = self.repo.stream_all(job.checkpoint, self._to_filter(job.query), batch_size=self.batch_size, read="export")
+        path = os.path.join(self.export_dir, export_file_name(job.id, job.query.format))
+        with open(path, "r+b" if job.bytes else "wb") as file:
+            # Anything past the checkpoint belongs to a batch that was never recorded.
+            file.truncate(job.bytes)
+            file.seek(job.bytes)
+
+            header = b"" if job.bytes else writer.header()
+            writing = None
+            try:
+                async for columns in batches:
+                    chunk = header + writer.write(columns)
+                    header = b""
+                    if writing is not None:
+                        await asyncio.shield(writing)
+                    # The next batch is fetched and encoded while this one goes to disk.
+                    writing = asyncio.create_task(self._write(job, file, chunk, len(columns), columns.next_cursor))
+
+                if writing is not None:
+                    await asyncio.shield(writing)
+            finally:
+                # Never close the file under a write still running in a thread;
+                # letting it finish also records its checkpoint.
+                if writing is not None and not writing.done():
+                    await asyncio.wait([writing])
+
+            tail = header + writer.close()
+            await asyncio.to_thread(self._flush, file, tail)
+            job.bytes += len(tail)
+
+    async def _write(self, job: ExportPersonJob, file, chunk: bytes, rows: int, cursor: Optional[str]):
+        await asyncio.to_thread(self._flush, file, chunk)
+        job.rows += rows
+        job.bytes += len(chunk)
+        job.checkpoint = cursor
+        await self._save(job)
+
+    async def _save(self, job: ExportPersonJob):
+        await asyncio.to_thread(self._write_state, job)
+
+    async def _load(self, id: str) -> Optional[ExportPersonJob]:
+        # Ids become file names, so anything but a UUID is rejected up front.
+        try:
+            if str(UUID(id)) != id:
+                return None
+            data = await asyncio.to_thread(self._read_state, id)
+        except (ValueError, FileNotFoundError):
+            return None
+
+        return ExportPersonJob.model_validate_json(data)
+
+    def _flush(self, file, chunk: bytes):
+        file.write(chunk)
+        file.flush()
+
+    def _write_state(self, job: ExportPersonJob):
+        os.makedirs(self.export_dir, exist_ok=True)
+        path = os.path.join(self.export_dir, f"{job.id}.json")
+        with open(path + ".tmp", "w") as file:
+            file.write(job.model_dump_json())
+        os.replace(path + ".tmp", path)
+
+    def _lock(self, id: str):
+        # Workers share the export directory but not self.tasks. The job's
+        # lock file stays locked while a worker runs it, and the OS releases
+        # it when that worker dies, so the job can be resumed. Without fcntl
+        # (Windows) only this worker's own jobs are guarded.
+        os.makedirs(self.export_dir, exist_ok=True)
+        file = open(os.path.join(self.export_dir, f"{id}.lock"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                return None
+
+        return file
+
+    def _read_state(self, id: str) -> str:
+        with open(os.path.join(self.export_dir, f"{id}.json")) as file:
+            return file.read()
+
+    def _to_filter(self, query: ExportPersonQuery) -> PersonFilter:
+        return PersonFilter(
+            name=query.name,
+            min_age=query.min_age,
+            max_age=query.max_age,
+            city=query.city,
+            neighbor=query.neighbor,
+            is_pep=query.is_pep)
@@ -0,0 +1,12 @@
+from typing import Literal, Optional
+from pydantic import BaseModel
+from features.export_person.export_person_query import ExportPersonQuery
+
+class ExportPersonJob(BaseModel):
+    id: str
+    status: Literal["running", "completed", "failed", "interrupted"] = "running"
+    query: ExportPersonQuery
+    rows: int = 0
+    bytes: int = 0
+    checkpoint: Optional[str] = None
+    error: Optional[str] = None
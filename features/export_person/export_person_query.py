@@ -0,0 +1,12 @@
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+class ExportPersonQuery(BaseModel):
+    format: Literal["csv", "ndjson", "parquet"] = "ndjson"
+    name: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    city: Optional[str] = None
+    neighbor: Optional[str] = None
+    is_pep: Optional[bool] = None
+    after: Optional[str] = None
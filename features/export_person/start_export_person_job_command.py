@@ -0,0 +1,4 @@
+from features.export_person.export_person_query import ExportPersonQuery
+
+class StartExportPersonJobCommand(ExportPersonQuery):
+    pass
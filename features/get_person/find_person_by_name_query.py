@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class FindPersonByNameQuery(BaseModel):
+    prefix: str
+    limit: int = 20
@@ -1,4 +1,13 @@
-from pydantic import BaseModel
-
-class GetAllPersonQuery(BaseModel):
-    name: str = None
\ No newline at end of file
+from typing import List, Optional
+from pydantic import BaseModel
+
+class GetAllPersonQuery(BaseModel):
+    name: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    city: Optional[str] = None
+    neighbor: Optional[str] = None
+    is_pep: Optional[bool] = None
+    limit: int = 100
+    after: Optional[str] = None
+    fields: Optional[List[str]] = None
\ No newline at end of file
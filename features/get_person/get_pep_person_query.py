@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class GetPepPersonQuery(BaseModel):
+    limit: int = 100
+    offset: int = 0
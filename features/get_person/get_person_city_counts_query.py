@@ -0,0 +1,5 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class GetPersonCityCountsQuery(BaseModel):
+    city: Optional[str] = None
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
-
-class GetPersonQuery(BaseModel):
-    id: str
+from typing import List, Optional
+from pydantic import BaseModel
+
+class GetPersonQuery(BaseModel):
+    id: str
+    fields: Optional[List[str]] = None
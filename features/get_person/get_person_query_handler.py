@@ -1,20 +1,35 @@
-from typing import List
-from uuid import uuid4
-from features.get_person.get_person_query import GetPersonQuery
-from features.get_person.get_all_person_query import GetAllPersonQuery
-from models.person import Person
-from infra.person_repository import PersonRepository
-
-class GetPersonQueryHandler:
-    def __init__(self, repo: PersonRepository):
-        self.repo = repo
-
-    async def handle_get_person(self, query: GetPersonQuery) -> Person:
-        person = await self.repo.get_by_id(query.id)
-
-        return person
- 
-    async def handle_get_all_person(self, query: GetAllPersonQuery) -> List[Person]:
-        people = await self.repo.get_all()
-
-        return people
+from typing import AsyncIterator
+from uuid import uuid4
+from features.get_person.get_person_query import GetPersonQuery
+from features.get_person.get_all_person_query import GetAllPersonQuery
+from models.person import Person
+from models.person_page import PersonPage
+from models.person_filter import PersonFilter
+from models.person_columns import PersonColumns
+from infra.person_store import PersonStore
+
+class GetPersonQueryHandler:
+    def __init__(self, repo: PersonStore):
+        self.repo = repo
+
+    async def handle_get_person(self, query: GetPersonQuery) -> Person:
+        person = await self.repo.get_by_id(query.id, query.fields)
+
+        return person
+ 
+    async def handle_get_all_person(self, query: GetAllPersonQuery) -> PersonPage:
+        people = await self.repo.get_all(query.limit, query.after, self._to_filter(query), query.fields)
+
+        return people
+
+    def handle_stream_all_person(self, query: GetAllPersonQuery) -> AsyncIterator[PersonColumns]:
+        return self.repo.stream_all(query.after, self._to_filter(query), query.fields)
+
+    def _to_filter(self, query: GetAllPersonQuery) -> PersonFilter:
+        return PersonFilter(
+            name=query.name,
+            min_age=query.min_age,
+            max_age=query.max_age,
+            city=query.city,
+            neighbor=query.neighbor,
+            is_pep=query.is_pep)
@@ -0,0 +1,12 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class GetPersonStatsQuery(BaseModel):
+    name: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    city: Optional[str] = None
+    neighbor: Optional[str] = None
+    is_pep: Optional[bool] = None
+    age_bucket_size: int = 10
+    top_cities: int = 50
@@ -0,0 +1,46 @@
+import asyncio
+import time
+from typing import Callable
+from features.get_person.get_person_stats_query import GetPersonStatsQuery
+from models.person_filter import PersonFilter
+from models.person_stats import PersonStats
+from infra.person_cache import LRUCache
+from infra.person_store import PersonStore
+
+STATS_CACHE_SIZE = 1000
+
+class GetPersonStatsQueryHandler:
+    def __init__(self, repo: PersonStore, cache_ttl_seconds: float = 0, clock: Callable[[], float] = time.monotonic):
+        self.repo = repo
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache = LRUCache(STATS_CACHE_SIZE, clock)
+        self.inflight = {}
+
+    async def handle_get_person_stats(self, query: GetPersonStatsQuery) -> PersonStats:
+        if not self.cache_ttl_seconds:
+            return await self._aggregate(query)
+
+        key = query.model_dump_json()
+        stats = self.cache.get(key)
+        if stats is not None:
+            return stats
+
+        # Dashboards refresh together; concurrent misses share one pipeline.
+        aggregating = self.inflight.get(key)
+        if aggregating is None:
+            aggregating = self.inflight[key] = asyncio.create_task(self._aggregate(query))
+            aggregating.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        stats = await asyncio.shield(aggregating)
+        self.cache.set(key, stats, self.cache_ttl_seconds)
+        return stats
+
+    async def _aggregate(self, query: GetPersonStatsQuery) -> PersonStats:
+        filters = PersonFilter(
+            name=query.name,
+            min_age=query.min_age,
+            max_age=query.max_age,
+            city=query.city,
+            neighbor=query.neighbor,
+            is_pep=query.is_pep)
+        return await self.repo.get_stats(filters, query.age_bucket_size, query.top_cities)
@@ -0,0 +1,21 @@
+from typing import Dict, List
+from features.get_person.find_person_by_name_query import FindPersonByNameQuery
+from features.get_person.get_pep_person_query import GetPepPersonQuery
+from features.get_person.get_person_city_counts_query import GetPersonCityCountsQuery
+from models.person_summary import PersonSummary
+from infra.person_projections import PersonProjections
+
+# Served from the in-memory projections the consumer keeps up to date, never
+# from the persons collection the commands write to.
+class PersonProjectionQueryHandler:
+    def __init__(self, projections: PersonProjections):
+        self.projections = projections
+
+    def handle_get_person_city_counts(self, query: GetPersonCityCountsQuery) -> Dict[str, int]:
+        return self.projections.count_by_city(query.city)
+
+    def handle_get_pep_person(self, query: GetPepPersonQuery) -> List[PersonSummary]:
+        return self.projections.pep_persons(query.limit, query.offset)
+
+    def handle_find_person_by_name(self, query: FindPersonByNameQuery) -> List[PersonSummary]:
+        return self.projections.find_by_name_prefix(query.prefix, query.limit)
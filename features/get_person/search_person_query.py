@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class SearchPersonQuery(BaseModel):
+    q: str
+    limit: int = 10
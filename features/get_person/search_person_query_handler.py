@@ -0,0 +1,13 @@
+from typing import List
+from features.get_person.search_person_query import SearchPersonQuery
+from models.person_search_hit import PersonSearchHit
+from infra.person_search import PersonSearchIndex
+
+# Served from the in-memory search index, which the create handler and a
+# consumer of the persons collection keep up to date.
+class SearchPersonQueryHandler:
+    def __init__(self, search_index: PersonSearchIndex):
+        self.search_index = search_index
+
+    def handle_search_person(self, query: SearchPersonQuery) -> List[PersonSearchHit]:
+        return [PersonSearchHit(id=id, name=name, score=score) for score, id, name in self.search_index.search(query.q, query.limit)]
@@ -0,0 +1,4 @@
+from features.get_person.get_all_person_query import GetAllPersonQuery
+
+class StreamAllPersonQuery(GetAllPersonQuery):
+    pass
@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, Optional, Type
+from features.create_person.bulk_create_person_command import BulkCreatePersonCommand
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.create_person_command_handler import CreatePersonCommandHandler
+from features.create_person.idempotent_create_person_command import IdempotentCreatePersonCommand
+from features.get_person.get_all_person_query import GetAllPersonQuery
+from features.get_person.get_person_query import GetPersonQuery
+from features.get_person.get_person_query_handler import GetPersonQueryHandler
+from features.get_person.stream_all_person_query import StreamAllPersonQuery
+from features.get_person.find_person_by_name_query import FindPersonByNameQuery
+from features.get_person.search_person_query import SearchPersonQuery
+from features.get_person.get_pep_person_query import GetPepPersonQuery
+from features.get_person.get_person_city_counts_query import GetPersonCityCountsQuery
+from features.get_person.person_projection_query_handler import PersonProjectionQueryHandler
+from features.get_person.search_person_query_handler import SearchPersonQueryHandler
+from features.get_person.get_person_stats_query import GetPersonStatsQuery
+from features.get_person.get_person_stats_query_handler import GetPersonStatsQueryHandler
+from features.export_person.export_person_handler import ExportPersonHandler
+from features.export_person.export_person_query import ExportPersonQuery
+from features.export_person.get_export_person_job_query import GetExportPersonJobQuery
+from features.export_person.resume_export_person_job_command import ResumeExportPersonJobCommand
+from features.export_person.start_export_person_job_command import StartExportPersonJobCommand
+from infra.idempotency import IdempotencyStore
+from infra.person_store import PersonStore
+from infra.person_projections import PersonProjections
+from infra.person_search import PersonSearchIndex
+
+class Mediator:
+    def __init__(self):
+        self.handlers: Dict[Type, Callable[[Any], Any]] = {}
+
+    def register(self, message_type: Type, handler: Callable[[Any], Any]):
+        self.handlers[message_type] = handler
+
+    def send(self, message: Any) -> Any:
+        # Exact type lookup: StreamAllPersonQuery must not fall back to the
+        # GetAllPersonQuery handler it inherits its fields from.
+        handler = self.handlers.get(type(message))
+        if handler is None:
+            raise LookupError(f"No handler registered for {type(message).__name__}")
+
+        return handler(message)
+
+def build_mediator(
+    repo: PersonStore,
+    export_person_handler: Optional[ExportPersonHandler] = None,
+    person_projections: Optional[PersonProjections] = None,
+    stats_cache_ttl_seconds: float = 0,
+    id_generator: Optional[Callable[[], str]] = None,
+    idempotency_store: Optional[IdempotencyStore] = None,
+    search_index: Optional[PersonSearchIndex] = None) -> Mediator:
+    # A worker indexes the people it creates for search right away; the
+    # change stream brings in everyone else's.
+    if search_index is None and person_projections is not None:
+        search_index = person_projections.search
+    create_person_handler = CreatePersonCommandHandler(repo, id_generator, search_index, idempotency_store)
+    get_person_handler = GetPersonQueryHandler(repo)
+    export_person_handler = export_person_handler or ExportPersonHandler(repo)
+    get_person_stats_handler = GetPersonStatsQueryHandler(repo, stats_cache_ttl_seconds)
+    projection_handler = PersonProjectionQueryHandler(person_projections if person_projections is not None else PersonProjections())
+    search_handler = SearchPersonQueryHandler(search_index if search_index is not None else PersonSearchIndex())
+
+    mediator = Mediator()
+    mediator.register(CreatePersonCommand, create_person_handler.handle_create_person)
+    mediator.register(IdempotentCreatePersonCommand, create_person_handler.handle_idempotent_create_person)
+    mediator.register(BulkCreatePersonCommand, create_person_handler.handle_bulk_create_person)
+    mediator.register(GetPersonQuery, get_person_handler.handle_get_person)
+    mediator.register(GetAllPersonQuery, get_person_handler.handle_get_all_person)
+    mediator.register(StreamAllPersonQuery, get_person_handler.handle_stream_all_person)
+    mediator.register(GetPersonStatsQuery, get_person_stats_handler.handle_get_person_stats)
+    mediator.register(GetPersonCityCountsQuery, projection_handler.handle_get_person_city_counts)
+    mediator.register(GetPepPersonQuery, projection_handler.handle_get_pep_person)
+    mediator.register(FindPersonByNameQuery, projection_handler.handle_find_person_by_name)
+    mediator.register(SearchPersonQuery, search_handler.handle_search_person)
+    mediator.register(ExportPersonQuery, export_person_handler.handle_export_person)
+    mediator.register(StartExportPersonJobCommand, export_person_handler.handle_start_export_person_job)
+    mediator.register(GetExportPersonJobQuery, export_person_handler.handle_get_export_person_job)
+    mediator.register(ResumeExportPersonJobCommand, export_person_handler.handle_resume_export_person_job)
+    return mediator
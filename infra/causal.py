@@ -0,0 +1,99 @@
+import base64
+import json
+from contextvars import ContextVar
+from bson import BSON
+
+CAUSAL_TOKEN_HEADER = "x-causal-token"
+NEW_TOKEN = "new"
+
+# The causally consistent session of the request being served, if its client
+# asked for one. The repository passes it to every command it sends.
+causal_session: ContextVar = ContextVar("causal_session", default=None)
+
+def session_options() -> dict:
+    # Background work started during a request inherits the context var
+    # after the session has ended; it then runs without one.
+    session = causal_session.get()
+    if session is None or session.has_ended:
+        return {}
+
+    return {"session": session}
+
+def encode_token(session) -> str:
+    return base64.urlsafe_b64encode(BSON.encode({
+        "operationTime": session.operation_time,
+        "clusterTime": session.cluster_time
+    })).decode()
+
+def decode_token(token: str) -> dict:
+    try:
+        times = BSON(base64.urlsafe_b64decode(token.encode())).decode()
+    except Exception as error:
+        raise ValueError(f"Malformed causal token: {error}")
+
+    if "operationTime" not in times or "clusterTime" not in times:
+        raise ValueError("Malformed causal token: missing operation or cluster time")
+
+    return times
+
+def _start_session(scope):
+    return scope["app"].state.database.client.start_session(causal_consistency=True)
+
+# Read-your-own-writes across requests and workers. A client that sends
+# X-Causal-Token gets a causally consistent MongoDB session for the request,
+# and the response carries a token with the session's operation and cluster
+# time. Sent back with the next request, the token moves the new session
+# forward to that point, so a read routed to a secondary waits until the
+# secondary has applied the client's earlier writes. "new" starts a chain.
+class CausalConsistencyMiddleware:
+    def __init__(self, app, start_session=_start_session):
+        self.app = app
+        self.start_session = start_session
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == CAUSAL_TOKEN_HEADER.encode():
+                token = value.decode("latin-1")
+                break
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            times = decode_token(token) if token != NEW_TOKEN else None
+        except ValueError as error:
+            await _bad_request(send, str(error))
+            return
+
+        async with await self.start_session(scope) as session:
+            if times is not None:
+                session.advance_cluster_time(times["clusterTime"])
+                session.advance_operation_time(times["operationTime"])
+
+            async def send_with_token(message):
+                if message["type"] == "http.response.start" and session.operation_time is not None:
+                    message = {**message, "headers": [
+                        *message.get("headers", []),
+                        (CAUSAL_TOKEN_HEADER.encode(), encode_token(session).encode())
+                    ]}
+                await send(message)
+
+            reset = causal_session.set(session)
+            try:
+                await self.app(scope, receive, send_with_token)
+            finally:
+                causal_session.reset(reset)
+
+async def _bad_request(send, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 400,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
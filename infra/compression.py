@@ -0,0 +1,138 @@
+import zlib
+from typing import Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+class GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int = 5):
+        # wbits 31 writes the gzip header and trailer.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class ZstdEncoder:
+    encoding = "zstd"
+
+    def __init__(self, level: int = 3):
+        # compression.zstd ships with Python 3.14; older interpreters need
+        # the zstandard package.
+        if zstd is not None:
+            self.compressor = zstd.ZstdCompressor(level=level)
+        else:
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if zstd is not None:
+            mode = zstd.ZstdCompressor.FLUSH_FRAME if final else zstd.ZstdCompressor.FLUSH_BLOCK
+            return self.compressor.compress(data, mode)
+
+        flush = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self.compressor.compress(data) + self.compressor.flush(flush)
+
+def available_encoders() -> dict:
+    # In order of preference when the client accepts several equally.
+    encoders = {}
+    if zstd is not None or zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    encoders["gzip"] = GzipEncoder
+    return encoders
+
+def choose_encoding(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    chosen, chosen_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = encoding, weight
+
+    return chosen
+
+class CompressionMiddleware:
+    # Negotiated gzip or zstd for JSON, NDJSON and text bodies. Complete
+    # bodies below minimum_size are sent as they are, where compression costs
+    # more than it saves. Streamed bodies are compressed chunk by chunk and
+    # flushed after each one so rows keep arriving as they are produced.
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encoders()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encoders)
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+                if compressible:
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                passthrough = not compressible or encoding is None or message["status"] < 200 or message["status"] in (204, 304)
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                encoder = self.encoders[encoding]()
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                del headers["Content-Length"]
+                if not more_body:
+                    body = encoder.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                await send(start)
+
+            await send({"type": "http.response.body", "body": encoder.compress(body, final=not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
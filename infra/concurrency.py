@@ -0,0 +1,292 @@
+import asyncio
+import json
+import math
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from infra.metrics import CONCURRENCY_LIMIT, CONCURRENCY_QUEUED, REQUESTS_SHED
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+SAFE_METHODS = ("GET", "HEAD")
+
+# Durations of the MongoDB calls made for the current request, appended by
+# PersonRepository through backend_call. ConcurrencyLimitMiddleware sets a
+# fresh list per request; elsewhere it is None and nothing is timed.
+backend_calls: ContextVar[Optional[List[float]]] = ContextVar("backend_calls", default=None)
+
+@contextmanager
+def backend_call(clock: Callable[[], float] = time.monotonic):
+    calls = backend_calls.get()
+    if calls is None:
+        yield
+        return
+
+    started = clock()
+    try:
+        yield
+    finally:
+        calls.append(clock() - started)
+
+class AdaptiveLimit:
+    # AIMD concurrency limit for one route. Every admitted request reports
+    # how long it waited on MongoDB; requests that never reached it, like
+    # cache hits, report nothing, so a fast cache does not make ordinary
+    # reads look slow. Samples are judged a window at a time by their
+    # percentile latency. Within tolerance times the baseline, and with the
+    # limit in use, the limit grows by about one per limit requests. Slower,
+    # or with a failed request, it is cut in proportion to the slowdown, by
+    # backoff to half. The baseline is the median percentile of the last
+    # history windows: one unusually fast or slow window does not move it,
+    # and overload is cut several times over before the baseline gives in to
+    # a database that really got slower. Requests over the limit wait in a
+    # FIFO queue of up to max_queue.
+    def __init__(
+        self,
+        initial_limit: int = 100,
+        min_limit: int = 4,
+        max_limit: int = 1000,
+        max_queue: int = 50,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        window: int = 50,
+        percentile: float = 0.9,
+        history: int = 10):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.percentile = percentile
+        self.in_flight = 0
+        self.waiters = deque()
+        self.queued = 0
+        self.history = deque(maxlen=history)
+        self.samples: List[float] = []
+        self.failures = 0
+        self.observed = 0
+        self.peak_in_flight = 0
+
+    @property
+    def baseline(self) -> Optional[float]:
+        return statistics.median(self.history) if self.history else None
+
+    def try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self.queued:
+            self.in_flight += 1
+            return True
+
+        return False
+
+    def queue_full(self) -> bool:
+        return self.queued >= self.max_queue
+
+    def expected_wait(self) -> float:
+        # Time until a request queued now gets a slot, if the requests
+        # ahead of it take as long as the last window did.
+        if not self.history:
+            return 0.0
+
+        return (self.queued + 1) * self.history[-1] / max(int(self.limit), 1)
+
+    async def wait(self, timeout: float) -> bool:
+        if timeout <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # release() counts the slot in in_flight when it hands it over;
+            # a waiter that timed out at the same moment still owns it.
+            return waiter.done() and not waiter.cancelled()
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                self.queued -= 1
+
+        return True
+
+    def release(self, latency: Optional[float], failed: bool = False):
+        # latency is the request's time in MongoDB, None if it made no calls.
+        self._observe(latency, failed)
+        self.in_flight -= 1
+        self._wake()
+
+    def _observe(self, latency: Optional[float], failed: bool):
+        if latency is None and not failed:
+            return
+
+        if latency is not None:
+            self.samples.append(latency)
+        self.failures += failed
+        self.observed += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.observed < self.window:
+            return
+
+        samples = sorted(self.samples)
+        current = samples[min(len(samples) - 1, int(len(samples) * self.percentile))] if samples else None
+        baseline = self.baseline if self.baseline is not None else current
+        slow = current is not None and current > baseline * self.tolerance
+        if current is not None:
+            self.history.append(current)
+        if slow or self.failures:
+            factor = max(0.5, min(self.backoff, baseline * self.tolerance / current)) if slow else self.backoff
+            self.limit = max(self.min_limit, self.limit * factor)
+        elif self.peak_in_flight >= self.limit / 2:
+            self.limit = min(self.max_limit, self.limit + self.observed / self.limit)
+
+        self.samples = []
+        self.failures = 0
+        self.observed = 0
+        self.peak_in_flight = 0
+
+    def _wake(self):
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            self.queued -= 1
+            waiter.set_result(None)
+
+class ConcurrencyLimitMiddleware:
+    # Sheds load before it reaches MongoDB: each route gets its own
+    # AdaptiveLimit, and a request that cannot start within its budget is
+    # answered 503 with Retry-After instead of waiting in the driver's pool
+    # queue. The budget is the client's X-Request-Timeout-Ms, counted from
+    # arrival, or max_wait_ms. An expired GET is also cancelled while it
+    # runs, since nobody will read the answer; writes always run to the end.
+    def __init__(
+        self,
+        app,
+        limit_factory: Callable[[], AdaptiveLimit] = AdaptiveLimit,
+        max_wait_ms: float = 1000,
+        retry_after_seconds: int = 1,
+        exempt: Iterable[str] = ("/", "/ready", "/metrics"),
+        clock: Callable[[], float] = time.monotonic):
+        self.app = app
+        self.limit_factory = limit_factory
+        self.max_wait = max_wait_ms / 1000
+        self.retry_after = retry_after_seconds
+        self.exempt = set(exempt)
+        self.clock = clock
+        self.limits: Dict[str, AdaptiveLimit] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        arrived = self.clock()
+        route = self._route(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = self._deadline(scope, arrived)
+        limit = self.limits.get(route)
+        if limit is None:
+            limit = self.limits[route] = self.limit_factory()
+
+        if deadline is not None and self.clock() >= deadline:
+            REQUESTS_SHED.inc(route, "deadline")
+            await self._reject(send)
+            return
+
+        if not limit.try_acquire():
+            budget = (deadline if deadline is not None else arrived + self.max_wait) - self.clock()
+            reason = "deadline" if deadline is not None else "timeout"
+            if limit.queue_full():
+                reason, admitted = "queue_full", False
+            elif limit.expected_wait() >= budget:
+                # It would only get a slot when there is no time left to use it.
+                admitted = False
+            else:
+                CONCURRENCY_QUEUED.inc(route)
+                try:
+                    admitted = await limit.wait(budget)
+                finally:
+                    CONCURRENCY_QUEUED.dec(route)
+            if not admitted:
+                REQUESTS_SHED.inc(route, reason)
+                await self._reject(send)
+                return
+
+        status_code = 500
+        response_started = False
+
+        async def send_with_status(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        calls = []
+        reset = backend_calls.set(calls)
+        started = self.clock()
+        try:
+            if deadline is not None and scope["method"] in SAFE_METHODS:
+                try:
+                    await asyncio.wait_for(self.app(scope, receive, send_with_status), deadline - started)
+                except asyncio.TimeoutError:
+                    REQUESTS_SHED.inc(route, "deadline")
+                    if not response_started:
+                        await self._reject(send)
+                    return
+            else:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            backend_calls.reset(reset)
+            limit.release(sum(calls) if calls else None, failed=status_code >= 500)
+            CONCURRENCY_LIMIT.set(route, value=int(limit.limit))
+
+    def _route(self, scope) -> Optional[str]:
+        # The router has not run yet, so the template is matched here; limits
+        # are per method and template, never per id. Exempt and unknown
+        # routes are not limited.
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                # Stored as the router does, so MetricsMiddleware labels the
+                # requests shed here with their template too.
+                scope["route"] = route
+                return None if route.path in self.exempt else f"{scope['method']} {route.path}"
+
+        return None
+
+    def _deadline(self, scope, arrived: float) -> Optional[float]:
+        value = Headers(scope=scope).get(DEADLINE_HEADER)
+        if value is None:
+            return None
+
+        try:
+            timeout_ms = float(value)
+        except ValueError:
+            return None
+
+        # nan and inf parse but are no deadline; the default budget applies.
+        return arrived + max(timeout_ms, 0) / 1000 if math.isfinite(timeout_ms) else None
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,17 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from bson import ObjectId
+
+def encode_cursor(object_id: ObjectId) -> str:
+    return urlsafe_b64encode(object_id.binary).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (Base64Error, ValueError):
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+
+    if len(raw) != 12:
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+
+    return ObjectId(raw)
@@ -1,15 +1,77 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from settings import Settings
-
-class Database:
-    def __init__(self, settings: Settings):
-        self.settings = settings
-        self.client = AsyncIOMotorClient(settings.mongo_connection)
-        self.database = self.client[settings.mongo_database]
-        self.persons_collection = self.database[settings.mongo_collection]
-
-    async def close_connection(self):
-        self.client.close()
-
-def get_database(settings: Settings):
-    return Database(settings)
\ No newline at end of file
+import asyncio
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from infra.metrics import mongo_event_listeners
+from settings import PERSON_READS, Settings
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+class Database:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.client = AsyncIOMotorClient(
+            settings.mongo_connection,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            event_listeners=mongo_event_listeners())
+        self.database = self.client[settings.mongo_database]
+        collection = self.database[settings.mongo_collection]
+        self.persons_collection = _with_write_concern(collection, settings.write_concern)
+        self.batched_persons_collection = _with_write_concern(collection, settings.batched_write_concern)
+        # As durable as the people the keys point to.
+        self.idempotency_collection = _with_write_concern(
+            self.database[f"{settings.mongo_collection}_idempotency_keys"], settings.write_concern)
+        # Reads go through their own handles so list reads, stats and exports
+        # can be sent to secondaries while writes stay on the primary.
+        self.person_read_collections = {
+            read: _with_read_preference(collection, settings.read_preferences[read], settings.max_staleness_seconds[read])
+            for read in PERSON_READS
+        }
+
+    async def warm_up(self):
+        # One concurrent ping per pooled connection forces the driver to open
+        # min_pool_size sockets now instead of on the first requests.
+        connections = max(self.settings.mongo_min_pool_size, 1)
+        await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+
+    async def close_connection(self):
+        self.client.close()
+
+def _with_write_concern(collection, w: Optional[str]):
+    if w is None:
+        return collection
+
+    return collection.with_options(write_concern=WriteConcern(w=int(w) if w.isdigit() else w))
+
+def _with_read_preference(collection, mode: str, max_staleness_seconds: int):
+    preference = read_preference(mode, max_staleness_seconds)
+    if preference == Primary():
+        return collection
+
+    return collection.with_options(read_preference=preference)
+
+def read_preference(mode: str, max_staleness_seconds: int = -1):
+    preference = READ_PREFERENCES.get(mode)
+    if preference is None:
+        raise ValueError(f"Unknown read preference: '{mode}', expected one of {', '.join(READ_PREFERENCES)}")
+    if max_staleness_seconds != -1 and max_staleness_seconds < 90:
+        raise ValueError("Max staleness must be -1 or at least 90 seconds")
+    if preference is Primary:
+        if max_staleness_seconds != -1:
+            raise ValueError("Max staleness cannot be combined with the primary read preference")
+        return Primary()
+
+    return preference(max_staleness=max_staleness_seconds)
+
+def get_database(settings: Settings):
+    return Database(settings)
@@ -0,0 +1,43 @@
+import hashlib
+import json
+from typing import List, Optional
+from models.person import Person
+from models.person_page import PersonPage
+
+def person_version(doc: dict) -> str:
+    # Content hash of the stored fields, written next to them on save.
+    canonical = json.dumps(doc, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+def person_etag(person: Person, fields: Optional[List[str]] = None) -> Optional[str]:
+    if person.version is None:
+        return None
+
+    return _etag(person.version, *sorted(fields or ()))
+
+def page_etag(page: PersonPage, fields: Optional[List[str]] = None) -> Optional[str]:
+    # The body is determined by the versions of its items and the field set;
+    # the cursor is part of the response too, in X-Next-Cursor.
+    versions = [person.version for person in page.items]
+    if None in versions:
+        return None
+
+    return _etag(*versions, page.next_cursor or "", *sorted(fields or ()))
+
+def body_etag(body: bytes) -> str:
+    # Fallback for documents stored before versions existed.
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+def _etag(*parts: str) -> str:
+    # Weak because the same body may be sent gzip or zstd encoded.
+    return f'W/"{hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()}"'
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+class IdempotencyKeyConflict(ValueError):
+    pass
+
+def request_fingerprint(body: dict) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def _utc(value: datetime) -> datetime:
+    # pymongo hands datetimes back naive unless the client is tz_aware.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+# Remembers which person an Idempotency-Key created, so a retried POST gets
+# the same id back instead of creating the person again. A record is keyed by
+# _id, which the server keeps unique, and claims the person id before the
+# person is written: whoever inserts the record creates the person, every
+# other request with the key waits for it. Because the person id is fixed by
+# the record, even a request that takes over from an owner that has not
+# finished within lease_seconds cannot write a second person; the unique id
+# index rejects it. Records are removed by a TTL index some time after
+# ttl_seconds.
+class IdempotencyStore:
+    def __init__(
+        self,
+        collection,
+        ttl_seconds: float = 86400,
+        lease_seconds: float = 30,
+        poll_interval_ms: float = 50,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_interval = poll_interval_ms / 1000
+        self.clock = clock
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_indexes([
+            IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=int(self.ttl_seconds))
+        ])
+
+    async def create_once(self, key: str, fingerprint: str, new_id: str, create: Callable[[str], Awaitable[Any]]) -> str:
+        # Returns the id of the person created for key, calling create(new_id)
+        # only if no earlier request with key did. Requests in this worker
+        # share one attempt; requests in other workers wait on the record.
+        loading = self.inflight.get(key)
+        if loading is None:
+            # The attempt runs in its own task, as the person cache's loads
+            # do: an owner cancelled by a disconnect or at its deadline
+            # neither cancels it nor leaves the requests sharing it waiting
+            # forever.
+            loading = self.inflight[key] = asyncio.create_task(self._attempt(key, fingerprint, new_id, create))
+            # Mark an error as retrieved in case every caller was cancelled.
+            loading.add_done_callback(lambda task: task.cancelled() or task.exception())
+        record = await asyncio.shield(loading)
+
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyKeyConflict(f"Idempotency key '{key}' was already used for a different request")
+
+        return record["person_id"]
+
+    async def _attempt(self, key: str, fingerprint: str, new_id: str, create: Callable[[str], Awaitable[Any]]) -> dict:
+        try:
+            return await self._create_once(key, fingerprint, new_id, create)
+        finally:
+            del self.inflight[key]
+
+    async def _create_once(self, key: str, fingerprint: str, new_id: str, create: Callable[[str], Awaitable[Any]]) -> dict:
+        record = await self._claim(key, fingerprint, new_id)
+        while record["fingerprint"] == fingerprint and record["status"] != "completed":
+            if record["person_id"] == new_id:
+                try:
+                    await self._create(record, create)
+                except Exception:
+                    # Let a retry start over with a new claim.
+                    await self.collection.delete_one({"_id": key, "person_id": new_id})
+                    raise
+                return {**record, "status": "completed"}
+
+            if self.clock() - _utc(record["created_at"]) >= self.lease:
+                await self._create(record, create)
+                return {**record, "status": "completed"}
+
+            await asyncio.sleep(self.poll_interval)
+            record = await self.collection.find_one({"_id": key})
+            if record is None:
+                # The owner failed and gave the key up.
+                record = await self._claim(key, fingerprint, new_id)
+
+        return record
+
+    async def _claim(self, key: str, fingerprint: str, new_id: str) -> dict:
+        record = {"_id": key, "fingerprint": fingerprint, "person_id": new_id, "status": "pending", "created_at": self.clock()}
+        while True:
+            try:
+                await self.collection.insert_one(record)
+                return record
+            except DuplicateKeyError:
+                existing = await self.collection.find_one({"_id": key})
+                if existing is not None:
+                    return existing
+
+    async def _create(self, record: dict, create: Callable[[str], Awaitable[Any]]):
+        try:
+            await create(record["person_id"])
+        except DuplicateKeyError:
+            # Written by whoever else held the record; the id is the same.
+            pass
+        await self.collection.update_one({"_id": record["_id"]}, {"$set": {"status": "completed"}})
@@ -0,0 +1,432 @@
+from bisect import bisect_left, bisect_right, insort
+from heapq import nsmallest
+from itertools import islice
+from operator import itemgetter
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from models.person import Person
+from models.person_page import PersonPage
+from models.person_filter import PersonFilter
+from models.person_columns import PersonColumns
+from models.person_stats import AgeBucket, CityCount, PersonStats
+from infra.causal import session_options
+from infra.cursor import decode_cursor, encode_cursor
+from infra.person_documents import build_projection, is_person_id, to_document, to_person
+from infra.person_ids import public_id
+from infra.person_store import PersonStore
+
+DUPLICATE_KEY = 11000
+_first = itemgetter(0)
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    # The smallest string above every string that starts with prefix, so a
+    # prefix is one range of a sorted index. None means no upper bound.
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _remove(keys: list, entry):
+    index = bisect_left(keys, entry)
+    if index < len(keys) and keys[index] == entry:
+        del keys[index]
+
+# PersonStore kept in process, for tests, benchmarks and the embedded read
+# replica. Documents are stored as MongoDB would store them, keyed by an
+# ObjectId _id, and are converted to and from models by the same
+# infra.person_documents functions as in PersonRepository, so pages, cursors, projections, versions and stats
+# come out the same. Indexes:
+# - keys: every _id in order, for unfiltered pages
+# - ids: hash index on the public person id
+# - cities, neighbors, peps: hash indexes from value to its _ids in order
+# - ages, names: sorted (value, _id) lists for age ranges and name prefixes
+# A read walks whichever index gives the fewest candidates and checks the
+# remaining filters on each document, much like the Mongo query planner.
+# The upsert/load/finish_load/delete/clear methods let ProjectionConsumer
+# keep a copy of the collection up to date; ready is set once it has
+# loaded it.
+class InMemoryPersonRepository(PersonStore):
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+        self.documents: Dict[ObjectId, dict] = {}
+        self.keys: List[ObjectId] = []
+        self.ids: Dict[str, ObjectId] = {}
+        self.cities: Dict[str, List[ObjectId]] = {}
+        self.neighbors: Dict[str, List[ObjectId]] = {}
+        self.peps: Dict[bool, List[ObjectId]] = {}
+        self.ages: List[Tuple[float, ObjectId]] = []
+        self.names: List[Tuple[str, ObjectId]] = []
+        self.ready = False
+
+    async def save(self, item: Person) -> str:
+        document = to_document(item)
+        self._insert(document)
+        return str(document["_id"])
+
+    async def save_many(self, items: List[Person]) -> List[Optional[str]]:
+        # Unordered like insert_many: a duplicate fails only its own item.
+        errors = [None] * len(items)
+        for index, item in enumerate(items):
+            try:
+                self._insert(to_document(item))
+            except DuplicateKeyError as error:
+                errors[index] = str(error)
+
+        return errors
+
+    async def get_all(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None) -> PersonPage:
+        projection = {**build_projection(fields), "_id": 1} if fields else None
+        docs = self._find(filters, decode_cursor(after) if after is not None else None, limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["_id"])
+
+        return PersonPage(
+            items=[to_person(self._project(doc, projection)) for doc in docs],
+            next_cursor=next_cursor)
+
+    def stream_all(
+        self,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        read: str = "list") -> AsyncIterator[PersonColumns]:
+        # Validated before the first batch, as the Mongo repository does.
+        projection = {**build_projection(fields), "_id": 1} if fields else None
+        after_key = decode_cursor(after) if after is not None else None
+        return self._iterate_batches(filters, after_key, projection, batch_size or self.batch_size)
+
+    async def get_stats(self, filters: Optional[PersonFilter], age_bucket_size: int, top_cities: int) -> PersonStats:
+        # Same numbers as the Mongo pipeline: the average ignores ages that
+        # are not numbers, ages from 0 to 150 fall in buckets, and cities
+        # that are not strings are not counted.
+        total = peps = 0
+        age_sum = age_count = 0
+        buckets: Dict[int, int] = {}
+        cities: Dict[str, int] = {}
+        upper = range(0, 151 + age_bucket_size, age_bucket_size)[-1]
+        keys, _ = self._plan(filters, None)
+        for doc in self._matching(keys, filters):
+            total += 1
+            if doc.get("is_pep") is True:
+                peps += 1
+            age = doc.get("age")
+            if _is_number(age):
+                age_sum += age
+                age_count += 1
+                if 0 <= age < upper:
+                    bucket = int(age // age_bucket_size) * age_bucket_size
+                    buckets[bucket] = buckets.get(bucket, 0) + 1
+            address = doc.get("address")
+            city = address.get("city") if isinstance(address, dict) else None
+            if isinstance(city, str):
+                cities[city] = cities.get(city, 0) + 1
+
+        return PersonStats(
+            total=total,
+            pep_count=peps,
+            pep_ratio=peps / total if total else 0.0,
+            average_age=age_sum / age_count if age_count else None,
+            age_histogram=[
+                AgeBucket(min_age=bucket, max_age=bucket + age_bucket_size - 1, count=count)
+                for bucket, count in sorted(buckets.items())
+            ],
+            cities=[
+                CityCount(city=city, count=count)
+                for city, count in sorted(cities.items(), key=lambda item: (-item[1], item[0]))[:top_cities]
+            ])
+
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Person]:
+        projection = build_projection(fields)
+        key = self.ids.get(id) if is_person_id(id) else None
+        if key is None:
+            return None
+
+        return to_person(self._project(self.documents[key], projection))
+
+    async def ensure_indexes(self):
+        # The indexes are kept up to date on every write.
+        pass
+
+    def upsert(self, doc: dict):
+        self._add(doc)
+
+    def load(self, docs: List[dict]):
+        # Bulk path for rebuilding an empty copy: the indexes are appended to
+        # and sorted once by finish_load instead of an insort per document.
+        for doc in docs:
+            self._add(doc, sort=False)
+
+    def finish_load(self):
+        self.keys.sort()
+        for index in (self.cities, self.neighbors, self.peps):
+            for keys in index.values():
+                keys.sort()
+        self.ages.sort()
+        self.names.sort()
+
+    def delete(self, key):
+        doc = self.documents.pop(key, None)
+        if doc is None:
+            return
+
+        _remove(self.keys, key)
+        id = public_id(doc.get("id"))
+        if isinstance(id, str) and self.ids.get(id) == key:
+            del self.ids[id]
+        for index, value in self._hashed(doc):
+            _remove(index[value], key)
+            if not index[value]:
+                del index[value]
+        age, name = doc.get("age"), doc.get("name")
+        if _is_number(age):
+            _remove(self.ages, (age, key))
+        if isinstance(name, str):
+            _remove(self.names, (name, key))
+
+    def clear(self):
+        for index in (self.documents, self.ids, self.cities, self.neighbors, self.peps):
+            index.clear()
+        for keys in (self.keys, self.ages, self.names):
+            keys.clear()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _insert(self, document: dict):
+        id = public_id(document.get("id"))
+        if isinstance(id, str) and id in self.ids:
+            raise DuplicateKeyError(f"E11000 duplicate key error index: id_unique dup key: {{ id: \"{id}\" }}", DUPLICATE_KEY)
+
+        # The driver sets _id on the inserted document too.
+        document.setdefault("_id", ObjectId())
+        self._add(document)
+
+    def _add(self, doc: dict, sort: bool = True):
+        key = doc["_id"]
+        self.delete(key)
+        add = insort if sort else list.append
+
+        self.documents[key] = doc
+        if sort and (not self.keys or self.keys[-1] < key):
+            # New ObjectIds are ascending, so inserts almost always append.
+            self.keys.append(key)
+        else:
+            add(self.keys, key)
+        id = public_id(doc.get("id"))
+        if isinstance(id, str):
+            self.ids[id] = key
+        for index, value in self._hashed(doc):
+            add(index.setdefault(value, []), key)
+        age, name = doc.get("age"), doc.get("name")
+        if _is_number(age):
+            add(self.ages, (age, key))
+        if isinstance(name, str):
+            add(self.names, (name, key))
+
+    def _hashed(self, doc: dict) -> Iterator[Tuple[dict, object]]:
+        address = doc.get("address")
+        if isinstance(address, dict):
+            if isinstance(address.get("city"), str):
+                yield self.cities, address["city"]
+            if isinstance(address.get("neighbor"), str):
+                yield self.neighbors, address["neighbor"]
+        if isinstance(doc.get("is_pep"), bool):
+            yield self.peps, doc["is_pep"]
+
+    def _plan(self, filters: Optional[PersonFilter], after: Optional[ObjectId]) -> Tuple[Iterable[ObjectId], bool]:
+        # Candidate _ids from the smallest index the filters can use, and
+        # whether they come in _id order. Only the candidates after the
+        # cursor are returned; hash indexes and keys start right after it.
+        plans = [(len(self.keys), self.keys, True)]
+        if filters is not None:
+            for value, index in ((filters.city, self.cities), (filters.neighbor, self.neighbors), (filters.is_pep, self.peps)):
+                if value is not None:
+                    keys = index.get(value, [])
+                    plans.append((len(keys), keys, True))
+
+            if filters.min_age is not None or filters.max_age is not None:
+                low = bisect_left(self.ages, filters.min_age, key=_first) if filters.min_age is not None else 0
+                high = bisect_right(self.ages, filters.max_age, key=_first) if filters.max_age is not None else len(self.ages)
+                plans.append((max(high - low, 0), (self.ages, low, high), False))
+
+            if filters.name:
+                end = _prefix_end(filters.name)
+                low = bisect_left(self.names, filters.name, key=_first)
+                high = bisect_left(self.names, end, key=_first) if end is not None else len(self.names)
+                plans.append((max(high - low, 0), (self.names, low, high), False))
+
+        _, keys, ordered = min(plans, key=_first)
+        if ordered:
+            start = bisect_right(keys, after) if after is not None else 0
+            return map(keys.__getitem__, range(start, len(keys))), True
+
+        entries, low, high = keys
+        keys = (key for _, key in map(entries.__getitem__, range(low, high)))
+        if after is not None:
+            keys = (key for key in keys if key > after)
+        return keys, False
+
+    def _matching(self, keys: Iterable[ObjectId], filters: Optional[PersonFilter]) -> Iterator[dict]:
+        docs = map(self.documents.__getitem__, keys)
+        if filters is None:
+            return docs
+
+        return (doc for doc in docs if self._matches(doc, filters))
+
+    def _find(self, filters: Optional[PersonFilter], after: Optional[ObjectId], limit: int) -> List[dict]:
+        keys, ordered = self._plan(filters, after)
+        docs = self._matching(keys, filters)
+        if ordered:
+            return list(islice(docs, limit))
+
+        # A range index is in value order: keep the first limit by _id.
+        return nsmallest(limit, docs, key=itemgetter("_id"))
+
+    def _matches(self, doc: dict, filters: PersonFilter) -> bool:
+        # The predicates of PersonRepository._build_filter, with MongoDB's
+        # type rules: ranges only match numbers, prefixes only strings.
+        if filters.name:
+            name = doc.get("name")
+            if not isinstance(name, str) or not name.startswith(filters.name):
+                return False
+
+        if filters.min_age is not None or filters.max_age is not None:
+            age = doc.get("age")
+            if not _is_number(age):
+                return False
+            if filters.min_age is not None and age < filters.min_age:
+                return False
+            if filters.max_age is not None and age > filters.max_age:
+                return False
+
+        address = doc.get("address")
+        address = address if isinstance(address, dict) else {}
+        if filters.city is not None and address.get("city") != filters.city:
+            return False
+        if filters.neighbor is not None and address.get("neighbor") != filters.neighbor:
+            return False
+        if filters.is_pep is not None and doc.get("is_pep") is not filters.is_pep:
+            return False
+
+        return True
+
+    def _project(self, doc: dict, projection: Optional[dict]) -> dict:
+        if projection is None:
+            return doc
+
+        included = [field for field, value in projection.items() if value and field != "_id"]
+        if not included:
+            return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+        projected = {"_id": doc["_id"]} if projection.get("_id", 1) else {}
+        for field in included:
+            name, _, subfield = field.partition(".")
+            if name not in doc:
+                continue
+            if not subfield:
+                projected[name] = doc[name]
+            elif isinstance(doc[name], dict):
+                # Like MongoDB, a subfield of a document that lacks it leaves
+                # an empty document, and of anything else leaves nothing.
+                nested = projected.setdefault(name, {})
+                if subfield in doc[name]:
+                    nested[subfield] = doc[name][subfield]
+
+        return projected
+
+    async def _iterate_batches(
+        self,
+        filters: Optional[PersonFilter],
+        after: Optional[ObjectId],
+        projection: Optional[dict],
+        batch_size: int) -> AsyncIterator[PersonColumns]:
+        # Each batch is looked up after the last _id of the one before, like
+        # a resumed cursor, so writes between batches cannot upset it.
+        while True:
+            docs = self._find(filters, after, batch_size)
+            if not docs:
+                return
+
+            after = docs[-1]["_id"]
+            columns = PersonColumns.from_documents(self._project(doc, projection) for doc in docs)
+            columns.next_cursor = encode_cursor(after)
+            yield columns
+            if len(docs) < batch_size:
+                return
+
+# Serves reads from an in-process replica once it has loaded the collection,
+# and writes and everything else from the primary store. The replica trails
+# the collection by the projection consumer's lag, so, as with secondaries,
+# requests with a causal session read from the primary. A person saved here
+# is copied to the replica under the _id the primary gave it, and an id the
+# replica does not have yet is looked up on the primary, so a worker reads
+# the people it just created and a miss is never served from the replica.
+class ReplicatedPersonRepository(PersonStore):
+    def __init__(self, primary: PersonStore, replica: InMemoryPersonRepository):
+        self.primary = primary
+        self.replica = replica
+
+    async def save(self, item: Person) -> str:
+        saved = await self.primary.save(item)
+        if ObjectId.is_valid(saved):
+            # The consumer later replaces it with the stored document.
+            self.replica.upsert({**to_document(item), "_id": ObjectId(saved)})
+
+        return saved
+
+    async def save_many(self, items: List[Person]) -> List[Optional[str]]:
+        return await self.primary.save_many(items)
+
+    async def get_all(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None) -> PersonPage:
+        return await self._reads().get_all(limit, after, filters, fields)
+
+    def stream_all(
+        self,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        read: str = "list") -> AsyncIterator[PersonColumns]:
+        return self._reads().stream_all(after, filters, fields, batch_size, read)
+
+    async def get_stats(self, filters: Optional[PersonFilter], age_bucket_size: int, top_cities: int) -> PersonStats:
+        return await self._reads().get_stats(filters, age_bucket_size, top_cities)
+
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Person]:
+        reads = self._reads()
+        person = await reads.get_by_id(id, fields)
+        if person is None and reads is self.replica:
+            return await self.primary.get_by_id(id, fields)
+
+        return person
+
+    async def ensure_indexes(self):
+        await self.primary.ensure_indexes()
+
+    def _reads(self) -> PersonStore:
+        if self.replica.ready and not session_options():
+            return self.replica
+
+        return self.primary
+
+    def __getattr__(self, name):
+        return getattr(self.primary, name)
@@ -0,0 +1,223 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable, Tuple
+from pymongo import monitoring
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float):
+        with self.lock:
+            self.values[label_values] = value
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, *label_values: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self.lock:
+            values = [(label_values, list(counts), total) for label_values, (counts, total) in self.values.items()]
+        for label_values, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self, extra: Iterable = ()) -> str:
+        lines = []
+        for metric in [*self.metrics, *extra]:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+MONGO_COMMAND_DURATION = REGISTRY.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by command", ("command", "outcome"))
+MONGO_POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection")
+MONGO_POOL_CHECKOUT_FAILURES = REGISTRY.counter(
+    "mongo_pool_checkout_failures_total", "Failed MongoDB connection checkouts by reason", ("reason",))
+MONGO_POOL_IN_USE = REGISTRY.gauge(
+    "mongo_pool_connections_in_use", "MongoDB connections currently checked out")
+MONGO_POOL_OPEN = REGISTRY.gauge(
+    "mongo_pool_connections_open", "MongoDB connections currently open")
+MONGO_WRITE_BATCH_SIZE = REGISTRY.histogram(
+    "mongo_write_batch_size", "Documents per coalesced insert_many", buckets=BATCH_SIZE_BUCKETS)
+PERSON_PROJECTION_LAG = REGISTRY.gauge(
+    "person_projection_lag_seconds", "Age of the last change applied to the person projections, 0 when caught up")
+PERSON_PROJECTION_CHANGES = REGISTRY.counter(
+    "person_projection_changes_total", "Changes applied to the person projections by operation", ("operation",))
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "http_concurrency_limit", "Adaptive in-flight request limit by route", ("route",))
+CONCURRENCY_QUEUED = REGISTRY.gauge(
+    "http_concurrency_queued", "Requests waiting for a slot under the concurrency limit by route", ("route",))
+REQUESTS_SHED = REGISTRY.counter(
+    "http_requests_shed_total", "Requests answered 503 by the concurrency limit by route and reason", ("route", "reason"))
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope; the
+            # template keeps label cardinality bounded.
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+                value=time.perf_counter() - started)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe(event.command_name, "success", value=event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe(event.command_name, "failure", value=event.duration_micros / 1_000_000)
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_OPEN.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_OPEN.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.inc(str(event.reason))
+        MONGO_POOL_CHECKOUT_WAIT.observe(value=event.duration)
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_IN_USE.inc()
+        MONGO_POOL_CHECKOUT_WAIT.observe(value=event.duration)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_IN_USE.dec()
+
+def person_cache_metrics(stats: dict) -> list:
+    hits = Counter("person_cache_hits_total", "Person cache lookups served without a database read")
+    misses = Counter("person_cache_misses_total", "Person cache lookups that read the database")
+    evictions = Counter("person_cache_evictions_total", "Person cache entries evicted by the LRU bound")
+    size = Gauge("person_cache_entries", "Person cache entries currently held")
+    hits.inc(amount=stats["hits"])
+    misses.inc(amount=stats["misses"])
+    evictions.inc(amount=stats["evictions"])
+    size.set(value=stats["size"])
+    return [hits, misses, evictions, size]
+
+def mongo_event_listeners() -> list:
+    return [MongoCommandListener(), MongoPoolListener()]
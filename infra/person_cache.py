@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from models.person import Person
+from models.person_page import PersonPage
+from models.person_filter import PersonFilter
+from models.person_columns import PersonColumns
+from models.person_stats import PersonStats
+from infra.causal import session_options
+from infra.person_store import PersonStore
+
+_MISSING = object()
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float):
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str):
+        pass
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.entries = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self.entries[key]
+            return None
+
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float):
+        self.entries[key] = (self.clock() + ttl_seconds, value)
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+class LRUCache:
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self.entries[key]
+            return default
+
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl_seconds: float):
+        self.entries[key] = (self.clock() + ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class PersonCache:
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        backend: Optional[CacheBackend] = None,
+        clock: Callable[[], float] = time.monotonic):
+        self.local = LRUCache(max_size, clock)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.inflight = {}
+        self.stale = set()
+
+    async def get_or_load(self, id: str, loader: Callable[[str], Awaitable[Optional[Person]]]) -> Optional[Person]:
+        key = f"person:{id}"
+        person = self.local.get(key, _MISSING)
+        if person is not _MISSING:
+            self.hits += 1
+            return person
+
+        if self.backend is not None:
+            value = await self.backend.get(key)
+            if value is not None:
+                self.hits += 1
+                person = Person.model_validate_json(value) if value else None
+                self.local.set(key, person, self.ttl_seconds if person else self.negative_ttl_seconds)
+                return person
+
+        loading = self.inflight.get(key)
+        if loading is not None:
+            self.hits += 1
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        # The load runs in its own task, as the stats handler's aggregation
+        # does: a caller cancelled at its deadline neither cancels the load
+        # nor leaves the requests coalesced on it waiting forever.
+        loading = self.inflight[key] = asyncio.create_task(self._load(key, id, loader))
+        # Mark an error as retrieved in case every caller was cancelled.
+        loading.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await asyncio.shield(loading)
+
+    async def _load(self, key: str, id: str, loader: Callable[[str], Awaitable[Optional[Person]]]) -> Optional[Person]:
+        try:
+            person = await loader(id)
+        finally:
+            del self.inflight[key]
+            invalidated = key in self.stale
+            self.stale.discard(key)
+
+        if not invalidated:
+            await self._store(key, person)
+
+        return person
+
+    async def invalidate(self, id: str):
+        key = f"person:{id}"
+        self.local.delete(key)
+        if key in self.inflight:
+            self.stale.add(key)
+        if self.backend is not None:
+            await self.backend.delete(key)
+
+    async def invalidate_many(self, ids: List[str]):
+        for id in ids:
+            await self.invalidate(id)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.local.evictions,
+            "size": len(self.local)
+        }
+
+    async def _store(self, key: str, person: Optional[Person]):
+        ttl_seconds = self.ttl_seconds if person else self.negative_ttl_seconds
+        self.local.set(key, person, ttl_seconds)
+        if self.backend is not None:
+            # version is excluded from dumps, which render responses; other
+            # workers need it for the ETag.
+            value = json.dumps({**person.model_dump(mode="json"), "version": person.version}) if person else ""
+            await self.backend.set(key, value.encode(), ttl_seconds)
+
+class CachedPersonRepository(PersonStore):
+    def __init__(self, repo: PersonStore, cache: PersonCache):
+        self.repo = repo
+        self.cache = cache
+
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Person]:
+        # A causal read must see the client's own writes, which another
+        # worker's cache entry may predate.
+        if fields or session_options():
+            return await self.repo.get_by_id(id, fields)
+
+        return await self.cache.get_or_load(id, self.repo.get_by_id)
+
+    async def save(self, item: Person) -> str:
+        result = await self.repo.save(item)
+        await self.cache.invalidate(item.id)
+        return result
+
+    async def save_many(self, items: List[Person]) -> List[Optional[str]]:
+        errors = await self.repo.save_many(items)
+        await self.cache.invalidate_many([item.id for item in items])
+        return errors
+
+    async def get_all(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None) -> PersonPage:
+        return await self.repo.get_all(limit, after, filters, fields)
+
+    def stream_all(
+        self,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        read: str = "list") -> AsyncIterator[PersonColumns]:
+        return self.repo.stream_all(after, filters, fields, batch_size, read)
+
+    async def get_stats(self, filters: Optional[PersonFilter], age_bucket_size: int, top_cities: int) -> PersonStats:
+        return await self.repo.get_stats(filters, age_bucket_size, top_cities)
+
+    async def ensure_indexes(self):
+        await self.repo.ensure_indexes()
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
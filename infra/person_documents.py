@@ -0,0 +1,68 @@
+from typing import List, Optional
+from uuid import UUID
+from models.person import Person
+from models.address import Address
+from infra.etag import person_version
+from infra.person_ids import public_id, stored_id
+
+# How people are stored: the conversions between Person and the documents of
+# the persons collection, and the projections of the fields parameter. Shared
+# by PersonRepository and InMemoryPersonRepository so both store, project and
+# version people the same way.
+
+PERSON_FIELDS = ("id", "name", "age", "address", "is_pep")
+ADDRESS_FIELDS = ("id", "street", "number", "neighbor", "city")
+
+def is_person_id(id: str) -> bool:
+    try:
+        UUID(id)
+    except ValueError:
+        return False
+
+    return True
+
+def build_projection(fields: Optional[List[str]]) -> dict:
+    projection = {"_id": 0}
+    if not fields:
+        return projection
+
+    for field in fields:
+        name, _, subfield = field.partition(".")
+        if name not in PERSON_FIELDS or (subfield and (name != "address" or subfield not in ADDRESS_FIELDS)):
+            raise ValueError(f"Unknown field: '{field}'")
+
+        # Projecting both "address" and "address.city" is a path collision in Mongo.
+        if subfield and "address" in fields:
+            continue
+
+        projection[field] = 1
+
+    # The version is never rendered but the ETag of a projection needs it.
+    projection["version"] = 1
+    return projection
+
+def to_document(item: Person, id_storage: str = "string") -> dict:
+    document = item.model_dump(exclude_unset=True)
+    # Hashed before the ids are converted, so the ETag of a person does
+    # not depend on how its ids are stored.
+    document["version"] = person_version(document)
+    if id_storage != "string":
+        document["id"] = stored_id(document["id"], id_storage)
+        if isinstance(document.get("address"), dict) and "id" in document["address"]:
+            document["address"]["id"] = stored_id(document["address"]["id"], id_storage)
+    return document
+
+def to_person(doc: dict) -> Person:
+    # Stored documents were validated on write, so they are trusted here: the
+    # models are built without re-running validation, and for projections
+    # fields_set is exactly the projected fields.
+    values = {k: v for k, v in doc.items() if k != "_id"}
+    if "id" in values:
+        values["id"] = public_id(values["id"])
+    if isinstance(values.get("address"), dict):
+        address = values["address"]
+        if "id" in address:
+            address = {**address, "id": public_id(address["id"])}
+        values["address"] = Address.model_construct(**address)
+
+    return Person.model_construct(**values)
@@ -0,0 +1,138 @@
+import csv
+import io
+from models.person_columns import ABSENT, MISSING, TRUE, PersonColumns
+from infra.person_json import iter_column_rows
+
+CSV_COLUMNS = ("id", "name", "age", "address_id", "street", "number", "neighbor", "city", "is_pep")
+
+class NdjsonExportWriter:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+    resumable = True
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, columns: PersonColumns) -> bytes:
+        return "".join(row + "\n" for row in iter_column_rows(columns)).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+class CsvExportWriter:
+    media_type = "text/csv"
+    extension = "csv"
+    resumable = True
+
+    def header(self) -> bytes:
+        return self._render([CSV_COLUMNS])
+
+    def write(self, columns: PersonColumns) -> bytes:
+        return self._render(_csv_rows(columns))
+
+    def close(self) -> bytes:
+        return b""
+
+    def _render(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+class ParquetExportWriter:
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+    # The footer is only written on close, so an interrupted file cannot be
+    # appended to; resuming starts the export over.
+    resumable = False
+
+    def __init__(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow")
+
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("age", pyarrow.int16()),
+            ("address_id", pyarrow.string()),
+            ("street", pyarrow.string()),
+            ("number", pyarrow.int64()),
+            ("neighbor", pyarrow.string()),
+            ("city", pyarrow.string()),
+            ("is_pep", pyarrow.bool_())
+        ])
+        self.sink = _ChunkSink()
+        self.writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(self.sink, mode="w"), self.schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, columns: PersonColumns) -> bytes:
+        # One row group per batch, built straight from the columns.
+        self.writer.write_table(self.pa.Table.from_pydict(_column_values(columns), schema=self.schema))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file for ParquetWriter that hands its bytes out after each
+    # row group instead of buffering the whole file.
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self.chunks)
+        self.chunks = []
+        return chunk
+
+EXPORT_WRITERS = {"csv": CsvExportWriter, "ndjson": NdjsonExportWriter, "parquet": ParquetExportWriter}
+
+def export_file_name(id: str, format: str) -> str:
+    return f"{id}.{EXPORT_WRITERS[format].extension}"
+
+def create_export_writer(format: str):
+    writer_class = EXPORT_WRITERS.get(format)
+    if writer_class is None:
+        raise ValueError(f"Unknown export format: '{format}'")
+
+    return writer_class()
+
+def _column_values(columns: PersonColumns) -> dict:
+    rows = range(len(columns))
+    return {
+        "id": [_value(columns.ids[row]) for row in rows],
+        "name": [_value(name) for name in columns.names],
+        "age": [age if age != -1 else None for age in columns.ages],
+        "address_id": [_value(columns.address_ids[row]) for row in rows],
+        "street": [_value(street) for street in columns.streets],
+        "number": [number if number != -1 else None for number in columns.numbers],
+        "neighbor": [_value(neighbor) for neighbor in columns.neighbors],
+        "city": [_value(city) for city in columns.cities],
+        "is_pep": [None if is_pep == ABSENT else is_pep == TRUE for is_pep in columns.is_peps]
+    }
+
+def _csv_rows(columns: PersonColumns):
+    values = _column_values(columns)
+    for row in zip(*(values[name] for name in CSV_COLUMNS)):
+        yield ["" if value is None else "true" if value is True else "false" if value is False else value for value in row]
+
+def _value(value):
+    return None if value is MISSING else value
@@ -0,0 +1,89 @@
+import os
+import time
+from typing import Callable, Dict
+from uuid import UUID, uuid4
+from bson.binary import Binary, UUID_SUBTYPE
+
+# Person and address ids are always exchanged as canonical UUID strings.
+# Generators differ only in how the 128 bits are laid out: uuid4 is random,
+# while uuid7 and ulid lead with a millisecond timestamp, so new ids land at
+# the right edge of the id index instead of on a random page of it.
+
+def uuid4_id() -> str:
+    return str(uuid4())
+
+class UUID7Generator:
+    # RFC 9562 UUIDv7: 48-bit Unix milliseconds, version, a 12-bit counter in
+    # rand_a that orders ids made within the same millisecond, variant and 62
+    # random bits. When the counter overflows the timestamp is advanced by one
+    # millisecond rather than going backwards.
+    def __init__(self, clock: Callable[[], int] = time.time_ns):
+        self.clock = clock
+        self.last_ms = -1
+        self.counter = 0
+
+    def __call__(self) -> str:
+        ms = self.clock() // 1_000_000
+        if ms > self.last_ms:
+            self.last_ms = ms
+            # Start low in the range so a burst has room to count up.
+            self.counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            self.counter += 1
+            if self.counter > 0xFFF:
+                self.last_ms += 1
+                self.counter = 0
+
+        random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+        value = (self.last_ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | self.counter << 64 | 0b10 << 62 | random_bits
+        return str(UUID(int=value))
+
+class ULIDGenerator:
+    # ULID layout: 48-bit Unix milliseconds and 80 random bits, incremented
+    # instead of redrawn within a millisecond so ids stay monotonic. Rendered
+    # in the UUID text form like every other id; it has no version bits.
+    def __init__(self, clock: Callable[[], int] = time.time_ns):
+        self.clock = clock
+        self.last_ms = -1
+        self.random = 0
+
+    def __call__(self) -> str:
+        ms = self.clock() // 1_000_000
+        if ms > self.last_ms:
+            self.last_ms = ms
+            self.random = int.from_bytes(os.urandom(10), "big")
+        else:
+            self.random += 1
+            if self.random >> 80:
+                self.last_ms += 1
+                self.random = 0
+
+        return str(UUID(int=(self.last_ms & ((1 << 48) - 1)) << 80 | self.random))
+
+ID_GENERATORS: Dict[str, Callable[[], Callable[[], str]]] = {
+    "uuid4": lambda: uuid4_id,
+    "uuid7": UUID7Generator,
+    "ulid": ULIDGenerator
+}
+
+ID_STORAGES = ("string", "binary")
+
+def id_generator(name: str) -> Callable[[], str]:
+    factory = ID_GENERATORS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown id generator: '{name}', expected one of {', '.join(ID_GENERATORS)}")
+
+    return factory()
+
+def stored_id(id: str, storage: str):
+    if storage == "binary":
+        return Binary.from_uuid(UUID(id))
+
+    return id
+
+def public_id(value):
+    # Inverse of stored_id for values read back from MongoDB.
+    if isinstance(value, Binary) and value.subtype == UUID_SUBTYPE:
+        return str(value.as_uuid())
+
+    return value
@@ -0,0 +1,81 @@
+import json
+from json.encoder import encode_basestring
+from typing import Iterable, Iterator, List
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from models.person import Person
+from models.person_columns import ADDRESS, ABSENT, MISSING, NULL_ADDRESS, TRUE, PersonColumns
+
+PEOPLE_ADAPTER = TypeAdapter(List[Person])
+
+def render_person(person: Person, partial: bool = False) -> bytes:
+    return person.model_dump_json(exclude_unset=partial).encode()
+
+def render_people(people: Iterable[Person], partial: bool = False) -> bytes:
+    return PEOPLE_ADAPTER.dump_json(list(people), exclude_unset=partial)
+
+def iter_column_rows(columns: PersonColumns, partial: bool = False) -> Iterator[str]:
+    # Same objects, field order and omissions as dumping the equivalent
+    # trusted Person models, without building them. Interned strings repeat
+    # across rows, so each one is escaped once per call.
+    escaped = {}
+
+    def string(value) -> str:
+        if not isinstance(value, str):
+            return json.dumps(value)
+
+        text = escaped.get(value)
+        if text is None:
+            text = escaped[value] = encode_basestring(value)
+        return text
+
+    ids, names, ages, is_peps, addresses = columns.ids, columns.names, columns.ages, columns.is_peps, columns.addresses
+    address_ids, streets, numbers, neighbors, cities = columns.address_ids, columns.streets, columns.numbers, columns.neighbors, columns.cities
+    for row in range(len(columns)):
+        parts = []
+        id = ids[row]
+        if id is not MISSING:
+            parts.append('"id":' + string(id))
+        name = names[row]
+        if name is not MISSING:
+            parts.append('"name":' + (encode_basestring(name) if isinstance(name, str) else json.dumps(name)))
+        if ages[row] != -1:
+            parts.append(f'"age":{ages[row]}')
+
+        address = addresses[row]
+        if address == ADDRESS:
+            fields = []
+            address_id = address_ids[row]
+            if address_id is not MISSING:
+                fields.append('"id":' + string(address_id))
+            if streets[row] is not MISSING:
+                fields.append('"street":' + string(streets[row]))
+            if numbers[row] != -1:
+                fields.append(f'"number":{numbers[row]}')
+            if neighbors[row] is not MISSING:
+                fields.append('"neighbor":' + string(neighbors[row]))
+            if cities[row] is not MISSING:
+                fields.append('"city":' + string(cities[row]))
+            parts.append('"address":{' + ",".join(fields) + "}")
+        elif address == NULL_ADDRESS or not partial:
+            parts.append('"address":null')
+
+        if is_peps[row] != ABSENT:
+            parts.append('"is_pep":true' if is_peps[row] == TRUE else '"is_pep":false')
+
+        yield "{" + ",".join(parts) + "}"
+
+def render_columns(columns: PersonColumns, partial: bool = False) -> bytes:
+    # Appending encoded rows keeps one growing buffer instead of a list of
+    # row strings, a joined str and its encoded copy all alive at once.
+    body = bytearray(b"[")
+    for row in iter_column_rows(columns, partial):
+        if len(body) > 1:
+            body += b","
+        body += row.encode()
+
+    body += b"]"
+    return bytes(body)
+
+class PersonJSONResponse(Response):
+    media_type = "application/json"
@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from models.person_search_hit import PersonSearchHit
+from models.person_summary import PersonSummary
+from infra.metrics import PERSON_PROJECTION_CHANGES, PERSON_PROJECTION_LAG
+from infra.person_ids import public_id
+from infra.person_search import PersonSearchIndex
+
+logger = logging.getLogger(__name__)
+
+PROJECTED_FIELDS = {"_id": 1, "id": 1, "name": 1, "address.city": 1, "is_pep": 1}
+SEARCH_FIELDS = {"_id": 1, "id": 1, "name": 1}
+
+# Change streams need a replica set; standalone servers answer with this code.
+CHANGE_STREAMS_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = (280, 286)
+
+# Read side of the person feature: per-city counts, the PEP list, a sorted
+# name index and the fuzzy search index, kept up to date from the write side by
+# ProjectionConsumer. Entries are keyed by _id, so applying a change twice is
+# harmless and a rebuild can overlap the change stream.
+class PersonProjections:
+    def __init__(self):
+        self.entries = {}
+        self.city_counts: Dict[str, int] = {}
+        self.peps = {}
+        self.names = []
+        self.search = PersonSearchIndex()
+        self.ready = False
+
+    def upsert(self, doc: dict):
+        name = self._add(doc)
+        if name is not None:
+            insort(self.names, (name.casefold(), doc["_id"]))
+
+    def load(self, docs: List[dict]):
+        # Bulk path for rebuilding empty projections: names are sorted once by
+        # finish_load instead of an insort per person, which would make a full
+        # load quadratic. Queries wait for ready, set after finish_load.
+        for doc in docs:
+            name = self._add(doc)
+            if name is not None:
+                self.names.append((name.casefold(), doc["_id"]))
+
+    def finish_load(self):
+        self.names.sort()
+
+    def delete(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        id, name, city, is_pep = entry
+        if city is not None:
+            self.city_counts[city] -= 1
+            if not self.city_counts[city]:
+                del self.city_counts[city]
+        if is_pep:
+            del self.peps[key]
+        if name is not None:
+            index = bisect_left(self.names, (name.casefold(), key))
+            del self.names[index]
+        if isinstance(id, str):
+            self.search.remove(id)
+
+    def clear(self):
+        self.entries.clear()
+        self.city_counts.clear()
+        self.peps.clear()
+        self.names.clear()
+        self.search.clear()
+
+    def count_by_city(self, city: Optional[str] = None) -> Dict[str, int]:
+        if city is not None:
+            return {city: self.city_counts.get(city, 0)}
+
+        return dict(self.city_counts)
+
+    def pep_persons(self, limit: int, offset: int = 0) -> List[PersonSummary]:
+        return [self._summary(key) for key in islice(self.peps, offset, offset + limit)]
+
+    def find_by_name_prefix(self, prefix: str, limit: int) -> List[PersonSummary]:
+        folded = prefix.casefold()
+        found = []
+        for name, key in islice(self.names, bisect_left(self.names, (folded,)), None):
+            if not name.startswith(folded) or len(found) == limit:
+                break
+            found.append(self._summary(key))
+
+        return found
+
+    def search_names(self, query: str, limit: int) -> List[PersonSearchHit]:
+        return [PersonSearchHit(id=id, name=name, score=score) for score, id, name in self.search.search(query, limit)]
+
+    def _add(self, doc: dict) -> Optional[str]:
+        key = doc["_id"]
+        self.delete(key)
+
+        address = doc.get("address")
+        city = address.get("city") if isinstance(address, dict) else None
+        name = doc.get("name") if isinstance(doc.get("name"), str) else None
+        entry = (public_id(doc.get("id")), name, city, doc.get("is_pep") is True)
+        self.entries[key] = entry
+        if city is not None:
+            self.city_counts[city] = self.city_counts.get(city, 0) + 1
+        if entry[3]:
+            self.peps[key] = None
+        if isinstance(entry[0], str) and name is not None:
+            self.search.add(entry[0], name)
+
+        return name
+
+    def _summary(self, key) -> PersonSummary:
+        id, name, _, _ = self.entries[key]
+        return PersonSummary(id=id, name=name)
+
+# Only the search index of PersonProjections, for workers that serve
+# GET /person/search without the other projections. Fed by ProjectionConsumer
+# with SEARCH_FIELDS.
+class PersonSearchProjection:
+    def __init__(self):
+        self.entries = {}
+        self.search = PersonSearchIndex()
+        self.ready = False
+
+    def upsert(self, doc: dict):
+        key = doc["_id"]
+        self.delete(key)
+
+        id = public_id(doc.get("id"))
+        name = doc.get("name")
+        if isinstance(id, str) and isinstance(name, str):
+            self.entries[key] = id
+            self.search.add(id, name)
+
+    def load(self, docs: List[dict]):
+        for doc in docs:
+            self.upsert(doc)
+
+    def finish_load(self):
+        pass
+
+    def delete(self, key):
+        id = self.entries.pop(key, None)
+        if id is not None:
+            self.search.remove(id)
+
+    def clear(self):
+        self.entries.clear()
+        self.search.clear()
+
+class ProjectionConsumer:
+    def __init__(
+        self,
+        collection,
+        projections: PersonProjections,
+        source: str = "change_stream",
+        poll_interval_ms: float = 500,
+        batch_size: int = 500,
+        fields: Optional[dict] = PROJECTED_FIELDS):
+        # projections is anything with the upsert/load/finish_load/delete/
+        # clear methods and ready flag of PersonProjections; fields=None
+        # loads whole documents, as the embedded read replica needs.
+        self.collection = collection
+        self.projections = projections
+        self.fields = fields
+        self.source = source
+        self.poll_interval = poll_interval_ms / 1000
+        self.batch_size = batch_size
+        self.resume_token = None
+        self.last_id = None
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def run(self):
+        delay = 1
+        while True:
+            try:
+                if self.source == "change_stream":
+                    await self.follow_change_stream()
+                else:
+                    await self.poll()
+            except Exception as error:
+                if isinstance(error, OperationFailure) and error.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("MongoDB has no change streams (not a replica set), polling for new persons instead")
+                    self.source = "polling"
+                    continue
+                if isinstance(error, OperationFailure) and error.code in CHANGE_STREAM_HISTORY_LOST:
+                    # The oplog no longer reaches the resume token: rebuild.
+                    self.resume_token = None
+                logger.warning("Person projections failed, retrying in %ss: %s", delay, error)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def follow_change_stream(self):
+        async with self.collection.watch(full_document="updateLookup", resume_after=self.resume_token, max_await_time_ms=1000) as stream:
+            if self.resume_token is None:
+                # The first getMore opens the stream, so every change from
+                # here on is seen; replaying the ones the scan already saw is
+                # harmless.
+                change = await stream.try_next()
+                self.projections.ready = False
+                self.projections.clear()
+                await self.load()
+                if change is not None:
+                    self.apply_change(change)
+                self.resume_token = stream.resume_token
+                self.projections.ready = True
+
+            while True:
+                change = await stream.try_next()
+                if change is None:
+                    PERSON_PROJECTION_LAG.set(value=0)
+                elif change["operationType"] == "invalidate":
+                    # The collection was dropped or renamed; start over.
+                    self.resume_token = None
+                    return
+                else:
+                    self.apply_change(change)
+                self.resume_token = stream.resume_token
+
+    async def poll(self):
+        # Stand-in for deployments and tests without a replica set: picks up
+        # inserts only, in _id order, and never sees updates or deletes.
+        while True:
+            loaded = await self.load(self.last_id)
+            self.projections.ready = True
+            if not loaded:
+                PERSON_PROJECTION_LAG.set(value=0)
+                await asyncio.sleep(self.poll_interval)
+
+    async def load(self, after: Optional[ObjectId] = None) -> int:
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        loaded = 0
+        batch = []
+        async for doc in self.collection.find(query, self.fields, sort=[("_id", 1)], batch_size=self.batch_size):
+            batch.append(doc)
+            if len(batch) == self.batch_size:
+                loaded += self._apply_batch(batch, after is None)
+                batch = []
+
+        if batch:
+            loaded += self._apply_batch(batch, after is None)
+        if after is None:
+            self.projections.finish_load()
+        return loaded
+
+    def _apply_batch(self, docs: List[dict], rebuild: bool) -> int:
+        if rebuild:
+            self.projections.load(docs)
+        else:
+            for doc in docs:
+                self.projections.upsert(doc)
+        self.last_id = docs[-1]["_id"]
+        PERSON_PROJECTION_CHANGES.inc("load", amount=len(docs))
+        # Only changes after the initial scan have a meaningful lag.
+        if not rebuild and isinstance(self.last_id, ObjectId):
+            PERSON_PROJECTION_LAG.set(value=max(time.time() - self.last_id.generation_time.timestamp(), 0))
+
+        return len(docs)
+
+    def apply_change(self, change: dict):
+        operation = change["operationType"]
+        document = change.get("fullDocument")
+        if operation in ("insert", "update", "replace") and document is not None:
+            self.projections.upsert(document)
+        elif operation in ("delete", "update", "replace"):
+            # An update whose document was deleted before the lookup.
+            self.projections.delete(change["documentKey"]["_id"])
+
+        PERSON_PROJECTION_CHANGES.inc(operation)
+        cluster_time = change.get("clusterTime")
+        if cluster_time is not None:
+            PERSON_PROJECTION_LAG.set(value=max(time.time() - cluster_time.time, 0))
@@ -1,24 +1,268 @@
-from models.person import Person
-from bson import ObjectId
-from typing import Optional
-
-class PersonRepository:
-    def __init__(self, collection):
-        self.collection = collection
-
-    async def save(self, item: Person) -> str:
-        item_dict = item.model_dump(exclude_unset=True)
-        result = await self.collection.insert_one(item_dict)
-        return str(result.inserted_id)
-
-    async def get_all(self) -> list[Person]:
-        docs = await self.collection.find().to_list(length=None)
-        return [Person(**{k: v for k, v in doc.items() if k != "_id"}) for doc in docs]
-    
-
-    async def get_by_id(self, id: str) -> Optional[Person]:
-        doc = await self.collection.find_one({"_id": ObjectId(id)})
-        if doc:
-            return Person(**{k: v for k, v in doc.items() if k != "_id"})
-        
-        return None
\ No newline at end of file
+import re
+from uuid import uuid4
+from models.person import Person
+from models.person_page import PersonPage
+from models.person_filter import PersonFilter
+from models.person_columns import PersonColumns
+from models.person_stats import AgeBucket, CityCount, PersonStats
+from infra.causal import session_options
+from infra.concurrency import backend_call
+from infra.cursor import decode_cursor, encode_cursor
+from infra.person_documents import build_projection, is_person_id, to_document, to_person
+from infra.person_ids import ID_STORAGES, stored_id
+from infra.person_store import PersonStore
+from infra.write_coalescer import WriteCoalescer
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import AsyncIterator, Dict, List, Optional
+
+# Every PersonFilter field leads at least one index and every index ends with
+# the _id sort key, so no filter combination falls back to a collection scan.
+PERSON_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+    IndexModel([("address.city", ASCENDING), ("address.neighbor", ASCENDING), ("_id", ASCENDING)], name="city_neighbor_id"),
+    IndexModel([("address.neighbor", ASCENDING), ("_id", ASCENDING)], name="neighbor_id"),
+    IndexModel([("is_pep", ASCENDING), ("_id", ASCENDING), ("age", ASCENDING)], name="is_pep_id_age"),
+    IndexModel([("age", ASCENDING), ("_id", ASCENDING)], name="age_id"),
+]
+
+# Index for the stats pipeline's $match, by the most selective filter given.
+# Without filters the pipeline reads every document and no hint helps.
+STATS_INDEX_HINTS = (
+    ("city", "city_neighbor_id"),
+    ("neighbor", "neighbor_id"),
+    ("name", "name_id"),
+    ("is_pep", "is_pep_id_age"),
+    ("min_age", "age_id"),
+    ("max_age", "age_id"),
+)
+
+class PersonRepository(PersonStore):
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 500,
+        bulk_chunk_size: int = 1000,
+        coalescer: Optional[WriteCoalescer] = None,
+        id_storage: str = "string",
+        read_collections: Optional[Dict[str, object]] = None):
+        if id_storage not in ID_STORAGES:
+            raise ValueError(f"Unknown id storage: '{id_storage}', expected one of {', '.join(ID_STORAGES)}")
+
+        self.collection = collection
+        self.batch_size = batch_size
+        self.bulk_chunk_size = bulk_chunk_size
+        self.coalescer = coalescer
+        self.id_storage = id_storage
+        # Handles for the reads in settings.PERSON_READS, each with its own
+        # read preference. Writes and anything not listed use collection.
+        self.read_collections = read_collections or {}
+
+    async def save(self, item: Person) -> str:
+        item_dict = to_document(item, self.id_storage)
+        # A causal write is not batched: its operation time has to end up in
+        # the client's session.
+        with backend_call():
+            if self.coalescer is not None and not session_options():
+                return str(await self.coalescer.insert(item_dict))
+
+            result = await self.collection.insert_one(item_dict, **session_options())
+        return str(result.inserted_id)
+
+    async def save_many(self, items: List[Person]) -> List[Optional[str]]:
+        errors = [None] * len(items)
+        for start in range(0, len(items), self.bulk_chunk_size):
+            chunk = [to_document(item, self.id_storage) for item in items[start:start + self.bulk_chunk_size]]
+            try:
+                with backend_call():
+                    await self.collection.insert_many(chunk, ordered=False, **session_options())
+            except BulkWriteError as error:
+                for write_error in error.details["writeErrors"]:
+                    errors[start + write_error["index"]] = write_error["errmsg"]
+
+        return errors
+
+    async def get_all(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None) -> PersonPage:
+        # Pages keep _id because the next cursor is built from it.
+        projection = {**build_projection(fields), "_id": 1} if fields else None
+        with backend_call():
+            docs = await self._reads("list").find(
+                self._build_filter(filters, after),
+                projection,
+                sort=[("_id", 1)],
+                limit=limit + 1,
+                **session_options()).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["_id"])
+
+        return PersonPage(items=[to_person(doc) for doc in docs], next_cursor=next_cursor)
+
+    def stream_all(
+        self,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        read: str = "list") -> AsyncIterator[PersonColumns]:
+        # Batches keep _id so each one carries the cursor to resume after it.
+        projection = {**build_projection(fields), "_id": 1} if fields else None
+        batch_size = batch_size or self.batch_size
+        cursor = self._reads(read).find(
+            self._build_filter(filters, after),
+            projection,
+            sort=[("_id", 1)],
+            batch_size=batch_size,
+            **session_options())
+
+        return self._iterate_batches(cursor, batch_size)
+
+    async def get_stats(self, filters: Optional[PersonFilter], age_bucket_size: int, top_cities: int) -> PersonStats:
+        # One round trip: every statistic is a $facet over the same $match, so
+        # only the aggregated numbers leave the database. allowDiskUse lets
+        # the groups spill instead of failing on large collections.
+        pipeline = [
+            {"$match": self._build_filter(filters, None)},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "peps": {"$sum": {"$cond": [{"$eq": ["$is_pep", True]}, 1, 0]}},
+                    "average_age": {"$avg": "$age"}
+                }}],
+                "ages": [
+                    {"$match": {"age": {"$type": "number"}}},
+                    {"$bucket": {
+                        "groupBy": "$age",
+                        "boundaries": list(range(0, 151 + age_bucket_size, age_bucket_size)),
+                        "default": "other",
+                        "output": {"count": {"$sum": 1}}
+                    }}
+                ],
+                "cities": [
+                    {"$match": {"address.city": {"$type": "string"}}},
+                    {"$group": {"_id": "$address.city", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": top_cities}
+                ]
+            }}
+        ]
+        options = {"allowDiskUse": True}
+        hint = self._stats_hint(filters)
+        if hint is not None:
+            options["hint"] = hint
+
+        with backend_call():
+            result = (await self._reads("stats").aggregate(pipeline, **options, **session_options()).to_list(length=1))[0]
+        totals = result["totals"][0] if result["totals"] else {"total": 0, "peps": 0, "average_age": None}
+        return PersonStats(
+            total=totals["total"],
+            pep_count=totals["peps"],
+            pep_ratio=totals["peps"] / totals["total"] if totals["total"] else 0.0,
+            average_age=totals["average_age"],
+            age_histogram=[
+                AgeBucket(min_age=bucket["_id"], max_age=bucket["_id"] + age_bucket_size - 1, count=bucket["count"])
+                for bucket in result["ages"] if bucket["_id"] != "other"
+            ],
+            cities=[CityCount(city=city["_id"], count=city["count"]) for city in result["cities"]])
+
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Person]:
+        projection = build_projection(fields)
+        if not is_person_id(id):
+            return None
+
+        with backend_call():
+            doc = await self._reads("get").find_one({"id": self._id_filter(id)}, projection, **session_options())
+        if doc:
+            return to_person(doc)
+        
+        return None
+
+    async def ensure_indexes(self):
+        await self.migrate_missing_ids()
+        await self.collection.create_indexes(PERSON_INDEXES)
+
+    async def migrate_missing_ids(self) -> int:
+        migrated = 0
+        updates = []
+        async for doc in self.collection.find({"id": {"$exists": False}}, {"_id": 1}, batch_size=self.batch_size):
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"id": stored_id(str(uuid4()), self.id_storage)}}))
+            if len(updates) == self.batch_size:
+                await self.collection.bulk_write(updates, ordered=False)
+                migrated += len(updates)
+                updates = []
+
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+            migrated += len(updates)
+
+        return migrated
+
+    def _reads(self, read: str):
+        return self.read_collections.get(read, self.collection)
+
+    def _id_filter(self, id: str):
+        if self.id_storage == "string":
+            return id
+
+        # Rows written before switching to binary storage keep string ids.
+        return {"$in": [stored_id(id, self.id_storage), id]}
+
+    def _stats_hint(self, filters: Optional[PersonFilter]) -> Optional[str]:
+        if filters is None:
+            return None
+
+        for field, index in STATS_INDEX_HINTS:
+            if getattr(filters, field) is not None:
+                return index
+
+        return None
+
+    def _build_filter(self, filters: Optional[PersonFilter], after: Optional[str]) -> dict:
+        query = {}
+        if filters is not None:
+            if filters.name:
+                query["name"] = {"$regex": f"^{re.escape(filters.name)}"}
+
+            age = {}
+            if filters.min_age is not None:
+                age["$gte"] = filters.min_age
+            if filters.max_age is not None:
+                age["$lte"] = filters.max_age
+            if age:
+                query["age"] = age
+
+            if filters.city is not None:
+                query["address.city"] = filters.city
+            if filters.neighbor is not None:
+                query["address.neighbor"] = filters.neighbor
+            if filters.is_pep is not None:
+                query["is_pep"] = filters.is_pep
+
+        if after is not None:
+            query["_id"] = {"$gt": decode_cursor(after)}
+
+        return query
+
+    async def _iterate_batches(self, cursor, batch_size: int) -> AsyncIterator[PersonColumns]:
+        # One columnar batch per cursor batch: no per-row models, and memory
+        # stays bounded by batch_size however many people are streamed.
+        columns = PersonColumns()
+        async for doc in cursor:
+            columns.append(doc)
+            if len(columns) == batch_size:
+                columns.next_cursor = encode_cursor(doc["_id"])
+                yield columns
+                columns = PersonColumns()
+
+        if len(columns):
+            columns.next_cursor = encode_cursor(doc["_id"])
+            yield columns
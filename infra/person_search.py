@@ -0,0 +1,161 @@
+import heapq
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from math import ceil
+from typing import Dict, Iterator, List, Set, Tuple
+
+WORD = re.compile(r"\w+")
+
+def fold(text: str) -> str:
+    # Case and accents are ignored: "José" and "jose" are the same name.
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def words(text: str) -> List[str]:
+    return list(dict.fromkeys(WORD.findall(fold(text))))
+
+def trigrams(word: str) -> Set[str]:
+    # Padded like pg_trgm, so the start of a word weighs more than its end
+    # and one-letter words still have trigrams.
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Fuzzy name search in two levels. Every distinct word of every name is
+# matched by trigram similarity against a vocabulary that stays small however
+# many people there are, and every distinct folded name (a term) is found
+# through the sets of terms containing each word. A million people sharing a
+# few hundred thousand names and a few thousand words are searched with set
+# operations on those instead of a scan. Terms and words whose people are all
+# gone are kept, skipped when searching and reused if the name comes back.
+class PersonSearchIndex:
+    def __init__(self, threshold: float = 0.2):
+        self.threshold = threshold
+        self.vocabulary: Dict[str, int] = {}
+        self.word_sizes = array("H")
+        self.word_terms: List[Set[int]] = []
+        self.word_postings: Dict[str, List[int]] = {}
+        self.terms: Dict[str, int] = {}
+        self.term_people: List[Dict[str, str]] = []
+        self.people: Dict[str, int] = {}
+
+    def add(self, id: str, name: str):
+        self.remove(id)
+        folded = fold(name)
+        term = self.terms.get(folded)
+        if term is None:
+            term = self.terms[folded] = len(self.term_people)
+            self.term_people.append({})
+            for word in words(folded):
+                self.word_terms[self._word(word)].add(term)
+
+        self.term_people[term][id] = name
+        self.people[id] = term
+
+    def remove(self, id: str):
+        term = self.people.pop(id, None)
+        if term is not None:
+            del self.term_people[term][id]
+
+    def clear(self):
+        self.__init__(self.threshold)
+
+    def __len__(self) -> int:
+        return len(self.people)
+
+    def search(self, query: str, limit: int) -> List[Tuple[float, str, str]]:
+        # Every query word has to match a word of the name. A name scores the
+        # mean, over query words, of the best similarity among its words, so
+        # "Mraia Slva" still finds "Maria Silva Santos". Ties keep index order.
+        query_words = words(query)
+        if not query_words:
+            return []
+
+        matches = [self._match_word(word) for word in query_words]
+        if not all(matches):
+            return []
+
+        groups = self._word_groups(matches[0]) if len(matches) == 1 else self._term_groups(matches)
+        found = []
+        for score, terms in groups:
+            # Terms of one score are taken in index order; terms whose people
+            # are all gone yield nothing.
+            terms = list(terms)
+            heapq.heapify(terms)
+            while terms:
+                for id, name in self.term_people[heapq.heappop(terms)].items():
+                    found.append((round(score / len(matches), 4), id, name))
+                    if len(found) == limit:
+                        return found
+
+        return found
+
+    def _word_groups(self, found: List[Tuple[float, int]]) -> Iterator[Tuple[float, Set[int]]]:
+        # One query word: a term scores the best word it contains. Groups are
+        # produced best first and only as far as the results need, so a
+        # common first name does not cost a pass over every name it is in.
+        words_by_similarity: Dict[float, List[int]] = {}
+        for similarity, word in found:
+            words_by_similarity.setdefault(similarity, []).append(word)
+
+        assigned = set()
+        for similarity in sorted(words_by_similarity, reverse=True):
+            terms = set().union(*(self.word_terms[word] for word in words_by_similarity[similarity])) - assigned
+            yield similarity, terms
+            assigned |= terms
+
+    def _term_groups(self, matches: List[List[Tuple[float, int]]]) -> List[Tuple[float, Set[int]]]:
+        # Several query words: candidates are the terms with a match for each
+        # of them. Starting from the query word with the fewest terms, every
+        # step intersects the candidates with one word's terms at a time,
+        # which costs the size of the candidates rather than of the words.
+        matches = sorted(matches, key=lambda found: sum(len(self.word_terms[word]) for _, word in found))
+        candidates = set().union(*(self.word_terms[word] for _, word in matches[0]))
+        for found in matches[1:]:
+            candidates = set().union(*(candidates & self.word_terms[word] for _, word in found))
+
+        scores = Counter()
+        for found in matches:
+            best = {}
+            for similarity, word in sorted(found):
+                for term in candidates & self.word_terms[word]:
+                    best[term] = similarity
+            scores.update(best)
+
+        groups: Dict[float, Set[int]] = {}
+        for term, score in scores.items():
+            groups.setdefault(score, set()).add(term)
+
+        return sorted(groups.items(), reverse=True)
+
+    def _word(self, word: str) -> int:
+        number = self.vocabulary.get(word)
+        if number is None:
+            number = self.vocabulary[word] = len(self.word_terms)
+            grams = trigrams(word)
+            self.word_sizes.append(len(grams))
+            self.word_terms.append(set())
+            for gram in grams:
+                self.word_postings.setdefault(gram, []).append(number)
+
+        return number
+
+    def _match_word(self, word: str) -> List[Tuple[float, int]]:
+        # Words of the vocabulary with a trigram similarity, shared / (query +
+        # word - shared), of at least threshold.
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.word_postings.get(gram, ()))
+
+        needed = ceil(self.threshold * len(grams))
+        found = []
+        for number, count in shared.items():
+            if count < needed:
+                continue
+            similarity = count / (len(grams) + self.word_sizes[number] - count)
+            if similarity >= self.threshold:
+                found.append((similarity, number))
+
+        return found
@@ -0,0 +1,50 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+from models.person import Person
+from models.person_page import PersonPage
+from models.person_filter import PersonFilter
+from models.person_columns import PersonColumns
+from models.person_stats import PersonStats
+
+# What the person handlers need from storage. PersonRepository keeps people
+# in MongoDB, InMemoryPersonRepository in process; both page by _id, filter
+# and project the same way and return the same models.
+class PersonStore(ABC):
+    @abstractmethod
+    async def save(self, item: Person) -> str:
+        pass
+
+    @abstractmethod
+    async def save_many(self, items: List[Person]) -> List[Optional[str]]:
+        pass
+
+    @abstractmethod
+    async def get_all(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None) -> PersonPage:
+        pass
+
+    @abstractmethod
+    def stream_all(
+        self,
+        after: Optional[str] = None,
+        filters: Optional[PersonFilter] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        read: str = "list") -> AsyncIterator[PersonColumns]:
+        pass
+
+    @abstractmethod
+    async def get_stats(self, filters: Optional[PersonFilter], age_bucket_size: int, top_cities: int) -> PersonStats:
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, id: str, fields: Optional[List[str]] = None) -> Optional[Person]:
+        pass
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        pass
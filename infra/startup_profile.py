@@ -0,0 +1,60 @@
+import importlib.abc
+import sys
+import time
+from typing import List, Tuple
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    # Times every module executed while installed, like `python -X importtime`
+    # but readable from inside the worker. Cumulative time includes the
+    # module's own imports; self time does not.
+    def __init__(self):
+        self.timings = {}
+        self.stack = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        # Builtin and frozen modules use the importer class itself as loader,
+        # which must not be patched; they are cheap anyway.
+        loader = spec.loader
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            loader.exec_module = self._timed(name, loader.exec_module)
+
+        return spec
+
+    def report(self, limit: int = 20) -> List[Tuple[str, float, float]]:
+        rows = [(name, cumulative * 1000, own * 1000) for name, (cumulative, own) in self.timings.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+
+    def total_ms(self) -> float:
+        return sum(own for _, own in self.timings.values()) * 1000
+
+    def _timed(self, name: str, exec_module):
+        def exec_timed(module):
+            self.stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - started
+                children = self.stack.pop()
+                if self.stack:
+                    self.stack[-1] += cumulative
+                self.timings[name] = (cumulative, cumulative - children)
+
+        return exec_timed
@@ -0,0 +1,66 @@
+import asyncio
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from infra.metrics import MONGO_WRITE_BATCH_SIZE
+
+class WriteCoalescer:
+    def __init__(self, collection, max_batch_size: int = 100, max_delay_ms: float = 5):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.pending = []
+        self.timer = None
+        self.flushes = set()
+
+    async def insert(self, document: dict) -> ObjectId:
+        document.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((document, future))
+
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self.flushes.add(task)
+            task.add_done_callback(self.flushes.discard)
+
+    async def close(self):
+        self.flush()
+        if self.flushes:
+            await asyncio.gather(*self.flushes, return_exceptions=True)
+
+    async def _write(self, batch: list):
+        MONGO_WRITE_BATCH_SIZE.observe(value=len(batch))
+        write_errors = {}
+        try:
+            await self.collection.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as error:
+            write_errors = {write_error["index"]: write_error for write_error in error.details["writeErrors"]}
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+
+            write_error = write_errors.get(index)
+            if write_error is None:
+                future.set_result(document["_id"])
+            else:
+                # Raise what insert_one would have raised for this document alone.
+                error_class = DuplicateKeyError if write_error.get("code") == 11000 else WriteError
+                future.set_exception(error_class(write_error.get("errmsg"), write_error.get("code"), write_error))
@@ -1,60 +1,526 @@
-from functools import lru_cache
-from fastapi import FastAPI, HTTPException, status, Depends
-from features.create_person.create_person_command_handler import CreatePersonCommandHandler
-from features.create_person.create_person_command import CreatePersonCommand
-from features.get_person.get_all_person_query import GetAllPersonQuery
-from features.get_person.get_person_query_handler import GetPersonQueryHandler    
-from features.get_person.get_person_query import GetPersonQuery
-from infra.person_repository import PersonRepository
-from infra.database import Database
-from settings import Settings, DevelopmentSettings, ProductionSettings
-
-app = FastAPI()
-
-@lru_cache
-def get_settings() -> Settings:
-    import os
-    if os.getenv("ENV") == "production":
-        return ProductionSettings()
-    return DevelopmentSettings()
-
-def get_database(settings: Settings = Depends(get_settings)) -> Database:
-    return Database(settings)
-
-def get_person_repository(db: Database = Depends(get_database)) -> PersonRepository:
-    return PersonRepository(db.persons_collection)
-
-def get_create_person_handler(repo: PersonRepository = Depends(get_person_repository)) -> CreatePersonCommandHandler:
-    return CreatePersonCommandHandler(repo)
-
-def get_get_person_handler(repo: PersonRepository = Depends(get_person_repository)) -> GetPersonQueryHandler:
-    return GetPersonQueryHandler(repo)
-
-@app.get("/")
-def read_root():
-    return {"Message": "healthy"}
-
-@app.get("/person/{id}")
-async def read_item(id: str, handler: GetPersonQueryHandler = Depends(get_get_person_handler)):
-    query = GetPersonQuery(id=id)
-    person = await handler.handle_get_person(query)
-    
-    if not person:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Person with id: '{id}' was not found")
-
-    return person
-    
-@app.get("/person/")
-async def read_items(handler: GetPersonQueryHandler = Depends(get_get_person_handler)):
-    query = GetAllPersonQuery()
-    people = await handler.handle_get_all_person(query)
-
-    return people
-    
-@app.post("/person/", status_code=201)
-async def create_item(cmd: CreatePersonCommand, handler: CreatePersonCommandHandler = Depends(get_create_person_handler)):
-    id = await handler.handle_create_person(cmd)
-    
-    return id
+import os
+import time
+from infra.startup_profile import ImportProfiler
+
+# STARTUP_PROFILE=1 times every import below and logs the slowest modules
+# once the worker is ready.
+STARTED = time.perf_counter()
+import_profiler = ImportProfiler() if os.getenv("STARTUP_PROFILE") else None
+if import_profiler is not None:
+    import_profiler.install()
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request, status, Depends
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.bulk_create_person_command import BulkCreatePersonCommand
+from features.create_person.idempotent_create_person_command import IdempotentCreatePersonCommand
+from features.create_person.bulk_create_person_result import BulkCreatePersonResult
+from features.get_person.get_all_person_query import GetAllPersonQuery
+from features.get_person.get_person_query import GetPersonQuery
+from features.get_person.stream_all_person_query import StreamAllPersonQuery
+from features.get_person.find_person_by_name_query import FindPersonByNameQuery
+from features.get_person.search_person_query import SearchPersonQuery
+from features.get_person.get_pep_person_query import GetPepPersonQuery
+from features.get_person.get_person_city_counts_query import GetPersonCityCountsQuery
+from features.get_person.get_person_stats_query import GetPersonStatsQuery
+from features.export_person.export_person_handler import ExportPersonHandler
+from features.export_person.export_person_job import ExportPersonJob
+from features.export_person.export_person_query import ExportPersonQuery
+from features.export_person.get_export_person_job_query import GetExportPersonJobQuery
+from features.export_person.resume_export_person_job_command import ResumeExportPersonJobCommand
+from features.export_person.start_export_person_job_command import StartExportPersonJobCommand
+from features.mediator import Mediator, build_mediator
+from models.person import Person
+from models.person_columns import PersonColumns
+from models.person_stats import PersonStats
+from models.person_search_hit import PersonSearchHit
+from models.person_summary import PersonSummary
+from infra.person_repository import PersonRepository
+from infra.person_ids import id_generator
+from infra.database import Database
+from infra.idempotency import IdempotencyKeyConflict, IdempotencyStore
+from infra.person_cache import CachedPersonRepository, PersonCache
+from infra.person_store import PersonStore
+from infra.in_memory_person_repository import InMemoryPersonRepository, ReplicatedPersonRepository
+from infra.person_json import PersonJSONResponse, iter_column_rows, render_people, render_person
+from infra.person_export import EXPORT_WRITERS, export_file_name
+from infra.person_projections import SEARCH_FIELDS, PersonProjections, PersonSearchProjection, ProjectionConsumer
+from infra.write_coalescer import WriteCoalescer
+from infra.causal import CausalConsistencyMiddleware
+from infra.compression import CompressionMiddleware
+from infra.concurrency import AdaptiveLimit, ConcurrencyLimitMiddleware
+from infra.etag import body_etag, etag_matches, page_etag, person_etag
+from infra.metrics import REGISTRY, MetricsMiddleware, person_cache_metrics
+from settings import Settings, settings_from_env
+
+logger = logging.getLogger(__name__)
+IMPORTED = time.perf_counter()
+if import_profiler is not None:
+    import_profiler.uninstall()
+    logging.basicConfig(level=logging.INFO)
+
+@lru_cache
+def get_settings() -> Settings:
+    return settings_from_env()
+
+async def retry_with_backoff(step: Callable[[], Awaitable[Any]], description: str):
+    delay = 1
+    while True:
+        try:
+            return await step()
+        except Exception as error:
+            logger.warning("%s failed, retrying in %ss: %s", description, delay, error)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+async def prepare_database(app: FastAPI, database: Database, idempotency_store: IdempotencyStore):
+    # Runs after startup so the worker answers requests right away; /ready
+    # stays 503 until the pool is warm and the indexes exist, since lookups
+    # and deduplication rely on the unique id index. Requests before that
+    # open connections on demand.
+    await retry_with_backoff(database.warm_up, "MongoDB warm-up")
+    await retry_with_backoff(
+        PersonRepository(database.persons_collection, database.settings.mongo_batch_size).ensure_indexes,
+        "Creating MongoDB indexes")
+    await retry_with_backoff(idempotency_store.ensure_indexes, "Creating the idempotency key TTL index")
+
+    app.state.ready = True
+    logger.info(
+        "Worker ready %.0f ms after import started (imports %.0f ms)",
+        (time.perf_counter() - STARTED) * 1000,
+        (IMPORTED - STARTED) * 1000)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    settings.log_config()
+    if import_profiler is not None:
+        logger.info("Imported %d modules in %.0f ms, slowest first:", len(import_profiler.timings), import_profiler.total_ms())
+        for name, cumulative, own in import_profiler.report():
+            logger.info("  %-50s self %7.1f ms  cumulative %7.1f ms", name, own, cumulative)
+    database = Database(settings)
+    app.state.database = database
+    app.state.ready = False
+    app.state.person_cache = PersonCache(
+        settings.cache_max_size,
+        settings.cache_ttl_seconds,
+        settings.cache_negative_ttl_seconds) if settings.cache_enabled else None
+    app.state.write_coalescer = WriteCoalescer(
+        database.batched_persons_collection,
+        settings.write_batch_max_size,
+        settings.write_batch_max_delay_ms) if settings.write_batching_enabled else None
+    # Repository and handlers are built once per worker; routes only look up
+    # the mediator instead of resolving a dependency graph on every request.
+    app.state.person_replica = InMemoryPersonRepository(settings.mongo_batch_size) if settings.person_replica_enabled else None
+    repo = create_person_repository(database, app.state.person_cache, app.state.write_coalescer, app.state.person_replica)
+    app.state.export_person_handler = ExportPersonHandler(repo, settings.export_dir, settings.export_batch_size)
+    app.state.person_projections = PersonProjections() if settings.projections_enabled else None
+    # Search has its own index unless the projections already keep one.
+    app.state.person_search = None
+    if settings.search_enabled:
+        app.state.person_search = app.state.person_projections or PersonSearchProjection()
+    idempotency_store = IdempotencyStore(
+        database.idempotency_collection,
+        settings.idempotency_ttl_seconds,
+        settings.idempotency_lease_seconds)
+    app.state.mediator = build_mediator(
+        repo,
+        app.state.export_person_handler,
+        app.state.person_projections,
+        settings.stats_cache_ttl_seconds,
+        id_generator(settings.person_id_generator),
+        idempotency_store,
+        app.state.person_search.search if app.state.person_search is not None else None)
+    preparing = asyncio.create_task(prepare_database(app, database, idempotency_store))
+    projection_consumer = ProjectionConsumer(
+        database.persons_collection,
+        app.state.person_projections,
+        settings.projection_source,
+        settings.projection_poll_interval_ms,
+        settings.mongo_batch_size) if settings.projections_enabled else None
+    if projection_consumer is not None:
+        projection_consumer.start()
+    search_consumer = ProjectionConsumer(
+        database.persons_collection,
+        app.state.person_search,
+        settings.projection_source,
+        settings.projection_poll_interval_ms,
+        settings.mongo_batch_size,
+        fields=SEARCH_FIELDS) if isinstance(app.state.person_search, PersonSearchProjection) else None
+    if search_consumer is not None:
+        search_consumer.start()
+    replica_consumer = ProjectionConsumer(
+        database.persons_collection,
+        app.state.person_replica,
+        settings.projection_source,
+        settings.projection_poll_interval_ms,
+        settings.mongo_batch_size,
+        fields=None) if app.state.person_replica is not None else None
+    if replica_consumer is not None:
+        replica_consumer.start()
+    yield
+    preparing.cancel()
+    if projection_consumer is not None:
+        await projection_consumer.close()
+    if search_consumer is not None:
+        await search_consumer.close()
+    if replica_consumer is not None:
+        await replica_consumer.close()
+    await app.state.export_person_handler.close()
+    if app.state.write_coalescer is not None:
+        await app.state.write_coalescer.close()
+    await database.close_connection()
+
+app = FastAPI(lifespan=lifespan)
+# Added first so it runs inside the metrics middleware, which then times
+# compression too.
+app.add_middleware(CompressionMiddleware, minimum_size=get_settings().compression_min_size)
+# Only requests that get past the concurrency limit open a session.
+app.add_middleware(CausalConsistencyMiddleware)
+# Inside the metrics middleware too, so shed requests show up there as 503s
+# of their route.
+if get_settings().concurrency_limit_enabled:
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        limit_factory=partial(
+            AdaptiveLimit,
+            get_settings().concurrency_initial_limit,
+            get_settings().concurrency_min_limit,
+            get_settings().concurrency_max_limit,
+            get_settings().concurrency_max_queue),
+        max_wait_ms=get_settings().concurrency_max_wait_ms)
+app.add_middleware(MetricsMiddleware)
+
+def create_person_repository(
+    db: Database,
+    cache: Optional[PersonCache],
+    coalescer: Optional[WriteCoalescer],
+    replica: Optional[InMemoryPersonRepository] = None) -> PersonStore:
+    repo = PersonRepository(
+        db.persons_collection,
+        db.settings.mongo_batch_size,
+        db.settings.bulk_insert_chunk_size,
+        coalescer,
+        db.settings.person_id_storage,
+        db.person_read_collections)
+    if replica is not None:
+        repo = ReplicatedPersonRepository(repo, replica)
+    if cache is not None:
+        return CachedPersonRepository(repo, cache)
+
+    return repo
+
+# Async so FastAPI calls them inline instead of hopping to the threadpool.
+async def get_person_cache(request: Request) -> Optional[PersonCache]:
+    return request.app.state.person_cache
+
+async def get_mediator(request: Request) -> Mediator:
+    return request.app.state.mediator
+
+async def get_person_projections(request: Request) -> Optional[PersonProjections]:
+    return request.app.state.person_projections
+
+async def get_person_search(request: Request) -> Optional[PersonSearchProjection]:
+    return request.app.state.person_search
+
+@app.get("/")
+async def read_root():
+    return {"Message": "healthy"}
+
+@app.get("/ready")
+async def read_ready(request: Request):
+    if not request.app.state.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Warming up")
+
+    return {"Message": "ready"}
+
+@app.get("/cache/stats")
+async def read_cache_stats(cache: Optional[PersonCache] = Depends(get_person_cache)):
+    if cache is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cache is disabled")
+
+    return cache.stats()
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics(cache: Optional[PersonCache] = Depends(get_person_cache)):
+    extra = person_cache_metrics(cache.stats()) if cache is not None else []
+    return PlainTextResponse(REGISTRY.render(extra), media_type="text/plain; version=0.0.4")
+
+# Declared before /person/{id} so "stats" is not taken for an id.
+@app.get("/person/stats", response_model=PersonStats)
+async def read_stats(
+    name: Optional[str] = Query(None, min_length=1, max_length=100),
+    min_age: Optional[int] = Query(None, ge=0, le=150),
+    max_age: Optional[int] = Query(None, ge=0, le=150),
+    city: Optional[str] = None,
+    neighbor: Optional[str] = None,
+    is_pep: Optional[bool] = None,
+    age_bucket_size: int = Query(10, ge=1, le=150),
+    top_cities: int = Query(50, ge=1, le=1000),
+    mediator: Mediator = Depends(get_mediator)):
+    query = GetPersonStatsQuery(
+        name=name,
+        min_age=min_age,
+        max_age=max_age,
+        city=city,
+        neighbor=neighbor,
+        is_pep=is_pep,
+        age_bucket_size=age_bucket_size,
+        top_cities=top_cities)
+    return await mediator.send(query)
+
+def require_projections(projections: Optional[PersonProjections]):
+    if projections is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projections are disabled")
+    if not projections.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Projections are catching up")
+
+@app.get("/person/projections/cities")
+async def read_city_counts(
+    city: Optional[str] = None,
+    mediator: Mediator = Depends(get_mediator),
+    projections: Optional[PersonProjections] = Depends(get_person_projections)):
+    require_projections(projections)
+    return mediator.send(GetPersonCityCountsQuery(city=city))
+
+@app.get("/person/projections/peps", response_model=List[PersonSummary])
+async def read_pep_persons(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    mediator: Mediator = Depends(get_mediator),
+    projections: Optional[PersonProjections] = Depends(get_person_projections)):
+    require_projections(projections)
+    return mediator.send(GetPepPersonQuery(limit=limit, offset=offset))
+
+@app.get("/person/projections/names", response_model=List[PersonSummary])
+async def find_persons_by_name(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=1000),
+    mediator: Mediator = Depends(get_mediator),
+    projections: Optional[PersonProjections] = Depends(get_person_projections)):
+    require_projections(projections)
+    return mediator.send(FindPersonByNameQuery(prefix=prefix, limit=limit))
+
+# Declared before /person/{id} so "search" is not taken for an id.
+@app.get("/person/search", response_model=List[PersonSearchHit])
+async def search_persons(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=100),
+    mediator: Mediator = Depends(get_mediator),
+    search: Optional[PersonSearchProjection] = Depends(get_person_search)):
+    if search is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Search is disabled")
+    if not search.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search index is catching up")
+    return mediator.send(SearchPersonQuery(q=q, limit=limit))
+
+# Declared before /person/{id} so "export" is not taken for an id.
+@app.get("/person/export")
+async def export_items(
+    format: Literal["csv", "ndjson", "parquet"] = "ndjson",
+    name: Optional[str] = Query(None, min_length=1, max_length=100),
+    min_age: Optional[int] = Query(None, ge=0, le=150),
+    max_age: Optional[int] = Query(None, ge=0, le=150),
+    city: Optional[str] = None,
+    neighbor: Optional[str] = None,
+    is_pep: Optional[bool] = None,
+    after: Optional[str] = None,
+    mediator: Mediator = Depends(get_mediator)):
+    query = ExportPersonQuery(
+        format=format,
+        name=name,
+        min_age=min_age,
+        max_age=max_age,
+        city=city,
+        neighbor=neighbor,
+        is_pep=is_pep,
+        after=after)
+    try:
+        chunks = mediator.send(query)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    writer = EXPORT_WRITERS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="persons.{writer.extension}"'})
+
+@app.post("/person/export/jobs", status_code=202, response_model=ExportPersonJob)
+async def start_export_job(cmd: StartExportPersonJobCommand, mediator: Mediator = Depends(get_mediator)):
+    try:
+        return await mediator.send(cmd)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+async def get_export_job(id: str, mediator: Mediator) -> ExportPersonJob:
+    job = await mediator.send(GetExportPersonJobQuery(id=id))
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Export job with id: '{id}' was not found")
+
+    return job
+
+@app.get("/person/export/jobs/{id}", response_model=ExportPersonJob)
+async def read_export_job(id: str, mediator: Mediator = Depends(get_mediator)):
+    return await get_export_job(id, mediator)
+
+@app.post("/person/export/jobs/{id}/resume", status_code=202, response_model=ExportPersonJob)
+async def resume_export_job(id: str, mediator: Mediator = Depends(get_mediator)):
+    try:
+        job = await mediator.send(ResumeExportPersonJobCommand(id=id))
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Export job with id: '{id}' was not found")
+
+    return job
+
+@app.get("/person/export/jobs/{id}/download")
+async def download_export_job(id: str, mediator: Mediator = Depends(get_mediator)):
+    job = await get_export_job(id, mediator)
+    if job.status != "completed":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Export job with id: '{id}' is {job.status}")
+
+    writer = EXPORT_WRITERS[job.query.format]
+    return FileResponse(
+        os.path.join(get_settings().export_dir, export_file_name(job.id, job.query.format)),
+        media_type=writer.media_type,
+        filename=f"persons.{writer.extension}")
+
+def conditional_response(request: Request, etag: Optional[str], render: Callable[[], bytes], headers: Optional[dict] = None) -> Response:
+    # With a stored version the ETag is known before rendering, so a match
+    # answers 304 without serializing anything. Documents saved before
+    # versions existed are rendered and hashed instead.
+    body = None
+    if etag is None:
+        body = render()
+        etag = body_etag(body)
+
+    headers = {**(headers or {}), "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return PersonJSONResponse(body if body is not None else render(), headers=headers)
+
+@app.get("/person/{id}")
+async def read_item(id: str, request: Request, fields: Optional[str] = None, mediator: Mediator = Depends(get_mediator)):
+    query = GetPersonQuery(id=id, fields=parse_fields(fields))
+    try:
+        person = await mediator.send(query)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    
+    if not person:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Person with id: '{id}' was not found")
+
+    return conditional_response(request, person_etag(person, query.fields), lambda: render_person(person, partial=bool(query.fields)))
+    
+async def ndjson_lines(batches: AsyncIterator[PersonColumns], partial: bool = False) -> AsyncIterator[str]:
+    async for columns in batches:
+        yield "".join(row + "\n" for row in iter_column_rows(columns, partial))
+
+async def json_array_chunks(batches: AsyncIterator[PersonColumns], partial: bool = False) -> AsyncIterator[str]:
+    separator = "["
+    async for columns in batches:
+        yield separator + ",".join(iter_column_rows(columns, partial))
+        separator = ","
+
+    yield "[]" if separator == "[" else "]"
+
+@app.get("/person/")
+async def read_items(
+    request: Request,
+    name: Optional[str] = Query(None, min_length=1, max_length=100),
+    min_age: Optional[int] = Query(None, ge=0, le=150),
+    max_age: Optional[int] = Query(None, ge=0, le=150),
+    city: Optional[str] = None,
+    neighbor: Optional[str] = None,
+    is_pep: Optional[bool] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: Optional[Literal["ndjson", "json"]] = None,
+    mediator: Mediator = Depends(get_mediator)):
+    query_type = StreamAllPersonQuery if stream else GetAllPersonQuery
+    query = query_type(
+        name=name,
+        min_age=min_age,
+        max_age=max_age,
+        city=city,
+        neighbor=neighbor,
+        is_pep=is_pep,
+        limit=limit,
+        after=after,
+        fields=parse_fields(fields))
+    partial = bool(query.fields)
+
+    try:
+        if stream == "ndjson":
+            return StreamingResponse(ndjson_lines(mediator.send(query), partial), media_type="application/x-ndjson")
+        if stream == "json":
+            return StreamingResponse(json_array_chunks(mediator.send(query), partial), media_type="application/json")
+
+        page = await mediator.send(query)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+
+    return conditional_response(request, page_etag(page, query.fields), lambda: render_people(page.items, partial), headers)
+    
+@app.post("/person/", status_code=201)
+async def create_item(
+    cmd: CreatePersonCommand,
+    mediator: Mediator = Depends(get_mediator),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)):
+    if idempotency_key is not None:
+        cmd = IdempotentCreatePersonCommand(**cmd.model_dump(), idempotency_key=idempotency_key)
+
+    try:
+        id = await mediator.send(cmd)
+    except IdempotencyKeyConflict as error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(error))
+    
+    return id
+
+@app.post("/person/bulk", response_model=List[BulkCreatePersonResult])
+async def create_items(request: Request, mediator: Mediator = Depends(get_mediator)):
+    # Read up to the limit only, whatever Content-Length claims.
+    max_bytes = get_settings().bulk_max_body_bytes
+    too_large = HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=f"Request body is larger than {max_bytes} bytes")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed request body: {error}")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body must be a JSON array or NDJSON")
+
+    return await mediator.send(BulkCreatePersonCommand(items=items))
@@ -0,0 +1,110 @@
+from array import array
+from sys import intern
+from typing import Iterable, Optional
+from bson.binary import Binary, UUID_SUBTYPE
+
+MISSING = object()
+
+# is_pep and address presence are stored one byte per row.
+FALSE, TRUE, ABSENT = 0, 1, 2
+NO_ADDRESS, NULL_ADDRESS, ADDRESS = 0, 1, 2
+
+def format_uuid(packed: bytes) -> str:
+    digits = packed.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+def pack_uuid(value) -> Optional[bytes]:
+    # Ids stored as BSON UUIDs are already packed.
+    if isinstance(value, Binary) and value.subtype == UUID_SUBTYPE and len(value) == 16:
+        return bytes(value)
+    if not isinstance(value, str) or len(value) != 36:
+        return None
+
+    try:
+        packed = bytes.fromhex(value.replace("-", ""))
+    except ValueError:
+        return None
+
+    # Only the canonical lowercase form survives the round trip, so the text
+    # rendered back is always the text that was stored.
+    return packed if len(packed) == 16 and format_uuid(packed) == value else None
+
+class UUIDColumn:
+    __slots__ = ("packed", "others")
+
+    def __init__(self):
+        self.packed = bytearray()
+        self.others = {}
+
+    def append(self, value):
+        packed = pack_uuid(value)
+        if packed is None:
+            self.others[len(self.packed) // 16] = value
+            packed = bytes(16)
+
+        self.packed += packed
+
+    def __getitem__(self, row: int):
+        if row in self.others:
+            return self.others[row]
+
+        return format_uuid(self.packed[row * 16:row * 16 + 16])
+
+    def __len__(self) -> int:
+        return len(self.packed) // 16
+
+# Struct-of-arrays read model for bulk reads: one column per Person and
+# Address field instead of two model instances per row. Ids are packed to 16
+# bytes, ages and numbers live in typed arrays, and street, neighbor and city
+# are interned so rows in the same city share one string. Fields a document
+# does not have (projections, legacy rows) are stored as MISSING or -1.
+# next_cursor resumes a read after the last row of the batch.
+class PersonColumns:
+    __slots__ = ("ids", "names", "ages", "is_peps", "addresses", "address_ids", "streets", "numbers", "neighbors", "cities", "next_cursor")
+
+    def __init__(self):
+        self.ids = UUIDColumn()
+        self.names = []
+        self.ages = array("h")
+        self.is_peps = bytearray()
+        self.addresses = bytearray()
+        self.address_ids = UUIDColumn()
+        self.streets = []
+        self.numbers = array("q")
+        self.neighbors = []
+        self.cities = []
+        self.next_cursor = None
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]) -> "PersonColumns":
+        columns = cls()
+        for doc in docs:
+            columns.append(doc)
+
+        return columns
+
+    def append(self, doc: dict):
+        self.ids.append(doc.get("id", MISSING))
+        self.names.append(doc.get("name", MISSING))
+        self.ages.append(doc.get("age", -1))
+        is_pep = doc.get("is_pep", MISSING)
+        self.is_peps.append(ABSENT if is_pep is MISSING else TRUE if is_pep else FALSE)
+
+        address = doc.get("address", MISSING)
+        if isinstance(address, dict):
+            self.addresses.append(ADDRESS)
+        else:
+            self.addresses.append(NO_ADDRESS if address is MISSING else NULL_ADDRESS)
+            address = {}
+
+        self.address_ids.append(address.get("id", MISSING))
+        self.streets.append(_intern(address.get("street", MISSING)))
+        self.numbers.append(address.get("number", -1))
+        self.neighbors.append(_intern(address.get("neighbor", MISSING)))
+        self.cities.append(_intern(address.get("city", MISSING)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+def _intern(value):
+    return intern(value) if isinstance(value, str) else value
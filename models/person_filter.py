@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class PersonFilter(BaseModel):
+    name: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    city: Optional[str] = None
+    neighbor: Optional[str] = None
+    is_pep: Optional[bool] = None
@@ -0,0 +1,7 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from models.person import Person
+
+class PersonPage(BaseModel):
+    items: List[Person]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+class PersonSearchHit(BaseModel):
+    id: str
+    name: str
+    # Mean trigram similarity of the query words to the name, from 0 to 1.
+    score: float
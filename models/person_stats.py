@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class AgeBucket(BaseModel):
+    min_age: int
+    max_age: int
+    count: int
+
+class CityCount(BaseModel):
+    city: str
+    count: int
+
+class PersonStats(BaseModel):
+    total: int
+    pep_count: int
+    pep_ratio: float
+    average_age: Optional[float] = None
+    age_histogram: List[AgeBucket]
+    cities: List[CityCount]
@@ -0,0 +1,6 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class PersonSummary(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
@@ -0,0 +1,64 @@
+import argparse
+import importlib.util
+import logging
+import os
+import uvicorn
+from settings import Settings, settings_from_env
+
+logger = logging.getLogger(__name__)
+
+# Production entry point: a supervisor process that starts N uvicorn workers
+# sharing one listening socket. Every worker runs the lifespan in main.py, so
+# each owns its MongoDB pool, cache and coalescer; MONGO_MAX_POOL_SIZE is
+# per worker. The supervisor only imports settings, not the app.
+
+def worker_count(settings: Settings) -> int:
+    return settings.web_workers or os.cpu_count() or 1
+
+def server_options(settings: Settings, loop: str = "auto", http: str = "auto") -> dict:
+    workers = worker_count(settings)
+    return {
+        "workers": workers,
+        # "auto" picks uvloop and httptools when installed (uvicorn[standard])
+        # and falls back to asyncio and h11.
+        "loop": loop,
+        "http": http,
+        "backlog": settings.web_backlog,
+        "timeout_keep_alive": settings.web_keep_alive_seconds,
+        # A worker that reaches its request limit drains and exits and the
+        # supervisor starts a fresh one. The jitter keeps workers from
+        # recycling together. A single worker has no supervisor to restart
+        # it, so it never recycles.
+        "limit_max_requests": settings.web_max_requests if workers > 1 else None,
+        "limit_max_requests_jitter": settings.web_max_requests_jitter,
+        "timeout_graceful_shutdown": settings.web_graceful_shutdown_seconds,
+        # Per-request logging costs more than the request itself on fast
+        # routes; latency and status are on /metrics.
+        "access_log": False
+    }
+
+def describe(options: dict) -> str:
+    loop = options["loop"]
+    if loop == "auto":
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = options["http"]
+    if http == "auto":
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    return f"{options['workers']} workers, loop={loop}, http={http}, backlog={options['backlog']}, keep-alive={options['timeout_keep_alive']}s"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Person API with one worker per CPU")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--loop", choices=("auto", "asyncio", "uvloop"), default="auto")
+    parser.add_argument("--http", choices=("auto", "h11", "httptools"), default="auto")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    options = server_options(settings_from_env(), args.loop, args.http)
+    logger.info("Starting %s", describe(options))
+    uvicorn.run("main:app", host=args.host, port=args.port, **options)
+
+if __name__ == "__main__":
+    main()
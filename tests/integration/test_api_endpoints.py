@@ -1,173 +1,717 @@
-import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, MagicMock
-from main import app, get_person_repository
-from infra.person_repository import PersonRepository
-from models.person import Person
-from models.address import Address
-from bson import ObjectId
-
-@pytest.mark.integration
-class TestPersonAPI:
-    @pytest.fixture
-    def client(self):
-        """Create a test client with mocked dependencies"""
-        # Create a mock repository
-        mock_repo = MagicMock(spec=PersonRepository)
-        
-        # Set up default mock behaviors
-        mock_repo.save = AsyncMock(return_value="mock-person-id")
-        mock_repo.get_by_id = AsyncMock(return_value=None)
-        mock_repo.get_all = AsyncMock(return_value=[])
-        
-        # Override the dependency
-        def override_get_person_repository():
-            return mock_repo
-        
-        app.dependency_overrides[get_person_repository] = override_get_person_repository
-        
-        with TestClient(app) as client:
-            yield client
-        
-        # Clean up
-        app.dependency_overrides = {}
-
-    def test_health_check(self, client):
-        """Test the health check endpoint"""
-        response = client.get("/")
-        assert response.status_code == 200
-        data = response.json()
-        assert data == {"Message": "healthy"}
-
-    def test_create_person(self, client):
-        """Test creating a new person"""
-        person_data = {
-            "name": "John Doe",
-            "age": 30,
-            "street": "Main Street",
-            "number": 123,
-            "neighbor": "Downtown",
-            "city": "Test City",
-            "is_pep": False
-        }
-
-        response = client.post("/person/", json=person_data)
-        assert response.status_code == 201
-        result = response.json()
-        # Should return a UUID string
-        assert isinstance(result, str)
-        # Verify it's a valid UUID format
-        import re
-        assert re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', result)
-        assert len(result) > 0
-
-    def test_get_person_found(self, client):
-        """Test getting a person by ID when found"""
-        person_id = str(ObjectId())  # Valid ObjectId
-        
-        # Create mock person
-        mock_person = Person(
-            id="person-123",
-            name="John Doe",
-            age=30,
-            address=Address(
-                id="addr-123",
-                street="Main Street",
-                number=123,
-                neighbor="Downtown",
-                city="Test City"
-            ),
-            is_pep=False
-        )
-        
-        # Get the mock repo and set up the return value
-        mock_repo = app.dependency_overrides[get_person_repository]()
-        mock_repo.get_by_id = AsyncMock(return_value=mock_person)
-        
-        response = client.get(f"/person/{person_id}")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["id"] == "person-123"
-        assert data["name"] == "John Doe"
-        assert data["age"] == 30
-
-    def test_get_person_not_found(self, client):
-        """Test getting a person by ID when not found"""
-        person_id = str(ObjectId())  # Valid ObjectId
-        
-        # Mock repo already returns None by default
-        response = client.get(f"/person/{person_id}")
-        assert response.status_code == 404
-        data = response.json()
-        assert "was not found" in data["detail"]
-
-    def test_get_all_persons(self, client):
-        """Test getting all persons"""
-        # Create mock persons
-        mock_persons = [
-            Person(
-                id="person-1",
-                name="John Doe",
-                age=30,
-                address=Address(
-                    id="addr-1",
-                    street="Main Street",
-                    number=123,
-                    neighbor="Downtown",
-                    city="Test City"
-                ),
-                is_pep=False
-            ),
-            Person(
-                id="person-2", 
-                name="Jane Smith",
-                age=25,
-                address=Address(
-                    id="addr-2",
-                    street="Oak Avenue",
-                    number=456,
-                    neighbor="Uptown",
-                    city="Test City"
-                ),
-                is_pep=True
-            )
-        ]
-        
-        # Get the mock repo and set up the return value
-        mock_repo = app.dependency_overrides[get_person_repository]()
-        mock_repo.get_all = AsyncMock(return_value=mock_persons)
-        
-        response = client.get("/person/")
-        assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 2
-        assert data[0]["name"] == "John Doe"
-        assert data[1]["name"] == "Jane Smith"
-
-    def test_create_person_validation_error(self, client):
-        """Test creating a person with invalid data"""
-        invalid_data = {
-            "name": "John Doe",
-            "age": -5,  # Invalid age
-            "street": "Main Street",
-            "number": 123,
-            "neighbor": "Downtown",
-            "city": "Test City",
-            "is_pep": False
-        }
-
-        # Since validation happens in the domain model, it raises an exception
-        # that results in a 500 error (should be handled better in production)
-        # With mocks, the validation still happens before the mock is called
-        with pytest.raises(Exception):  # ValidationError is raised
-            response = client.post("/person/", json=invalid_data)
-
-    def test_get_person_invalid_id(self, client):
-        """Test getting a person with invalid ID format"""
-        # Test with an invalid ObjectId format
-        invalid_id = "invalid-id-format"
-        
-        # With mocks, InvalidId is not raised, so it returns None -> 404
-        response = client.get(f"/person/{invalid_id}")
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+from main import app, get_mediator, get_person_projections, get_person_search
+from features.mediator import build_mediator
+from infra.idempotency import IdempotencyStore
+from infra.person_json import render_person
+from infra.person_projections import PersonProjections
+from infra.person_repository import PersonRepository
+from models.person import Person
+from models.address import Address
+from models.person_page import PersonPage
+from models.person_stats import AgeBucket, CityCount, PersonStats
+from models.person_columns import PersonColumns
+from models.person_filter import PersonFilter
+from tests.mongo_stand_in import create_collection
+from bson import ObjectId
+
+@pytest.mark.integration
+class TestPersonAPI:
+    @pytest.fixture
+    def mock_repo(self):
+        """Create a mock repository"""
+        mock_repo = MagicMock(spec=PersonRepository)
+        
+        # Set up default mock behaviors
+        mock_repo.save = AsyncMock(return_value="mock-person-id")
+        mock_repo.get_by_id = AsyncMock(return_value=None)
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=[]))
+
+        return mock_repo
+
+    @pytest.fixture
+    def client(self, mock_repo):
+        """Create a test client with mocked dependencies"""
+        # Override the mediator with one whose handlers use the mock repository
+        mediator = build_mediator(mock_repo)
+        app.dependency_overrides[get_mediator] = lambda: mediator
+        
+        with TestClient(app) as client:
+            yield client
+        
+        # Clean up
+        app.dependency_overrides = {}
+
+    def test_health_check(self, client):
+        """Test the health check endpoint"""
+        response = client.get("/")
+        assert response.status_code == 200
+        data = response.json()
+        assert data == {"Message": "healthy"}
+
+    def test_database_is_created_once_by_lifespan(self, client):
+        """Test that the lifespan hook shares one Database across requests"""
+        from infra.database import Database
+        database = app.state.database
+
+        client.get("/")
+        client.get("/person/")
+
+        assert isinstance(database, Database)
+        assert app.state.database is database
+
+    def test_ready_after_warm_up(self, client):
+        """Test that readiness turns green once the pool has warmed up"""
+        for _ in range(100):
+            response = client.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+
+        assert response.status_code == 200
+        assert response.json() == {"Message": "ready"}
+
+    def test_not_ready_while_warming_up(self, mock_repo):
+        """Test that liveness answers while readiness waits for the pool"""
+        async def never_warm(self):
+            await asyncio.Event().wait()
+
+        app.dependency_overrides[get_mediator] = lambda: build_mediator(mock_repo)
+        with patch("infra.database.Database.warm_up", never_warm), TestClient(app) as client:
+            assert client.get("/").status_code == 200
+            response = client.get("/ready")
+        app.dependency_overrides = {}
+
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_prepare_database_retries_warm_up(self):
+        """Test that a failed warm-up is retried before the worker reports ready"""
+        from main import prepare_database
+        database = MagicMock()
+        database.settings.mongo_batch_size = 500
+        database.warm_up = AsyncMock(side_effect=[ConnectionError("no servers"), None])
+        database.persons_collection.find.return_value.__aiter__.return_value = []
+        database.persons_collection.create_indexes = AsyncMock()
+        idempotency_store = MagicMock(ensure_indexes=AsyncMock())
+        test_app = MagicMock()
+        test_app.state.ready = False
+
+        with patch("main.asyncio.sleep", AsyncMock()) as sleep:
+            await prepare_database(test_app, database, idempotency_store)
+
+        assert database.warm_up.await_count == 2
+        sleep.assert_awaited_once_with(1)
+        idempotency_store.ensure_indexes.assert_awaited_once()
+        assert test_app.state.ready is True
+
+    @pytest.mark.asyncio
+    async def test_prepare_database_retries_index_creation(self):
+        """Test that the worker only reports ready once the indexes exist"""
+        from main import prepare_database
+        database = MagicMock()
+        database.settings.mongo_batch_size = 500
+        database.warm_up = AsyncMock()
+        database.persons_collection.find.return_value.__aiter__.return_value = []
+        database.persons_collection.create_indexes = AsyncMock(side_effect=[ConnectionError("not primary"), None])
+        idempotency_store = MagicMock(ensure_indexes=AsyncMock(side_effect=[ConnectionError("not primary"), ConnectionError("not primary"), None]))
+        test_app = MagicMock()
+        test_app.state.ready = False
+
+        async def not_ready_yet(delay):
+            assert test_app.state.ready is False
+
+        with patch("main.asyncio.sleep", AsyncMock(side_effect=not_ready_yet)) as sleep:
+            await prepare_database(test_app, database, idempotency_store)
+
+        assert database.persons_collection.create_indexes.await_count == 2
+        assert idempotency_store.ensure_indexes.await_count == 3
+        assert [call.args[0] for call in sleep.await_args_list] == [1, 1, 2]
+        assert test_app.state.ready is True
+
+    def test_mediator_is_built_once_by_lifespan(self, client):
+        """Test that handlers and repository are shared across requests"""
+        from features.mediator import Mediator
+        mediator = app.state.mediator
+
+        client.get("/person/")
+        client.post("/person/", json={"name": "John Doe", "age": 30, "street": "Main St", "number": 1, "neighbor": "Downtown", "city": "Test City", "is_pep": False})
+
+        assert isinstance(mediator, Mediator)
+        assert app.state.mediator is mediator
+
+    def test_cache_stats(self, client):
+        """Test that cache counters are exposed"""
+        response = client.get("/cache/stats")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"hits", "misses", "evictions", "size"}
+
+    def test_metrics(self, client):
+        """Test the Prometheus metrics endpoint"""
+        client.get("/person/")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_count{method="GET",route="/person/",status="200"}' in response.text
+        assert "# TYPE mongo_command_duration_seconds histogram" in response.text
+        assert "person_cache_hits_total" in response.text
+
+    def test_create_person(self, client):
+        """Test creating a new person"""
+        person_data = {
+            "name": "John Doe",
+            "age": 30,
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+
+        response = client.post("/person/", json=person_data)
+        assert response.status_code == 201
+        result = response.json()
+        # Should return a UUID string
+        assert isinstance(result, str)
+        # Verify it's a valid UUID format
+        import re
+        assert re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', result)
+        assert len(result) > 0
+
+    def test_bulk_create_persons(self, client, mock_repo):
+        """Test creating persons in bulk from a JSON array"""
+        person_data = {
+            "name": "John Doe",
+            "age": 30,
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+        mock_repo.save_many = AsyncMock(side_effect=lambda people: [None] * len(people))
+
+        response = client.post("/person/bulk", json=[person_data, dict(person_data, age=-5)])
+
+        assert response.status_code == 200
+        results = response.json()
+        assert results[0]["index"] == 0 and results[0]["id"] and results[0]["error"] is None
+        assert results[1]["index"] == 1 and results[1]["id"] is None and "age" in results[1]["error"]
+        assert len(mock_repo.save_many.call_args[0][0]) == 1
+
+    def test_bulk_create_persons_ndjson(self, client, mock_repo):
+        """Test creating persons in bulk from an NDJSON body"""
+        import json
+        person_data = {
+            "name": "John Doe",
+            "age": 30,
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+        mock_repo.save_many = AsyncMock(side_effect=lambda people: [None] * len(people))
+
+        body = "\n".join(json.dumps(dict(person_data, name=f"Person {i}")) for i in range(3)) + "\n"
+        response = client.post("/person/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        assert [p.name for p in mock_repo.save_many.call_args[0][0]] == ["Person 0", "Person 1", "Person 2"]
+
+    def test_bulk_create_persons_body_too_large(self, client, mock_repo):
+        """Test that bulk bodies over the limit are refused before they are read"""
+        mock_repo.save_many = AsyncMock()
+        item = b'{"name": "John Doe", "age": 30, "is_pep": false}\n'
+
+        with patch("settings.DevelopmentSettings.bulk_max_body_bytes", new_callable=PropertyMock, return_value=len(item) * 2):
+            declared = client.post("/person/bulk", content=item * 3, headers={"Content-Type": "application/x-ndjson"})
+
+            def chunks():
+                for _ in range(3):
+                    yield item
+
+            streamed = client.post("/person/bulk", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+
+        assert declared.status_code == streamed.status_code == 413
+        mock_repo.save_many.assert_not_called()
+
+    def test_bulk_create_persons_malformed_body(self, client):
+        """Test that a body that is not a JSON array is rejected"""
+        assert client.post("/person/bulk", content="{not json", headers={"Content-Type": "application/json"}).status_code == 400
+        assert client.post("/person/bulk", json={"name": "John Doe"}).status_code == 400
+
+    def test_get_person_found(self, client, mock_repo):
+        """Test getting a person by ID when found"""
+        person_id = str(ObjectId())  # Valid ObjectId
+        
+        # Create mock person
+        mock_person = Person(
+            id="person-123",
+            name="John Doe",
+            age=30,
+            address=Address(
+                id="addr-123",
+                street="Main Street",
+                number=123,
+                neighbor="Downtown",
+                city="Test City"
+            ),
+            is_pep=False
+        )
+        
+        # Set up the mock repo return value
+        mock_repo.get_by_id = AsyncMock(return_value=mock_person)
+        
+        response = client.get(f"/person/{person_id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == "person-123"
+        assert data["name"] == "John Doe"
+        assert data["age"] == 30
+
+    def test_get_person_with_fields(self, client, mock_repo):
+        """Test that only the requested fields are returned"""
+        mock_repo.get_by_id = AsyncMock(return_value=Person.model_construct(id="person-123", name="John Doe"))
+
+        response = client.get("/person/person-123?fields=id,name")
+
+        assert response.status_code == 200
+        assert response.json() == {"id": "person-123", "name": "John Doe"}
+        mock_repo.get_by_id.assert_called_once_with("person-123", ["id", "name"])
+
+    def test_get_person_with_unknown_field(self, client, mock_repo):
+        """Test that an unknown field is rejected"""
+        mock_repo.get_by_id = AsyncMock(side_effect=ValueError("Unknown field: 'password'"))
+
+        response = client.get("/person/person-123?fields=password")
+
+        assert response.status_code == 400
+
+    def test_get_all_persons_with_fields(self, client, mock_repo):
+        """Test sparse list responses"""
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=[
+            Person.model_construct(id="person-1", name="John Doe"),
+            Person.model_construct(id="person-2", name="Jane Smith")
+        ]))
+
+        response = client.get("/person/?fields=id,name")
+
+        assert response.json() == [{"id": "person-1", "name": "John Doe"}, {"id": "person-2", "name": "Jane Smith"}]
+        assert mock_repo.get_all.call_args[0][3] == ["id", "name"]
+
+    def test_get_person_not_found(self, client):
+        """Test getting a person by ID when not found"""
+        person_id = str(ObjectId())  # Valid ObjectId
+        
+        # Mock repo already returns None by default
+        response = client.get(f"/person/{person_id}")
+        assert response.status_code == 404
+        data = response.json()
+        assert "was not found" in data["detail"]
+
+    def test_get_all_persons(self, client, mock_repo):
+        """Test getting all persons"""
+        # Create mock persons
+        mock_persons = [
+            Person(
+                id="person-1",
+                name="John Doe",
+                age=30,
+                address=Address(
+                    id="addr-1",
+                    street="Main Street",
+                    number=123,
+                    neighbor="Downtown",
+                    city="Test City"
+                ),
+                is_pep=False
+            ),
+            Person(
+                id="person-2", 
+                name="Jane Smith",
+                age=25,
+                address=Address(
+                    id="addr-2",
+                    street="Oak Avenue",
+                    number=456,
+                    neighbor="Uptown",
+                    city="Test City"
+                ),
+                is_pep=True
+            )
+        ]
+        
+        # Set up the mock repo return value
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=mock_persons))
+        
+        response = client.get("/person/")
+        assert response.status_code == 200
+        data = response.json()
+        assert isinstance(data, list)
+        assert len(data) == 2
+        assert data[0]["name"] == "John Doe"
+        assert data[1]["name"] == "Jane Smith"
+        assert "X-Next-Cursor" not in response.headers
+        mock_repo.get_all.assert_called_once_with(100, None, PersonFilter(), None)
+
+    def test_get_all_persons_paginated(self, client, mock_repo):
+        """Test that the next page cursor is returned in a header"""
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(
+            items=[Person(id="person-1", name="John Doe", age=30, is_pep=False)],
+            next_cursor="next-page"))
+
+        response = client.get("/person/?limit=1&after=this-page")
+
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert response.headers["X-Next-Cursor"] == "next-page"
+        mock_repo.get_all.assert_called_once_with(1, "this-page", PersonFilter(), None)
+
+    def test_get_all_persons_filtered(self, client, mock_repo):
+        """Test that filters are passed through to the repository"""
+
+        response = client.get("/person/?name=Jo&min_age=18&max_age=65&city=Test%20City&neighbor=Downtown&is_pep=true")
+
+        assert response.status_code == 200
+        mock_repo.get_all.assert_called_once_with(
+            100, None, PersonFilter(name="Jo", min_age=18, max_age=65, city="Test City", neighbor="Downtown", is_pep=True), None)
+
+    def test_get_all_persons_invalid_cursor(self, client, mock_repo):
+        """Test that a malformed cursor is rejected"""
+        mock_repo.get_all = AsyncMock(side_effect=ValueError("Invalid cursor: 'bad'"))
+
+        response = client.get("/person/?after=bad")
+
+        assert response.status_code == 400
+
+    def test_get_all_persons_limit_out_of_range(self, client):
+        """Test that the page size is bounded"""
+        response = client.get("/person/?limit=100000")
+        assert response.status_code == 422
+
+    def test_get_person_not_modified(self, client, mock_repo):
+        """Test that a matching If-None-Match answers 304 without rendering the person"""
+        person = Person(id="person-123", name="John Doe", age=30, is_pep=False, version="0123456789abcdef")
+        mock_repo.get_by_id = AsyncMock(return_value=person)
+
+        response = client.get("/person/person-123")
+        etag = response.headers["ETag"]
+        with patch("main.render_person", wraps=render_person) as rendered:
+            not_modified = client.get("/person/person-123", headers={"If-None-Match": etag})
+            sparse = client.get("/person/person-123?fields=id", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert "version" not in response.json()
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+        assert sparse.status_code == 200
+        assert sparse.headers["ETag"] != etag
+        rendered.assert_called_once()
+
+    def test_get_person_etag_without_stored_version(self, client, mock_repo):
+        """Test that documents saved before versions existed get an ETag from their body"""
+        mock_repo.get_by_id = AsyncMock(return_value=Person(id="person-123", name="John Doe", age=30, is_pep=False))
+
+        etag = client.get("/person/person-123").headers["ETag"]
+        response = client.get("/person/person-123", headers={"If-None-Match": f'"other", {etag}'})
+
+        assert response.status_code == 304
+
+    def test_get_all_persons_not_modified(self, client, mock_repo):
+        """Test that a page is 304 until one of its people changes"""
+        people = [Person(id=f"person-{i}", name="John Doe", age=30, is_pep=False, version=f"{i:016x}") for i in range(3)]
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=people, next_cursor="next-page"))
+
+        etag = client.get("/person/").headers["ETag"]
+        not_modified = client.get("/person/", headers={"If-None-Match": etag})
+        people[1] = people[1].model_copy(update={"age": 31, "version": "ffffffffffffffff"})
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=people, next_cursor="next-page"))
+        changed = client.get("/person/", headers={"If-None-Match": etag})
+
+        assert not_modified.status_code == 304
+        assert not_modified.headers["X-Next-Cursor"] == "next-page"
+        assert changed.status_code == 200
+        assert changed.json()[1]["age"] == 31
+
+    @pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+    def test_large_list_is_compressed(self, client, mock_repo, encoding):
+        """Test that large pages are compressed with the negotiated encoding"""
+        people = [Person(id=f"person-{i}", name="John Doe", age=30, is_pep=False) for i in range(200)]
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=people))
+
+        response = client.get("/person/?limit=200", headers={"Accept-Encoding": encoding})
+
+        assert response.headers["Content-Encoding"] == encoding
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert int(response.headers["Content-Length"]) < len(response.content) / 5
+        assert len(response.json()) == 200
+
+    def test_small_response_is_not_compressed(self, client, mock_repo):
+        """Test that bodies below the size threshold are sent as they are"""
+        mock_repo.get_all = AsyncMock(return_value=PersonPage(items=[Person(id="person-1", name="John Doe", age=30, is_pep=False)]))
+
+        response = client.get("/person/", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+    def test_get_person_stats(self, client, mock_repo):
+        """Test that stats are aggregated by the repository, not read as a list"""
+        mock_repo.get_stats = AsyncMock(return_value=PersonStats(
+            total=2,
+            pep_count=1,
+            pep_ratio=0.5,
+            average_age=27.5,
+            age_histogram=[AgeBucket(min_age=20, max_age=29, count=1), AgeBucket(min_age=30, max_age=39, count=1)],
+            cities=[CityCount(city="Test City", count=2)]))
+
+        response = client.get("/person/stats?is_pep=true&age_bucket_size=10&top_cities=5")
+
+        assert response.status_code == 200
+        assert response.json()["pep_ratio"] == 0.5
+        assert response.json()["cities"] == [{"city": "Test City", "count": 2}]
+        mock_repo.get_stats.assert_called_once_with(PersonFilter(is_pep=True), 10, 5)
+        mock_repo.get_by_id.assert_not_called()
+
+    def test_get_person_stats_bucket_size_out_of_range(self, client):
+        """Test that the age bucket width is bounded"""
+        assert client.get("/person/stats?age_bucket_size=0").status_code == 422
+
+    def test_projections_disabled(self, client):
+        """Test that projection queries are unavailable unless enabled"""
+        response = client.get("/person/projections/cities")
+
+        assert response.status_code == 404
+
+    def test_projection_queries(self, mock_repo):
+        """Test that projection queries are served from the projections, not the repository"""
+        projections = PersonProjections()
+        projections.upsert({"_id": ObjectId(), "id": "person-1", "name": "John Doe", "address": {"city": "Lisbon"}, "is_pep": True})
+        projections.upsert({"_id": ObjectId(), "id": "person-2", "name": "Jane Smith", "address": {"city": "Lisbon"}, "is_pep": False})
+        app.dependency_overrides[get_mediator] = lambda: build_mediator(mock_repo, person_projections=projections)
+        app.dependency_overrides[get_person_projections] = lambda: projections
+        app.dependency_overrides[get_person_search] = lambda: projections
+
+        with TestClient(app) as client:
+            catching_up = client.get("/person/projections/cities")
+            projections.ready = True
+            cities = client.get("/person/projections/cities")
+            city = client.get("/person/projections/cities?city=Porto")
+            peps = client.get("/person/projections/peps")
+            names = client.get("/person/projections/names?prefix=ja")
+            search = client.get("/person/search?q=jon%20doe")
+        app.dependency_overrides = {}
+
+        assert catching_up.status_code == 503
+        assert cities.json() == {"Lisbon": 2}
+        assert city.json() == {"Porto": 0}
+        assert peps.json() == [{"id": "person-1", "name": "John Doe"}]
+        assert names.json() == [{"id": "person-2", "name": "Jane Smith"}]
+        assert [hit["id"] for hit in search.json()] == ["person-1"]
+        mock_repo.get_all.assert_not_called()
+
+    def test_search_indexes_created_persons_right_away(self, mock_repo):
+        """Test that a created person can be searched before the change stream delivers it"""
+        projections = PersonProjections()
+        projections.ready = True
+        app.dependency_overrides[get_mediator] = lambda: build_mediator(mock_repo, person_projections=projections)
+        app.dependency_overrides[get_person_projections] = lambda: projections
+        app.dependency_overrides[get_person_search] = lambda: projections
+
+        with TestClient(app) as client:
+            id = client.post("/person/", json={
+                "name": "Maria Silva",
+                "age": 30,
+                "street": "Main Street",
+                "number": 1,
+                "neighbor": "Downtown",
+                "city": "Lisbon",
+                "is_pep": False
+            }).json()
+            hits = client.get("/person/search?q=maria%20slva&limit=5").json()
+        app.dependency_overrides = {}
+
+        assert [hit["id"] for hit in hits] == [id]
+        assert 0 < hits[0]["score"] < 1
+
+    def test_create_person_with_idempotency_key(self, mock_repo):
+        """Test that a retried POST with the same Idempotency-Key returns the first id"""
+        store = IdempotencyStore(create_collection(name="api_idempotency_keys"))
+        app.dependency_overrides[get_mediator] = lambda: build_mediator(mock_repo, idempotency_store=store)
+        person_data = {
+            "name": "John Doe",
+            "age": 30,
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+
+        with TestClient(app) as client:
+            first = client.post("/person/", json=person_data, headers={"Idempotency-Key": "order-42"})
+            retry = client.post("/person/", json=person_data, headers={"Idempotency-Key": "order-42"})
+            changed = client.post("/person/", json={**person_data, "age": 31}, headers={"Idempotency-Key": "order-42"})
+            other = client.post("/person/", json=person_data, headers={"Idempotency-Key": "order-43"})
+        app.dependency_overrides = {}
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert changed.status_code == 422
+        assert other.json() != first.json()
+        assert mock_repo.save.await_count == 2
+
+    def test_search_query_is_required(self, client):
+        assert client.get("/person/search").status_code == 422
+        # Off by default.
+        assert client.get("/person/search?q=maria").status_code == 404
+
+    def test_search_without_projections(self):
+        """Test that search works without projections, from its own index"""
+        from main import get_settings
+        collection = create_collection(name="api_search_default")
+        collection.collection.insert_one({"_id": ObjectId(), "id": "person-1", "name": "John Doe"})
+        database = MagicMock(
+            settings=get_settings(),
+            persons_collection=collection,
+            batched_persons_collection=collection,
+            idempotency_collection=create_collection(name="api_search_default_keys"),
+            person_read_collections={},
+            warm_up=AsyncMock(),
+            close_connection=AsyncMock())
+
+        with patch("main.Database", return_value=database), \
+                patch("settings.DevelopmentSettings.search_enabled", new_callable=PropertyMock, return_value=True), \
+                TestClient(app) as client:
+            assert app.state.person_projections is None
+            for _ in range(100):
+                existing = client.get("/person/search?q=jon%20doe")
+                if existing.status_code == 200:
+                    break
+                time.sleep(0.01)
+            id = client.post("/person/", json={
+                "name": "Maria Silva",
+                "age": 30,
+                "street": "Main Street",
+                "number": 1,
+                "neighbor": "Downtown",
+                "city": "Lisbon",
+                "is_pep": False
+            }).json()
+            created = client.get("/person/search?q=maria%20slva").json()
+        collection.collection.drop()
+
+        assert [hit["id"] for hit in existing.json()] == ["person-1"]
+        assert [hit["id"] for hit in created] == [id]
+
+    def test_stream_all_persons_ndjson(self, client, mock_repo):
+        """Test streaming all persons as NDJSON"""
+        async def people(*args):
+            yield PersonColumns.from_documents([
+                {"id": "person-1", "name": "John Doe", "age": 30, "is_pep": False},
+                {"id": "person-2", "name": "Jane Smith", "age": 25, "is_pep": True}
+            ])
+
+        mock_repo.stream_all = MagicMock(side_effect=people)
+
+        response = client.get("/person/?stream=ndjson")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert len(lines) == 2
+        assert '"name":"Jane Smith"' in lines[1]
+
+    def test_stream_all_persons_json_array(self, client, mock_repo):
+        """Test streaming all persons as a chunked JSON array"""
+        async def people(*args):
+            yield PersonColumns.from_documents([
+                {"id": "person-1", "name": "John Doe", "age": 30, "is_pep": False},
+                {"id": "person-2", "name": "Jane Smith", "age": 25, "is_pep": True}
+            ])
+
+        mock_repo.stream_all = MagicMock(side_effect=people)
+
+        response = client.get("/person/?stream=json")
+
+        assert response.status_code == 200
+        assert [p["id"] for p in response.json()] == ["person-1", "person-2"]
+
+    def test_stream_all_persons_empty(self, client, mock_repo):
+        """Test streaming an empty collection as a JSON array"""
+        async def people(*args):
+            return
+            yield
+
+        mock_repo.stream_all = MagicMock(side_effect=people)
+
+        response = client.get("/person/?stream=json")
+
+        assert response.json() == []
+
+    def test_export_persons_csv(self, client, mock_repo):
+        """Test streaming an export as CSV with server-side filters"""
+        async def people(*args, **kwargs):
+            yield PersonColumns.from_documents([{"id": "person-1", "name": "John Doe", "age": 30, "is_pep": True}])
+
+        mock_repo.stream_all = MagicMock(side_effect=people)
+
+        response = client.get("/person/export?format=csv&is_pep=true")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="persons.csv"' in response.headers["content-disposition"]
+        assert response.text.splitlines()[1] == "person-1,John Doe,30,,,,,,true"
+        assert mock_repo.stream_all.call_args[0][1] == PersonFilter(is_pep=True)
+
+    def test_export_persons_invalid_cursor(self, client, mock_repo):
+        """Test that a bad cursor is rejected before the export starts"""
+        mock_repo.stream_all = MagicMock(side_effect=ValueError("Invalid cursor: 'bad'"))
+
+        response = client.get("/person/export?after=bad")
+
+        assert response.status_code == 400
+
+    def test_export_job_not_found(self, client):
+        """Test polling, resuming and downloading an unknown export job"""
+        id = "5f0c1c44-7a49-4a63-9a8e-1f5a3f0b6c2d"
+
+        assert client.get(f"/person/export/jobs/{id}").status_code == 404
+        assert client.post(f"/person/export/jobs/{id}/resume").status_code == 404
+        assert client.get(f"/person/export/jobs/{id}/download").status_code == 404
+
+    def test_create_person_validation_error(self, client):
+        """Test creating a person with invalid data"""
+        invalid_data = {
+            "name": "John Doe",
+            "age": -5,  # Invalid age
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+
+        # Since validation happens in the domain model, it raises an exception
+        # that results in a 500 error (should be handled better in production)
+        # With mocks, the validation still happens before the mock is called
+        with pytest.raises(Exception):  # ValidationError is raised
+            response = client.post("/person/", json=invalid_data)
+
+    def test_get_person_invalid_id(self, client):
+        """Test getting a person with invalid ID format"""
+        # Test with an invalid ObjectId format
+        invalid_id = "invalid-id-format"
+        
+        # With mocks, InvalidId is not raised, so it returns None -> 404
+        response = client.get(f"/person/{invalid_id}")
         assert response.status_code == 404  # Mock returns None, treated as not found
\ No newline at end of file
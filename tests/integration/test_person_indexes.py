@@ -0,0 +1,74 @@
+import os
+import json
+import pytest
+import pytest_asyncio
+from itertools import combinations
+from motor.motor_asyncio import AsyncIOMotorClient
+from infra.person_repository import PersonRepository
+from models.person_filter import PersonFilter
+
+MONGO_TEST_URL = os.environ.get("MONGO_TEST_URL")
+
+FILTER_VALUES = {
+    "name": "Person 1",
+    "min_age": 18,
+    "max_age": 65,
+    "city": "City 3",
+    "neighbor": "Neighbor 7",
+    "is_pep": True
+}
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not MONGO_TEST_URL, reason="MONGO_TEST_URL is not set")
+class TestPersonIndexes:
+    @pytest_asyncio.fixture
+    async def repository(self):
+        """Create an indexed persons collection on a real MongoDB"""
+        client = AsyncIOMotorClient(MONGO_TEST_URL)
+        collection = client["personapi_test"]["persons_explain"]
+        await collection.drop()
+        await collection.insert_many([
+            {
+                "id": f"person-{i}",
+                "name": f"Person {i}",
+                "age": i % 100,
+                "address": {"id": f"addr-{i}", "street": "Street", "number": 1, "neighbor": f"Neighbor {i % 50}", "city": f"City {i % 10}"},
+                "is_pep": i % 20 == 0
+            }
+            for i in range(5000)
+        ])
+        repository = PersonRepository(collection)
+        await repository.ensure_indexes()
+
+        yield repository
+
+        await collection.drop()
+        client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filters", [
+        PersonFilter(**dict(combination))
+        for size in range(1, len(FILTER_VALUES) + 1)
+        for combination in combinations(FILTER_VALUES.items(), size)
+    ])
+    async def test_no_filter_combination_scans_the_collection(self, repository, filters):
+        """Test with explain() that every filter combination is served by an index"""
+        predicates = repository._build_filter(filters, None)
+
+        filter_plan = await repository.collection.find(predicates).explain()
+        page_plan = await repository.collection.find(predicates, sort=[("_id", 1)], limit=101).explain()
+
+        assert "COLLSCAN" not in json.dumps(filter_plan["queryPlanner"]["winningPlan"], default=str)
+        assert "COLLSCAN" not in json.dumps(page_plan["queryPlanner"]["winningPlan"], default=str)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("field", list(FILTER_VALUES))
+    async def test_stats_hint_matches_the_filter(self, repository, field):
+        """Test that the stats pipeline runs with the index hinted for each filter"""
+        filters = PersonFilter(**{field: FILTER_VALUES[field]})
+        expected = await repository.collection.count_documents(repository._build_filter(filters, None))
+
+        stats = await repository.get_stats(filters, 10, 5)
+
+        assert stats.total == expected
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+import mongomock
+from typing import List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from pymongo.results import BulkWriteResult
+
+class RoundTrip:
+    # Simulated server time per operation. With a capacity only that many
+    # operations are served at once and the rest queue, as on a saturated
+    # mongod, so latency grows with load instead of staying flat.
+    def __init__(self, latency: float = 0.0, capacity: Optional[int] = None):
+        self.latency = latency
+        self.slots = asyncio.Semaphore(capacity) if capacity else None
+
+    async def __call__(self):
+        if self.slots is None:
+            await asyncio.sleep(self.latency)
+            return
+
+        async with self.slots:
+            await asyncio.sleep(self.latency)
+
+class AsyncCursor:
+    def __init__(self, cursor, round_trip: RoundTrip):
+        self.cursor = cursor
+        self.round_trip = round_trip
+
+    async def to_list(self, length=None) -> list:
+        await self.round_trip()
+        return list(self.cursor if length is None else itertools.islice(self.cursor, length))
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.round_trip()
+        for doc in self.cursor:
+            yield doc
+
+class AsyncCollection:
+    def __init__(self, collection, round_trip: RoundTrip):
+        self.collection = collection
+        self.round_trip = round_trip
+
+    def find(self, *args, **kwargs) -> AsyncCursor:
+        kwargs.pop("batch_size", None)
+        return AsyncCursor(self.collection.find(*args, **kwargs), self.round_trip)
+
+    def aggregate(self, pipeline, **kwargs) -> AsyncCursor:
+        # mongomock ignores allowDiskUse and hint.
+        return AsyncCursor(self.collection.aggregate(pipeline, **kwargs), self.round_trip)
+
+    async def find_one(self, *args, **kwargs):
+        # Sessions are accepted and ignored; mongomock's find_one rejects them.
+        kwargs.pop("session", None)
+        await self.round_trip()
+        return self.collection.find_one(*args, **kwargs)
+
+    def watch(self, *args, **kwargs):
+        # Answers like a standalone server, which has no change streams.
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", 40573)
+
+    async def insert_one(self, document, **kwargs):
+        await self.round_trip()
+        return self.collection.insert_one(document, **kwargs)
+
+    async def insert_many(self, documents, **kwargs):
+        await self.round_trip()
+        return self.collection.insert_many(documents, **kwargs)
+
+    async def create_indexes(self, indexes, **kwargs):
+        await self.round_trip()
+        return self.collection.create_indexes(indexes, **kwargs)
+
+    async def bulk_write(self, requests: List[UpdateOne], **kwargs):
+        # Only the UpdateOne batches PersonRepository.migrate_missing_ids
+        # sends; mongomock's bulk_write does not accept current pymongo
+        # operation objects, so each is applied as an update_one.
+        await self.round_trip()
+        modified = sum(self.collection.update_one(request._filter, request._doc).modified_count for request in requests)
+        return BulkWriteResult({"nModified": modified}, True)
+
+    async def update_one(self, *args, **kwargs):
+        await self.round_trip()
+        return self.collection.update_one(*args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        await self.round_trip()
+        return self.collection.delete_one(*args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        await self.round_trip()
+        return self.collection.update_many(*args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs) -> int:
+        await self.round_trip()
+        return self.collection.count_documents(*args, **kwargs)
+
+    async def drop(self):
+        self.collection.drop()
+
+def create_collection(latency_ms: float = 0.0, name: str = "persons", capacity: Optional[int] = None) -> AsyncCollection:
+    return AsyncCollection(mongomock.MongoClient()["personapi_bench"][name], RoundTrip(latency_ms / 1000, capacity))
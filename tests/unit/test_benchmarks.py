@@ -0,0 +1,96 @@
+import random
+import pytest
+from uuid import UUID
+from benchmarks import bench_ids, bench_in_memory, bench_overload, bench_retries, bench_search, load
+from benchmarks.compare import compare, flatten
+
+
+class TestBenchmarks:
+    def test_flatten(self):
+        results = {"load": {"get_person": {"rps": 100.0, "p99_ms": 5.0}}, "python": "3.11"}
+
+        assert flatten(results) == {"load.get_person.rps": 100.0, "load.get_person.p99_ms": 5.0}
+
+    def test_compare_flags_regressions(self):
+        baseline = {"micro": {"person_validation": {"ns_per_op": 1000}}, "load": {"get_person": {"rps": 100.0, "p99_ms": 5.0}}}
+        current = {"micro": {"person_validation": {"ns_per_op": 1050}}, "load": {"get_person": {"rps": 80.0, "p99_ms": 7.0}}}
+
+        regressions = compare(baseline, current, tolerance=0.10)
+
+        assert [metric for metric, *_ in regressions] == ["load.get_person.p99_ms", "load.get_person.rps"]
+
+    def test_compare_ignores_improvements(self):
+        baseline = {"load": {"get_person": {"rps": 100.0, "p99_ms": 5.0}}}
+        current = {"load": {"get_person": {"rps": 200.0, "p99_ms": 2.0}}}
+
+        assert compare(baseline, current, tolerance=0.10) == []
+
+    @pytest.mark.asyncio
+    async def test_load_run_against_stand_in(self):
+        results = await load.run(people=50, requests=40, concurrency=4)
+
+        for scenario in ("get_person", "list_persons", "create_person"):
+            assert results[scenario]["errors"] == 0
+            assert results[scenario]["p50_ms"] <= results[scenario]["p95_ms"] <= results[scenario]["p99_ms"]
+            assert results[scenario]["rps"] > 0
+
+    @pytest.mark.asyncio
+    async def test_load_run_with_write_batching(self):
+        results = await load.run(people=50, requests=40, concurrency=4, write_batching=True)
+
+        assert results["create_person"]["errors"] == 0
+        assert results["create_person"]["requests"] == 20
+
+    def test_id_index_model(self):
+        rng = random.Random(0)
+        ids = [str(UUID(int=rng.getrandbits(128), version=4)) for _ in range(20000)]
+        random_ids = bench_ids.model_index(ids, "string")
+        ordered_ids = bench_ids.model_index(sorted(ids), "string")
+        ordered_binary_ids = bench_ids.model_index(sorted(ids), "binary")
+
+        assert random_ids["fill"] < ordered_ids["fill"]
+        assert random_ids["leaves_touched_by_last_2000_inserts"] > 30
+        assert ordered_ids["leaves_touched_by_last_2000_inserts"] <= 4
+        assert ordered_ids["leaf_pages"] < random_ids["leaf_pages"]
+        assert ordered_binary_ids["key_bytes"] < ordered_ids["key_bytes"]
+        assert ordered_binary_ids["leaf_pages"] < ordered_ids["leaf_pages"]
+
+    def test_search_run(self):
+        results = bench_search.run(people=2000, queries=50, scans=1)
+
+        assert results["queries_with_hits"] > 40
+        assert results["p50_ms"] <= results["p99_ms"]
+
+    @pytest.mark.asyncio
+    async def test_overload_run(self):
+        results = await bench_overload.run(people=20, capacity=2, latency_ms=20, load=3, seconds=0.5, timeout_ms=200, initial_limit=10)
+
+        # Wall-clock throughput depends on the machine; test_concurrency
+        # covers how the limit behaves.
+        for mode in ("unlimited", "limited"):
+            assert set(results[mode]) == {"offered", "goodput_rps", "ok", "shed", "too_late", "p50_ms", "p99_ms"}
+            assert results[mode]["ok"] + results[mode]["shed"] + results[mode]["too_late"] == results[mode]["offered"]
+        assert results["unlimited"]["shed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retries_run(self):
+        results = await bench_retries.run(creates=50, rate=1000, timeout_rate=0.5, retries=1, latency_ms=1)
+
+        assert results["no_key"]["duplicates"] == results["no_key"]["attempts"] - 50 > 0
+        assert results["idempotency_key"]["duplicates"] == 0
+
+    @pytest.mark.asyncio
+    async def test_in_memory_run(self):
+        results = await bench_in_memory.run(people=300, rounds=2)
+
+        # Timings depend on the machine; only the shape is checked.
+        assert results["people"] == 300
+        for query in ("get_by_id", "first_page", "city_page", "age_range_page", "name_prefix_page", "stats"):
+            assert set(results[query]) == {"stand_in_ms", "memory_ms", "speedup"}
+
+    @pytest.mark.asyncio
+    async def test_load_run_against_in_memory_store(self):
+        results = await load.run(people=50, requests=40, concurrency=4, store="memory")
+
+        for scenario in ("get_person", "list_persons", "create_person"):
+            assert results[scenario]["errors"] == 0
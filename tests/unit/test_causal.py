@@ -0,0 +1,99 @@
+import pytest
+from bson import Timestamp
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from infra.causal import CausalConsistencyMiddleware, causal_session, decode_token, encode_token, session_options
+
+
+class FakeSession:
+    def __init__(self):
+        self.operation_time = None
+        self.cluster_time = None
+        self.has_ended = False
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        self.operation_time = operation_time
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.has_ended = True
+
+
+class TestCausalConsistency:
+    @pytest.fixture
+    def sessions(self):
+        return []
+
+    @pytest.fixture
+    def client(self, sessions):
+        async def start_session(scope):
+            sessions.append(FakeSession())
+            return sessions[-1]
+
+        app = FastAPI()
+        app.add_middleware(CausalConsistencyMiddleware, start_session=start_session)
+
+        @app.post("/write")
+        async def write():
+            # What the driver does after a write in the session.
+            session = causal_session.get()
+            if session is not None:
+                session.advance_operation_time(Timestamp(1700000000, 7))
+                session.advance_cluster_time({"clusterTime": Timestamp(1700000000, 7)})
+            return {"session": bool(session_options())}
+
+        @app.get("/read")
+        async def read():
+            session = causal_session.get()
+            return {"operation_time": session.operation_time.time if session else None}
+
+        return TestClient(app)
+
+    def test_token_round_trip(self):
+        session = FakeSession()
+        session.advance_operation_time(Timestamp(1700000000, 3))
+        session.advance_cluster_time({"clusterTime": Timestamp(1700000000, 4)})
+
+        times = decode_token(encode_token(session))
+
+        assert times["operationTime"] == Timestamp(1700000000, 3)
+        assert times["clusterTime"] == {"clusterTime": Timestamp(1700000000, 4)}
+
+    def test_requests_without_token_get_no_session(self, client, sessions):
+        response = client.post("/write")
+
+        assert response.json() == {"session": False}
+        assert "X-Causal-Token" not in response.headers
+        assert sessions == []
+
+    def test_write_token_makes_next_read_wait_for_it(self, client, sessions):
+        written = client.post("/write", headers={"X-Causal-Token": "new"})
+        read = client.get("/read", headers={"X-Causal-Token": written.headers["X-Causal-Token"]})
+
+        assert written.json() == {"session": True}
+        assert read.json() == {"operation_time": 1700000000}
+        assert read.headers["X-Causal-Token"] == written.headers["X-Causal-Token"]
+        assert len(sessions) == 2
+        assert all(session.has_ended for session in sessions)
+
+    def test_session_is_not_used_after_it_ended(self):
+        session = FakeSession()
+        session.has_ended = True
+
+        reset = causal_session.set(session)
+        try:
+            assert session_options() == {}
+        finally:
+            causal_session.reset(reset)
+
+    def test_malformed_token(self, client, sessions):
+        response = client.get("/read", headers={"X-Causal-Token": "not-a-token"})
+
+        assert response.status_code == 400
+        assert "Malformed causal token" in response.json()["detail"]
+        assert sessions == []
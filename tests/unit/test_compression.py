@@ -0,0 +1,68 @@
+import gzip
+import pytest
+import zlib
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from infra.compression import CompressionMiddleware, GzipEncoder, choose_encoding
+
+
+class TestCompression:
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+        @app.get("/large")
+        async def large():
+            return PlainTextResponse("x" * 1000)
+
+        @app.get("/binary")
+        async def binary():
+            return Response(b"x" * 1000, media_type="application/vnd.apache.parquet")
+
+        @app.get("/stream")
+        async def stream():
+            async def lines():
+                yield "first\n"
+                yield "second\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        return TestClient(app)
+
+    def test_choose_encoding(self):
+        encodings = ["zstd", "gzip"]
+
+        assert choose_encoding("gzip, deflate, zstd", encodings) == "zstd"
+        assert choose_encoding("gzip;q=1.0, zstd;q=0.5", encodings) == "gzip"
+        assert choose_encoding("zstd;q=0, *;q=0.1", encodings) == "gzip"
+        assert choose_encoding("identity", encodings) is None
+        assert choose_encoding("", encodings) is None
+
+    def test_gzip_encoder_flushes_every_chunk(self):
+        encoder = GzipEncoder()
+        decompressor = zlib.decompressobj(31)
+
+        assert decompressor.decompress(encoder.compress(b"first", final=False)) == b"first"
+        assert decompressor.decompress(encoder.compress(b"second", final=True)) == b"second"
+
+    def test_compresses_complete_body(self, client):
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.text == "x" * 1000
+
+    def test_skips_already_compressed_types(self, client):
+        response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert "Vary" not in response.headers
+
+    def test_compresses_stream_regardless_of_size(self, client):
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert gzip.decompress(raw) == b"first\nsecond\n"
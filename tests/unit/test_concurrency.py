@@ -0,0 +1,338 @@
+import asyncio
+import random
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from infra.concurrency import AdaptiveLimit, ConcurrencyLimitMiddleware, backend_call
+from infra.metrics import HTTP_REQUEST_DURATION, MetricsMiddleware
+
+
+class TestAdaptiveLimit:
+    def test_grows_while_latency_holds(self):
+        limit = AdaptiveLimit(initial_limit=4, max_limit=5, window=10)
+
+        for _ in range(100):
+            assert limit.try_acquire()
+            limit.in_flight = 4
+            limit.release(0.01)
+            limit.in_flight = 0
+
+        assert limit.limit == 5
+
+    def test_does_not_grow_when_unused(self):
+        limit = AdaptiveLimit(initial_limit=10, window=10)
+
+        for _ in range(100):
+            assert limit.try_acquire()
+            limit.release(0.01)
+
+        assert limit.limit == 10
+
+    def test_requests_without_database_calls_are_not_samples(self):
+        limit = AdaptiveLimit(initial_limit=10, window=10)
+
+        for _ in range(100):
+            limit.try_acquire()
+            limit.release(None)
+
+        assert limit.limit == 10
+        assert limit.baseline is None
+
+    def test_backs_off_in_proportion_to_the_slowdown(self):
+        limit = AdaptiveLimit(initial_limit=20, window=5)
+        for _ in range(10):
+            limit.try_acquire()
+            limit.release(0.01)
+
+        # Slightly slow, then far too slow: cut by backoff, then by half.
+        for _ in range(5):
+            limit.try_acquire()
+            limit.release(0.021)
+        assert limit.limit == pytest.approx(18)
+
+        for _ in range(5):
+            limit.try_acquire()
+            limit.release(1)
+        assert limit.limit == pytest.approx(9)
+
+    def test_one_slow_window_does_not_move_the_baseline(self):
+        limit = AdaptiveLimit(initial_limit=100, window=5, history=5)
+        for latency in (0.01, 0.01, 0.01, 0.05, 0.01):
+            for _ in range(5):
+                limit.try_acquire()
+                limit.release(latency)
+
+        assert limit.baseline == pytest.approx(0.01)
+
+    def test_bimodal_latency_is_not_overload(self):
+        # Steady traffic, no overload: cache hits that never reach MongoDB,
+        # fast indexed reads and ten times slower ones, at 21 in flight.
+        rng = random.Random(7)
+        limit = AdaptiveLimit(initial_limit=30)
+
+        for _ in range(20000):
+            limit.try_acquire()
+            limit.in_flight = 21
+            draw = rng.random()
+            limit.release(None if draw < 0.5 else 0.0001 if draw < 0.9 else 0.001)
+            limit.in_flight = 0
+
+        assert limit.limit >= 30
+
+    def test_failures_back_off_and_stop_at_min_limit(self):
+        limit = AdaptiveLimit(initial_limit=5, min_limit=4, window=10)
+
+        for _ in range(100):
+            limit.try_acquire()
+            limit.release(0.01, failed=True)
+
+        assert limit.limit == 4
+
+    def test_queue_does_not_shrink_with_the_limit(self):
+        limit = AdaptiveLimit(initial_limit=4, max_queue=50)
+        limit.queued = 49
+        assert not limit.queue_full()
+        limit.queued = 50
+        assert limit.queue_full()
+
+    def test_expected_wait_follows_the_last_window(self):
+        limit = AdaptiveLimit(initial_limit=10, window=5)
+        assert limit.expected_wait() == 0
+
+        for _ in range(5):
+            limit.try_acquire()
+            limit.release(0.1)
+        limit.queued = 19
+
+        assert limit.expected_wait() == pytest.approx(0.2)
+
+    @pytest.mark.asyncio
+    async def test_overload_is_queued_shed_and_cut(self):
+        limit = AdaptiveLimit(initial_limit=10, max_queue=3, window=10)
+        for _ in range(10):
+            limit.try_acquire()
+            limit.release(0.01)
+        assert limit.baseline == 0.01
+
+        # The database slows down once all ten slots are taken.
+        for _ in range(10):
+            assert limit.try_acquire()
+        assert not limit.try_acquire()
+        waiters = [asyncio.create_task(limit.wait(1)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert limit.queue_full()
+
+        for _ in range(10):
+            limit.release(0.05)
+
+        # The queue got the first slots freed; the window then cut the limit
+        # in proportion to the slowdown, by at most half.
+        assert await asyncio.gather(*waiters) == [True, True, True]
+        assert limit.limit == 5
+        assert limit.in_flight == 3 and limit.queued == 0
+
+        # Back within tolerance with the limit in use, it grows again.
+        for _ in range(3):
+            limit.release(0.01)
+        for _ in range(7):
+            limit.try_acquire()
+            limit.release(0.01)
+        assert limit.limit == 7
+
+    @pytest.mark.asyncio
+    async def test_release_hands_slot_to_oldest_waiter(self):
+        limit = AdaptiveLimit(initial_limit=1, max_limit=1, max_queue=2)
+        assert limit.try_acquire()
+
+        first = asyncio.create_task(limit.wait(1))
+        second = asyncio.create_task(limit.wait(1))
+        await asyncio.sleep(0)
+        assert limit.queued == 2
+        assert not limit.try_acquire()
+        assert limit.queue_full()
+
+        limit.release(0.01)
+        assert await first
+        assert not second.done()
+        assert limit.in_flight == 1
+
+        limit.release(0.01)
+        assert await second
+        assert limit.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out(self):
+        limit = AdaptiveLimit(initial_limit=1)
+        limit.try_acquire()
+
+        assert not await limit.wait(0.01)
+        assert not await limit.wait(0)
+        assert limit.queued == 0
+        assert limit.in_flight == 1
+
+
+class TestConcurrencyLimitMiddleware:
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+        app.state.gate = asyncio.Event()
+        app.state.writes = 0
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            limit_factory=lambda: AdaptiveLimit(initial_limit=1, max_queue=1),
+            max_wait_ms=50)
+
+        @app.get("/")
+        async def health():
+            return {"status": "ok"}
+
+        @app.get("/slow/{id}")
+        async def slow(id: str):
+            await app.state.gate.wait()
+            return {"id": id}
+
+        @app.post("/slow")
+        async def write():
+            await asyncio.sleep(0.05)
+            app.state.writes += 1
+            return {}
+
+        return app
+
+    @pytest_asyncio.fixture
+    async def client(self, app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_is_full(self, app, client):
+        running = asyncio.create_task(client.get("/slow/1"))
+        queued = asyncio.create_task(client.get("/slow/2"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/slow/3")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        app.state.gate.set()
+        assert (await running).status_code == 200
+        assert (await queued).json() == {"id": "2"}
+
+    @pytest.mark.asyncio
+    async def test_sheds_queued_request_after_max_wait(self, app, client):
+        running = asyncio.create_task(client.get("/slow/1"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/slow/2")
+
+        assert response.status_code == 503
+        app.state.gate.set()
+        assert (await running).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_shed_requests_are_measured_under_their_route(self, app, client):
+        app.add_middleware(MetricsMiddleware)
+        shed = HTTP_REQUEST_DURATION.values.get(("GET", "/slow/{id}", "503"), [[0]])[0]
+        running = asyncio.create_task(client.get("/slow/1"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/slow/2")
+        app.state.gate.set()
+        await running
+
+        assert response.status_code == 503
+        assert sum(HTTP_REQUEST_DURATION.values[("GET", "/slow/{id}", "503")][0]) == sum(shed) + 1
+
+    @pytest.mark.asyncio
+    async def test_limits_are_per_route_not_per_id(self, app, client):
+        running = asyncio.create_task(client.get("/slow/1"))
+        await asyncio.sleep(0.01)
+
+        assert (await client.get("/")).status_code == 200
+        assert (await client.post("/slow")).status_code == 200
+        assert (await client.get("/slow/2")).status_code == 503
+        app.state.gate.set()
+        await running
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_is_rejected_before_running(self, client):
+        response = await client.get("/slow/1", headers={"X-Request-Timeout-Ms": "0"})
+
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_read_is_cancelled_at_its_deadline(self, client):
+        response = await client.get("/slow/1", headers={"X-Request-Timeout-Ms": "20"})
+
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_write_runs_past_its_deadline(self, app, client):
+        response = await client.post("/slow", headers={"X-Request-Timeout-Ms": "10"})
+
+        assert response.status_code == 200
+        assert app.state.writes == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_deadline_is_ignored(self, app, client):
+        app.state.gate.set()
+
+        response = await client.get("/slow/1", headers={"X-Request-Timeout-Ms": "soon"})
+
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("value", ["nan", "inf", "-inf"])
+    async def test_non_finite_deadline_is_ignored(self, app, client, value):
+        app.state.gate.set()
+
+        response = await client.get("/slow/1", headers={"X-Request-Timeout-Ms": value})
+
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_only_database_time_is_reported(self):
+        limits = []
+        app = FastAPI()
+        app.add_middleware(ConcurrencyLimitMiddleware, limit_factory=lambda: limits.append(AdaptiveLimit(window=1000)) or limits[-1])
+
+        @app.get("/person/{id}")
+        async def get_person(id: str):
+            if id != "cached":
+                with backend_call():
+                    await asyncio.sleep(0.01)
+            await asyncio.sleep(0.02)
+            return {}
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/person/cached")
+            await client.get("/person/1")
+
+        assert len(limits[0].samples) == 1
+        assert 0.01 <= limits[0].samples[0] < 0.02
+
+    @pytest.mark.asyncio
+    async def test_sheds_at_once_when_the_queue_outlasts_the_budget(self):
+        limit = AdaptiveLimit(initial_limit=1)
+        limit.history.append(1.0)
+        gate = asyncio.Event()
+        app = FastAPI()
+        app.add_middleware(ConcurrencyLimitMiddleware, limit_factory=lambda: limit, max_wait_ms=500)
+
+        @app.get("/slow")
+        async def slow():
+            await gate.wait()
+            return {}
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            running = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.01)
+            started = asyncio.get_running_loop().time()
+
+            response = await client.get("/slow")
+
+            assert response.status_code == 503
+            assert asyncio.get_running_loop().time() - started < 0.1
+            gate.set()
+            assert (await running).status_code == 200
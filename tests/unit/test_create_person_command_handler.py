@@ -1,105 +1,208 @@
-import pytest
-from unittest.mock import AsyncMock
-from features.create_person.create_person_command_handler import CreatePersonCommandHandler
-from features.create_person.create_person_command import CreatePersonCommand
-from models.person import Person
-from models.address import Address
-
-
-class TestCreatePersonCommandHandler:
-    @pytest.fixture
-    def mock_repository(self):
-        repo = AsyncMock()
-        repo.save.return_value = "mock-person-id"
-        return repo
-
-    @pytest.fixture
-    def command_handler(self, mock_repository):
-        return CreatePersonCommandHandler(mock_repository)
-
-    @pytest.fixture
-    def sample_command(self):
-        return CreatePersonCommand(
-            name="John Doe",
-            age=30,
-            street="Main Street",
-            number=123,
-            neighbor="Downtown",
-            city="Test City",
-            is_pep=False
-        )
-
-    @pytest.mark.asyncio
-    async def test_handle_create_person(self, command_handler, mock_repository, sample_command):
-        result = await command_handler.handle_create_person(sample_command)
-
-        mock_repository.save.assert_called_once()
-
-        call_args = mock_repository.save.call_args[0][0]
-        person = call_args
-
-        assert isinstance(person, Person)
-        assert person.name == "John Doe"
-        assert person.age == 30
-        assert person.is_pep is False
-        assert person.id is not None  # Should have a generated UUID
-        assert len(person.id) > 0
-
-        assert person.address is not None
-        assert isinstance(person.address, Address)
-        assert person.address.street == "Main Street"
-        assert person.address.number == 123
-        assert person.address.neighbor == "Downtown"
-        assert person.address.city == "Test City"
-        assert person.address.id is not None  # Should have a generated UUID
-
-        assert result == person.id
-
-    @pytest.mark.asyncio
-    async def test_handle_create_person_with_pep(self, command_handler, mock_repository):
-        """Test creating a PEP person"""
-        command = CreatePersonCommand(
-            name="Jane Smith",
-            age=45,
-            street="Business Ave",
-            number=999,
-            neighbor="Financial District",
-            city="Money City",
-            is_pep=True
-        )
-
-        result = await command_handler.handle_create_person(command)
-
-        mock_repository.save.assert_called_once()
-        person = mock_repository.save.call_args[0][0]
-
-        assert person.name == "Jane Smith"
-        assert person.age == 45
-        assert person.is_pep is True
-        assert person.address.city == "Money City"
-
-    @pytest.mark.asyncio
-    async def test_handle_create_person_repository_error(self, command_handler, mock_repository, sample_command):
-
-        mock_repository.save.side_effect = Exception("Database error")
-
-        with pytest.raises(Exception, match="Database error"):
-            await command_handler.handle_create_person(sample_command)
-
-    def test_command_handler_initialization(self, mock_repository):
-        handler = CreatePersonCommandHandler(mock_repository)
-        assert handler.repo == mock_repository
-
-    @pytest.mark.asyncio
-    async def test_person_id_uniqueness(self, command_handler, mock_repository, sample_command):
-        result1 = await command_handler.handle_create_person(sample_command)
-        result2 = await command_handler.handle_create_person(sample_command)
-
-        assert mock_repository.save.call_count == 2
-
-        person1 = mock_repository.save.call_args_list[0][0][0]
-        person2 = mock_repository.save.call_args_list[1][0][0]
-
-        assert person1.id != person2.id
-        assert result1 != result2
-        
\ No newline at end of file
+import pytest
+from uuid import UUID
+from unittest.mock import AsyncMock
+from features.create_person.create_person_command_handler import CreatePersonCommandHandler
+from features.create_person.create_person_command import CreatePersonCommand
+from features.create_person.bulk_create_person_command import BulkCreatePersonCommand
+from features.create_person.idempotent_create_person_command import IdempotentCreatePersonCommand
+from models.person import Person
+from models.address import Address
+from infra.idempotency import IdempotencyKeyConflict, IdempotencyStore
+from infra.person_search import PersonSearchIndex
+from tests.mongo_stand_in import create_collection
+
+
+class TestCreatePersonCommandHandler:
+    @pytest.fixture
+    def mock_repository(self):
+        repo = AsyncMock()
+        repo.save.return_value = "mock-person-id"
+        return repo
+
+    @pytest.fixture
+    def command_handler(self, mock_repository):
+        return CreatePersonCommandHandler(mock_repository)
+
+    @pytest.fixture
+    def sample_command(self):
+        return CreatePersonCommand(
+            name="John Doe",
+            age=30,
+            street="Main Street",
+            number=123,
+            neighbor="Downtown",
+            city="Test City",
+            is_pep=False
+        )
+
+    @pytest.mark.asyncio
+    async def test_handle_create_person(self, command_handler, mock_repository, sample_command):
+        result = await command_handler.handle_create_person(sample_command)
+
+        mock_repository.save.assert_called_once()
+
+        call_args = mock_repository.save.call_args[0][0]
+        person = call_args
+
+        assert isinstance(person, Person)
+        assert person.name == "John Doe"
+        assert person.age == 30
+        assert person.is_pep is False
+        assert person.id is not None  # Should have a generated UUID
+        assert len(person.id) > 0
+
+        assert person.address is not None
+        assert isinstance(person.address, Address)
+        assert person.address.street == "Main Street"
+        assert person.address.number == 123
+        assert person.address.neighbor == "Downtown"
+        assert person.address.city == "Test City"
+        assert person.address.id is not None  # Should have a generated UUID
+
+        assert result == person.id
+
+    @pytest.mark.asyncio
+    async def test_handle_create_person_with_pep(self, command_handler, mock_repository):
+        """Test creating a PEP person"""
+        command = CreatePersonCommand(
+            name="Jane Smith",
+            age=45,
+            street="Business Ave",
+            number=999,
+            neighbor="Financial District",
+            city="Money City",
+            is_pep=True
+        )
+
+        result = await command_handler.handle_create_person(command)
+
+        mock_repository.save.assert_called_once()
+        person = mock_repository.save.call_args[0][0]
+
+        assert person.name == "Jane Smith"
+        assert person.age == 45
+        assert person.is_pep is True
+        assert person.address.city == "Money City"
+
+    @pytest.mark.asyncio
+    async def test_handle_create_person_repository_error(self, command_handler, mock_repository, sample_command):
+
+        mock_repository.save.side_effect = Exception("Database error")
+
+        with pytest.raises(Exception, match="Database error"):
+            await command_handler.handle_create_person(sample_command)
+
+    def test_command_handler_initialization(self, mock_repository):
+        handler = CreatePersonCommandHandler(mock_repository)
+        assert handler.repo == mock_repository
+
+    @pytest.mark.asyncio
+    async def test_ids_are_time_ordered_by_default(self, command_handler, mock_repository, sample_command):
+        await command_handler.handle_create_person(sample_command)
+
+        person = mock_repository.save.call_args[0][0]
+        assert UUID(person.id).version == 7
+        assert UUID(person.address.id).version == 7
+
+    @pytest.mark.asyncio
+    async def test_ids_from_configured_generator(self, mock_repository, sample_command):
+        ids = iter(["person-id", "address-id"])
+        handler = CreatePersonCommandHandler(mock_repository, lambda: next(ids))
+
+        result = await handler.handle_create_person(sample_command)
+
+        person = mock_repository.save.call_args[0][0]
+        assert result == person.id == "person-id"
+        assert person.address.id == "address-id"
+
+    @pytest.mark.asyncio
+    async def test_person_id_uniqueness(self, command_handler, mock_repository, sample_command):
+        result1 = await command_handler.handle_create_person(sample_command)
+        result2 = await command_handler.handle_create_person(sample_command)
+
+        assert mock_repository.save.call_count == 2
+
+        person1 = mock_repository.save.call_args_list[0][0][0]
+        person2 = mock_repository.save.call_args_list[1][0][0]
+
+        assert person1.id != person2.id
+        assert result1 != result2
+
+    @pytest.mark.asyncio
+    async def test_handle_bulk_create_person(self, command_handler, mock_repository):
+        """Test that valid items are saved in one call and invalid ones are reported"""
+        mock_repository.save_many.return_value = [None, None]
+        valid_item = {
+            "name": "John Doe",
+            "age": 30,
+            "street": "Main Street",
+            "number": 123,
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": False
+        }
+        command = BulkCreatePersonCommand(items=[valid_item, {"name": "Missing fields"}, dict(valid_item, age=-5), valid_item])
+
+        results = await command_handler.handle_bulk_create_person(command)
+
+        mock_repository.save_many.assert_called_once()
+        saved = mock_repository.save_many.call_args[0][0]
+        assert len(saved) == 2
+        assert [r.index for r in results] == [0, 1, 2, 3]
+        assert results[0].id == saved[0].id and results[0].error is None
+        assert results[1].id is None and "age" in results[1].error
+        assert results[2].id is None and "age" in results[2].error
+        assert results[3].id == saved[1].id
+
+    @pytest.mark.asyncio
+    async def test_created_persons_are_searchable(self, mock_repository, sample_command):
+        search_index = PersonSearchIndex()
+        handler = CreatePersonCommandHandler(mock_repository, search_index=search_index)
+        mock_repository.save_many.return_value = [None, "E11000 duplicate key error"]
+
+        single = await handler.handle_create_person(sample_command)
+        bulk = await handler.handle_bulk_create_person(BulkCreatePersonCommand(items=[
+            sample_command.model_dump(),
+            sample_command.model_dump()
+        ]))
+
+        assert [id for _, id, _ in search_index.search("jhn doe", 10)] == [single, bulk[0].id]
+
+    @pytest.mark.asyncio
+    async def test_handle_bulk_create_person_write_errors(self, command_handler, mock_repository, sample_command):
+        """Test that per-item write errors replace the generated id"""
+        mock_repository.save_many.return_value = [None, "E11000 duplicate key error"]
+        command = BulkCreatePersonCommand(items=[sample_command.model_dump(), sample_command.model_dump()])
+
+        results = await command_handler.handle_bulk_create_person(command)
+
+        assert results[0].id is not None
+        assert results[1].id is None
+        assert results[1].error == "E11000 duplicate key error"
+
+    @pytest.mark.asyncio
+    async def test_retried_create_with_idempotency_key_saves_once(self, mock_repository, sample_command):
+        store = IdempotencyStore(create_collection(name="handler_idempotency_keys"))
+        handler = CreatePersonCommandHandler(mock_repository, idempotency_store=store)
+        command = IdempotentCreatePersonCommand(**sample_command.model_dump(), idempotency_key="retry-1")
+
+        first = await handler.handle_idempotent_create_person(command)
+        retry = await handler.handle_idempotent_create_person(command)
+
+        assert first == retry
+        mock_repository.save.assert_called_once()
+        assert mock_repository.save.call_args[0][0].id == first
+
+        changed = command.model_copy(update={"age": 31})
+        with pytest.raises(IdempotencyKeyConflict):
+            await handler.handle_idempotent_create_person(changed)
+
+    @pytest.mark.asyncio
+    async def test_idempotency_key_is_ignored_without_store(self, command_handler, mock_repository, sample_command):
+        command = IdempotentCreatePersonCommand(**sample_command.model_dump(), idempotency_key="retry-1")
+
+        first = await command_handler.handle_idempotent_create_person(command)
+        retry = await command_handler.handle_idempotent_create_person(command)
+
+        assert first != retry
+        assert mock_repository.save.call_count == 2
@@ -0,0 +1,18 @@
+import pytest
+from bson import ObjectId
+from infra.cursor import decode_cursor, encode_cursor
+
+
+class TestCursor:
+    def test_round_trip(self):
+        object_id = ObjectId()
+
+        cursor = encode_cursor(object_id)
+
+        assert decode_cursor(cursor) == object_id
+        assert "=" not in cursor
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "!!!!", encode_cursor(ObjectId()) + "AA"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
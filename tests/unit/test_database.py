@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+from infra.database import Database, read_preference
+from infra.metrics import MongoCommandListener, MongoPoolListener
+from pymongo.read_preferences import Nearest, Primary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from settings import DevelopmentSettings, ProductionSettings
+
+
+class TestDatabase:
+    @pytest.fixture
+    def settings(self):
+        return DevelopmentSettings()
+
+    def test_client_uses_pool_settings(self, settings):
+        with patch('infra.database.AsyncIOMotorClient') as mock_client_class:
+            Database(settings)
+
+        mock_client_class.assert_called_once_with(
+            settings.mongo_connection,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            event_listeners=ANY)
+        listeners = mock_client_class.call_args[1]["event_listeners"]
+        assert any(isinstance(listener, MongoCommandListener) for listener in listeners)
+        assert any(isinstance(listener, MongoPoolListener) for listener in listeners)
+
+    def test_collections_use_configured_write_concerns(self, monkeypatch):
+        monkeypatch.setenv("MONGO_WRITE_CONCERN", "1")
+        monkeypatch.setenv("MONGO_BATCHED_WRITE_CONCERN", "majority")
+        settings = ProductionSettings()
+
+        with patch('infra.database.AsyncIOMotorClient') as mock_client_class:
+            collection = mock_client_class.return_value.__getitem__.return_value.__getitem__.return_value
+            collection.with_options.side_effect = lambda write_concern: write_concern
+            database = Database(settings)
+
+        assert database.persons_collection == WriteConcern(w=1)
+        assert database.batched_persons_collection == WriteConcern(w="majority")
+
+    def test_collections_keep_server_default_write_concern(self, settings):
+        with patch('infra.database.AsyncIOMotorClient') as mock_client_class:
+            database = Database(settings)
+
+        collection = mock_client_class.return_value.__getitem__.return_value.__getitem__.return_value
+        collection.with_options.assert_not_called()
+        assert database.persons_collection is collection
+        assert database.batched_persons_collection is collection
+
+    def test_reads_use_configured_read_preferences(self, monkeypatch):
+        monkeypatch.setenv("MONGO_READ_PREFERENCE", "nearest")
+        monkeypatch.setenv("MONGO_READ_PREFERENCE_GET", "primary")
+        monkeypatch.setenv("MONGO_READ_PREFERENCE_LIST", "secondaryPreferred")
+        monkeypatch.setenv("MONGO_MAX_STALENESS_SECONDS_LIST", "120")
+        settings = ProductionSettings()
+
+        with patch('infra.database.AsyncIOMotorClient') as mock_client_class:
+            collection = mock_client_class.return_value.__getitem__.return_value.__getitem__.return_value
+            collection.with_options.side_effect = lambda read_preference: read_preference
+            database = Database(settings)
+
+        assert database.person_read_collections["get"] is collection
+        assert database.person_read_collections["list"] == SecondaryPreferred(max_staleness=120)
+        assert database.person_read_collections["stats"] == Nearest()
+        assert database.person_read_collections["export"] == Nearest()
+        assert database.persons_collection is collection
+
+    def test_read_preference(self):
+        assert read_preference("primary") == Primary()
+        assert read_preference("nearest", 90) == Nearest(max_staleness=90)
+
+        with pytest.raises(ValueError, match="Unknown read preference"):
+            read_preference("secondaryOnly")
+        with pytest.raises(ValueError, match="at least 90"):
+            read_preference("secondary", 30)
+        with pytest.raises(ValueError, match="primary"):
+            read_preference("primary", 120)
+
+    @pytest.mark.asyncio
+    async def test_warm_up_opens_min_pool_size_connections(self, settings):
+        with patch('infra.database.AsyncIOMotorClient') as mock_client_class:
+            mock_client_class.return_value.admin.command = AsyncMock(return_value={"ok": 1})
+            database = Database(settings)
+
+        await database.warm_up()
+
+        assert database.client.admin.command.await_count == settings.mongo_min_pool_size
+
+    @pytest.mark.asyncio
+    async def test_close_connection(self, settings):
+        with patch('infra.database.AsyncIOMotorClient'):
+            database = Database(settings)
+
+        await database.close_connection()
+
+        database.client.close.assert_called_once()
@@ -0,0 +1,34 @@
+from infra.etag import body_etag, etag_matches, page_etag, person_etag, person_version
+from models.person import Person
+from models.person_page import PersonPage
+
+
+class TestETag:
+    def test_person_version_ignores_key_order(self):
+        assert person_version({"id": "a", "age": 1}) == person_version({"age": 1, "id": "a"})
+        assert person_version({"id": "a", "age": 1}) != person_version({"id": "a", "age": 2})
+
+    def test_person_etag_depends_on_version_and_fields(self):
+        person = Person(id="a", name="A", age=1, is_pep=False, version="v1")
+
+        assert person_etag(person) == person_etag(person.model_copy())
+        assert person_etag(person, ["id", "name"]) == person_etag(person, ["name", "id"])
+        assert person_etag(person, ["id"]) != person_etag(person)
+        assert person_etag(person.model_copy(update={"version": "v2"})) != person_etag(person)
+        assert person_etag(Person(id="a", name="A", age=1, is_pep=False)) is None
+
+    def test_page_etag_covers_cursor_and_needs_every_version(self):
+        people = [Person(id=str(i), name="A", age=1, is_pep=False, version=f"v{i}") for i in range(2)]
+
+        assert page_etag(PersonPage(items=people)) != page_etag(PersonPage(items=people, next_cursor="c"))
+        assert page_etag(PersonPage(items=people + [Person(id="x", name="A", age=1, is_pep=False)])) is None
+
+    def test_etag_matches_uses_weak_comparison(self):
+        etag = body_etag(b"[]")
+
+        assert etag.startswith('W/"')
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
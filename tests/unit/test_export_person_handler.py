@@ -0,0 +1,163 @@
+import asyncio
+import csv
+import io
+import pytest
+from unittest.mock import patch
+from features.export_person.export_person_handler import ExportPersonHandler, fcntl
+from features.export_person.export_person_job import ExportPersonJob
+from features.export_person.export_person_query import ExportPersonQuery
+from features.export_person.get_export_person_job_query import GetExportPersonJobQuery
+from features.export_person.resume_export_person_job_command import ResumeExportPersonJobCommand
+from features.export_person.start_export_person_job_command import StartExportPersonJobCommand
+from models.person_columns import PersonColumns
+from models.person_filter import PersonFilter
+
+
+class FakeRepository:
+    """Streams fixed documents in batches; cursors are row offsets"""
+    def __init__(self, count: int = 5, fail_at=None):
+        self.docs = [{"id": f"person-{i}", "name": f"Person {i}", "age": i, "is_pep": i % 2 == 0} for i in range(count)]
+        self.fail_at = fail_at
+        self.calls = []
+        self.release = None
+
+    def stream_all(self, after=None, filters=None, fields=None, batch_size=None, read="list"):
+        assert read == "export"
+        self.calls.append((after, filters, batch_size))
+        return self._batches(int(after or 0), batch_size)
+
+    async def _batches(self, start, batch_size):
+        for offset in range(start, len(self.docs), batch_size):
+            if self.fail_at is not None and offset >= self.fail_at:
+                raise RuntimeError("cursor died")
+            if self.release is not None:
+                await self.release.wait()
+            columns = PersonColumns.from_documents(self.docs[offset:offset + batch_size])
+            columns.next_cursor = str(offset + batch_size)
+            yield columns
+
+
+class TestExportPersonHandler:
+    @pytest.fixture
+    def repo(self):
+        return FakeRepository()
+
+    @pytest.fixture
+    def handler(self, repo, tmp_path):
+        return ExportPersonHandler(repo, str(tmp_path), batch_size=2)
+
+    async def wait_for(self, handler, id):
+        while id in handler.tasks:
+            await asyncio.sleep(0.01)
+        return await handler.handle_get_export_person_job(GetExportPersonJobQuery(id=id))
+
+    def read_csv(self, tmp_path, id):
+        return list(csv.DictReader(io.StringIO((tmp_path / f"{id}.csv").read_text())))
+
+    @pytest.mark.asyncio
+    async def test_export_streams_chunks(self, handler, repo):
+        chunks = [chunk async for chunk in handler.handle_export_person(ExportPersonQuery(format="csv", is_pep=True))]
+
+        assert len(chunks) == 4
+        assert chunks[0].startswith(b"id,name")
+        assert repo.calls == [(None, PersonFilter(is_pep=True), 2)]
+
+    @pytest.mark.asyncio
+    async def test_job_writes_file_and_checkpoints(self, handler, tmp_path):
+        job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="csv"))
+
+        job = await self.wait_for(handler, job.id)
+
+        assert job.status == "completed"
+        assert job.rows == 5
+        assert job.checkpoint == "6"
+        assert job.bytes == (tmp_path / f"{job.id}.csv").stat().st_size
+        assert [row["id"] for row in self.read_csv(tmp_path, job.id)] == [f"person-{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_resume_continues_from_checkpoint(self, handler, repo, tmp_path):
+        repo.fail_at = 4
+        job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="csv"))
+        job = await self.wait_for(handler, job.id)
+        assert job.status == "failed"
+        assert job.error == "cursor died"
+        assert job.checkpoint == "4"
+
+        # Bytes past the checkpoint are from a batch that was never recorded.
+        with open(tmp_path / f"{job.id}.csv", "ab") as file:
+            file.write(b"partial,row")
+        repo.fail_at = None
+        await handler.handle_resume_export_person_job(ResumeExportPersonJobCommand(id=job.id))
+        job = await self.wait_for(handler, job.id)
+
+        assert job.status == "completed"
+        assert repo.calls[-1][0] == "4"
+        assert [row["id"] for row in self.read_csv(tmp_path, job.id)] == [f"person-{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_resume_completed_job(self, handler):
+        job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="ndjson"))
+        await self.wait_for(handler, job.id)
+
+        with pytest.raises(ValueError, match="completed"):
+            await handler.handle_resume_export_person_job(ResumeExportPersonJobCommand(id=job.id))
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+    async def test_resume_refused_while_another_worker_runs_the_job(self, handler, repo, tmp_path):
+        repo.release = asyncio.Event()
+        job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="csv"))
+        other_worker = ExportPersonHandler(FakeRepository(), str(tmp_path), batch_size=2)
+
+        with pytest.raises(ValueError, match="another worker"):
+            await other_worker.handle_resume_export_person_job(ResumeExportPersonJobCommand(id=job.id))
+        assert (await other_worker.handle_get_export_person_job(GetExportPersonJobQuery(id=job.id))).status == "running"
+
+        repo.release.set()
+        assert (await self.wait_for(handler, job.id)).status == "completed"
+        assert other_worker.tasks == {}
+
+    @pytest.mark.asyncio
+    async def test_start_refused_without_the_lock(self, handler, tmp_path):
+        with patch.object(handler, "_lock", return_value=None):
+            with pytest.raises(ValueError, match="another worker"):
+                await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="csv"))
+
+        assert handler.tasks == {}
+        assert list(tmp_path.glob("*.json")) == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+    async def test_job_of_a_dead_worker_can_be_resumed(self, handler, tmp_path):
+        # Recorded as running, but no worker holds its lock.
+        job = ExportPersonJob(id="5f0c1c44-7a49-4a63-9a8e-1f5a3f0b6c2d", query=ExportPersonQuery(format="csv"))
+        await handler._save(job)
+
+        assert (await handler.handle_get_export_person_job(GetExportPersonJobQuery(id=job.id))).status == "interrupted"
+        await handler.handle_resume_export_person_job(ResumeExportPersonJobCommand(id=job.id))
+        job = await self.wait_for(handler, job.id)
+
+        assert job.status == "completed"
+        assert [row["id"] for row in self.read_csv(tmp_path, job.id)] == [f"person-{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_close_interrupts_running_jobs(self, handler, repo):
+        repo.release = asyncio.Event()
+        job = await handler.handle_start_export_person_job(StartExportPersonJobCommand(format="ndjson"))
+        await asyncio.sleep(0.01)
+
+        await handler.close()
+
+        job = await handler.handle_get_export_person_job(GetExportPersonJobQuery(id=job.id))
+        assert job.status == "interrupted"
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, handler):
+        assert await handler.handle_get_export_person_job(GetExportPersonJobQuery(id="5f0c1c44-7a49-4a63-9a8e-1f5a3f0b6c2d")) is None
+        assert await handler.handle_get_export_person_job(GetExportPersonJobQuery(id="../settings")) is None
+        assert await handler.handle_resume_export_person_job(ResumeExportPersonJobCommand(id="../settings")) is None
+
+    @pytest.mark.asyncio
+    async def test_start_rejects_invalid_cursor(self, handler):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            await handler.handle_start_export_person_job(StartExportPersonJobCommand(after="not-a-cursor"))
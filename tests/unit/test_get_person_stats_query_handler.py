@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from features.get_person.get_person_stats_query import GetPersonStatsQuery
+from features.get_person.get_person_stats_query_handler import GetPersonStatsQueryHandler
+from infra.person_repository import PersonRepository
+from models.person_filter import PersonFilter
+from models.person_stats import PersonStats
+
+
+class TestGetPersonStatsQueryHandler:
+    @pytest.fixture
+    def mock_repository(self):
+        repo = MagicMock(spec=PersonRepository)
+        repo.get_stats = AsyncMock(return_value=PersonStats(total=1, pep_count=0, pep_ratio=0.0, age_histogram=[], cities=[]))
+        return repo
+
+    @pytest.mark.asyncio
+    async def test_passes_filters_and_buckets(self, mock_repository):
+        handler = GetPersonStatsQueryHandler(mock_repository)
+
+        await handler.handle_get_person_stats(GetPersonStatsQuery(city="Lisbon", is_pep=True, age_bucket_size=5, top_cities=3))
+        await handler.handle_get_person_stats(GetPersonStatsQuery(city="Lisbon", is_pep=True, age_bucket_size=5, top_cities=3))
+
+        mock_repository.get_stats.assert_called_with(PersonFilter(city="Lisbon", is_pep=True), 5, 3)
+        assert mock_repository.get_stats.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_caches_results_until_ttl(self, mock_repository):
+        now = [0.0]
+        handler = GetPersonStatsQueryHandler(mock_repository, cache_ttl_seconds=30, clock=lambda: now[0])
+
+        first = await handler.handle_get_person_stats(GetPersonStatsQuery())
+        second = await handler.handle_get_person_stats(GetPersonStatsQuery())
+        await handler.handle_get_person_stats(GetPersonStatsQuery(city="Lisbon"))
+        now[0] = 31
+        await handler.handle_get_person_stats(GetPersonStatsQuery())
+
+        assert first is second
+        assert mock_repository.get_stats.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_aggregation(self, mock_repository):
+        released = asyncio.Event()
+        stats = mock_repository.get_stats.return_value
+
+        async def slow_stats(*args):
+            await released.wait()
+            return stats
+
+        mock_repository.get_stats = AsyncMock(side_effect=slow_stats)
+        handler = GetPersonStatsQueryHandler(mock_repository, cache_ttl_seconds=30)
+
+        waiting = [asyncio.create_task(handler.handle_get_person_stats(GetPersonStatsQuery())) for _ in range(5)]
+        await asyncio.sleep(0)
+        released.set()
+
+        assert all(result is stats for result in await asyncio.gather(*waiting))
+        assert mock_repository.get_stats.await_count == 1
+        assert handler.inflight == {}
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from infra.idempotency import IdempotencyKeyConflict, IdempotencyStore, request_fingerprint
+from tests.mongo_stand_in import create_collection
+
+
+class TestIdempotencyStore:
+    @pytest.fixture
+    def collection(self):
+        collection = create_collection(name="idempotency_keys")
+        yield collection
+        collection.collection.drop()
+
+    @pytest.fixture
+    def created(self):
+        return []
+
+    @pytest.fixture
+    def create(self, created):
+        async def create(id):
+            await asyncio.sleep(0.01)
+            created.append(id)
+
+        return create
+
+    def test_request_fingerprint_ignores_key_order(self):
+        assert request_fingerprint({"a": 1, "b": 2}) == request_fingerprint({"b": 2, "a": 1})
+        assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+    @pytest.mark.asyncio
+    async def test_retry_returns_first_id_without_creating_again(self, collection, created, create):
+        store = IdempotencyStore(collection)
+
+        first = await store.create_once("key-1", "body", "id-1", create)
+        retry = await store.create_once("key-1", "body", "id-2", create)
+
+        assert first == retry == "id-1"
+        assert created == ["id-1"]
+        assert (await collection.find_one({"_id": "key-1"}))["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_key_reused_for_another_body_conflicts(self, collection, created, create):
+        store = IdempotencyStore(collection)
+        await store.create_once("key-1", "body", "id-1", create)
+
+        with pytest.raises(IdempotencyKeyConflict):
+            await store.create_once("key-1", "other body", "id-2", create)
+
+        assert created == ["id-1"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_insert(self, collection, created, create):
+        store = IdempotencyStore(collection)
+
+        ids = await asyncio.gather(*(store.create_once("key-1", "body", f"id-{i}", create) for i in range(5)))
+
+        assert ids == ["id-0"] * 5
+        assert created == ["id-0"]
+        assert store.inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_owner_does_not_strand_waiters(self, collection, created, create):
+        store = IdempotencyStore(collection)
+
+        owner = asyncio.create_task(store.create_once("key-1", "body", "id-1", create))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(store.create_once("key-1", "body", "id-2", create))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await asyncio.wait_for(waiter, 1) == "id-1"
+        assert owner.cancelled()
+        assert created == ["id-1"]
+        assert store.inflight == {}
+        assert await store.create_once("key-1", "body", "id-3", create) == "id-1"
+
+    @pytest.mark.asyncio
+    async def test_other_worker_waits_for_the_insert(self, collection, created, create):
+        first_worker = IdempotencyStore(collection, poll_interval_ms=1)
+        second_worker = IdempotencyStore(collection, poll_interval_ms=1)
+
+        ids = await asyncio.gather(
+            first_worker.create_once("key-1", "body", "id-1", create),
+            second_worker.create_once("key-1", "body", "id-2", create))
+
+        assert ids == ["id-1", "id-1"]
+        assert created == ["id-1"]
+
+    @pytest.mark.asyncio
+    async def test_failed_insert_gives_the_key_up(self, collection, created, create):
+        store = IdempotencyStore(collection)
+
+        async def fail(id):
+            raise ConnectionError("no servers")
+
+        with pytest.raises(ConnectionError):
+            await store.create_once("key-1", "body", "id-1", fail)
+
+        assert await collection.find_one({"_id": "key-1"}) is None
+        assert await store.create_once("key-1", "body", "id-2", create) == "id-2"
+        assert created == ["id-2"]
+
+    @pytest.mark.asyncio
+    async def test_waiter_takes_over_after_the_lease(self, collection):
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        store = IdempotencyStore(collection, lease_seconds=30, clock=lambda: now)
+        await collection.insert_one({
+            "_id": "key-1",
+            "fingerprint": "body",
+            "person_id": "id-1",
+            "status": "pending",
+            "created_at": now - timedelta(seconds=31)
+        })
+
+        async def already_written(id):
+            assert id == "id-1"
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+        assert await store.create_once("key-1", "body", "id-2", already_written) == "id-1"
+        assert (await collection.find_one({"_id": "key-1"}))["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_ensure_indexes_expires_keys(self, collection):
+        await IdempotencyStore(collection, ttl_seconds=3600).ensure_indexes()
+
+        index = collection.collection.index_information()["created_at_ttl"]
+        assert index["expireAfterSeconds"] == 3600
@@ -0,0 +1,250 @@
+import pytest
+import pytest_asyncio
+from itertools import combinations
+from uuid import UUID
+from bson import ObjectId
+from unittest.mock import AsyncMock
+from pymongo.errors import DuplicateKeyError
+from models.person import Person
+from models.address import Address
+from models.person_filter import PersonFilter
+from infra.causal import causal_session
+from infra.in_memory_person_repository import InMemoryPersonRepository, ReplicatedPersonRepository
+from infra.person_cache import CachedPersonRepository, PersonCache
+from infra.person_projections import ProjectionConsumer
+from infra.person_repository import PersonRepository
+from tests.mongo_stand_in import create_collection
+
+FILTER_VALUES = {
+    "name": "Person 1",
+    "min_age": 18,
+    "max_age": 65,
+    "city": "City 3",
+    "neighbor": "Neighbor 1",
+    "is_pep": False
+}
+
+def person_id(number: int) -> str:
+    return str(UUID(int=number + 1, version=4))
+
+def documents(count: int = 120) -> list:
+    docs = []
+    for i in range(count):
+        doc = {
+            "_id": ObjectId(f"{i + 1:024x}"),
+            "id": person_id(i),
+            "name": f"Person {i}",
+            "age": i % 90,
+            "address": {
+                "id": person_id(1000 + i),
+                "street": "Main Street",
+                "number": i + 1,
+                "neighbor": f"Neighbor {i % 4}",
+                "city": f"City {i % 7}"
+            },
+            "is_pep": i % 5 == 0,
+            "version": f"v{i}"
+        }
+        # Legacy and odd rows the filters have to treat like MongoDB does.
+        if i % 11 == 0:
+            del doc["address"]
+        if i % 13 == 0:
+            doc["address"] = None
+        if i % 17 == 0:
+            del doc["age"]
+        docs.append(doc)
+
+    return docs
+
+
+class TestInMemoryPersonRepository:
+    @pytest.fixture
+    def memory(self):
+        memory = InMemoryPersonRepository(batch_size=25)
+        memory.load(documents())
+        memory.finish_load()
+        return memory
+
+    @pytest_asyncio.fixture
+    async def mongo(self):
+        collection = create_collection(name="persons_in_memory_parity")
+        await collection.insert_many(documents())
+        yield PersonRepository(collection, batch_size=25)
+        collection.collection.drop()
+
+    @pytest.fixture
+    def sample_person(self):
+        return Person(
+            id=person_id(5000),
+            name="John Doe",
+            age=30,
+            address=Address(id=person_id(6000), street="Main Street", number=1, neighbor="Downtown", city="Test City"),
+            is_pep=False
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filters", [None] + [
+        PersonFilter(**dict(combination))
+        for size in range(1, 3)
+        for combination in combinations(FILTER_VALUES.items(), size)
+    ])
+    async def test_pages_match_mongo(self, memory, mongo, filters):
+        expected, actual = [], []
+        for repository, pages in ((mongo, expected), (memory, actual)):
+            after = None
+            while True:
+                page = await repository.get_all(10, after, filters)
+                pages.append(([person.model_dump() for person in page.items], page.next_cursor))
+                after = page.next_cursor
+                if after is None:
+                    break
+
+        assert actual == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("fields", [["name"], ["id", "address.city"], ["address", "address.city", "is_pep"]])
+    async def test_projections_match_mongo(self, memory, mongo, fields):
+        expected = await mongo.get_all(30, None, None, fields)
+        actual = await memory.get_all(30, None, None, fields)
+
+        assert [(person.model_dump(exclude_unset=True), person.version) for person in actual.items] == \
+            [(person.model_dump(exclude_unset=True), person.version) for person in expected.items]
+
+    @pytest.mark.asyncio
+    async def test_stream_matches_mongo(self, memory, mongo):
+        filters = PersonFilter(min_age=10, max_age=40)
+        expected = [batch async for batch in mongo.stream_all(None, filters, ["name"])]
+        actual = [batch async for batch in memory.stream_all(None, filters, ["name"])]
+
+        assert [(batch.names, batch.next_cursor) for batch in actual] == [(batch.names, batch.next_cursor) for batch in expected]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filters", [None, PersonFilter(city="City 2"), PersonFilter(min_age=30, is_pep=True)])
+    async def test_stats_match_mongo(self, memory, mongo, filters):
+        assert await memory.get_stats(filters, 10, 3) == await mongo.get_stats(filters, 10, 3)
+
+    @pytest.mark.asyncio
+    async def test_get_by_id(self, memory, mongo):
+        for id in (person_id(3), person_id(999), "not-a-uuid"):
+            assert await memory.get_by_id(id) == await mongo.get_by_id(id)
+        assert (await memory.get_by_id(person_id(3), ["name"])).model_dump(exclude_unset=True) == {"name": "Person 3"}
+
+    @pytest.mark.asyncio
+    async def test_save_keeps_indexes_up_to_date(self, memory, sample_person):
+        saved = await memory.save(sample_person)
+
+        assert ObjectId(saved) in memory.documents
+        assert await memory.get_by_id(sample_person.id) == (await memory.get_all(1, None, PersonFilter(city="Test City"))).items[0]
+        assert (await memory.get_all(10, None, PersonFilter(name="John", max_age=30))).items[0].id == sample_person.id
+
+    @pytest.mark.asyncio
+    async def test_duplicate_ids_are_rejected(self, memory, sample_person):
+        await memory.save(sample_person)
+
+        with pytest.raises(DuplicateKeyError):
+            await memory.save(sample_person)
+        errors = await memory.save_many([sample_person, sample_person.model_copy(update={"id": person_id(7000)})])
+
+        assert "E11000" in errors[0] and errors[1] is None
+        assert len(memory) == 122
+
+    def test_plan_uses_the_smallest_index(self, memory):
+        keys, ordered = memory._plan(PersonFilter(city="City 3", name="Person 11"), None)
+
+        assert not ordered
+        assert len(list(keys)) == 11
+
+    @pytest.mark.asyncio
+    async def test_upsert_and_delete(self, memory):
+        doc = {**documents()[3], "name": "Renamed", "address": {"city": "Elsewhere"}}
+        memory.upsert(doc)
+
+        assert (await memory.get_by_id(person_id(3))).name == "Renamed"
+        assert (await memory.get_all(10, None, PersonFilter(city="City 3"))).items[0].id != person_id(3)
+        assert (await memory.get_all(10, None, PersonFilter(name="Person 3"))).items[0].id != person_id(3)
+
+        memory.delete(doc["_id"])
+
+        assert await memory.get_by_id(person_id(3)) is None
+        assert (await memory.get_all(10, None, PersonFilter(city="Elsewhere"))).items == []
+        assert len(memory) == 119
+
+    @pytest.mark.asyncio
+    async def test_consumer_loads_a_replica(self):
+        collection = create_collection(name="persons_replica")
+        await collection.insert_many(documents(30))
+        replica = InMemoryPersonRepository()
+        consumer = ProjectionConsumer(collection, replica, source="polling", fields=None)
+
+        await consumer.load()
+        await collection.insert_one({**documents(31)[30]})
+        await consumer.load(consumer.last_id)
+
+        assert len(replica) == 31
+        assert (await replica.get_by_id(person_id(30))).address.city == "City 2"
+        collection.collection.drop()
+
+
+class TestReplicatedPersonRepository:
+    @pytest.fixture
+    def primary(self):
+        primary = AsyncMock()
+        primary.get_by_id.return_value = None
+        return primary
+
+    @pytest.fixture
+    def replica(self):
+        replica = InMemoryPersonRepository()
+        replica.load(documents(10))
+        replica.finish_load()
+        return replica
+
+    @pytest.mark.asyncio
+    async def test_reads_wait_for_the_replica(self, primary, replica):
+        repository = ReplicatedPersonRepository(primary, replica)
+
+        assert await repository.get_by_id(person_id(1)) is None
+        replica.ready = True
+
+        assert (await repository.get_by_id(person_id(1))).name == "Person 1"
+        primary.get_by_id.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_created_persons_are_read_back_right_away(self, replica):
+        collection = create_collection(name="persons_replicated")
+        replica.ready = True
+        cache = PersonCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=60)
+        repository = CachedPersonRepository(ReplicatedPersonRepository(PersonRepository(collection), replica), cache)
+        single, bulk = (Person(
+            id=person_id(5000 + i),
+            name=f"New Person {i}",
+            age=30,
+            address=Address(id=person_id(6000 + i), street="Main Street", number=1, neighbor="Downtown", city="Test City"),
+            is_pep=False) for i in range(2))
+
+        saved = await repository.save(single)
+        await repository.save_many([bulk])
+
+        # Found on the replica, and on the primary before the consumer
+        # brings it in; neither is cached as missing.
+        assert (await repository.get_by_id(single.id)).name == "New Person 0"
+        assert replica.documents[ObjectId(saved)]["id"] == single.id
+        assert (await repository.get_by_id(bulk.id)).name == "New Person 1"
+        assert await repository.get_by_id(person_id(9999)) is None
+        collection.collection.drop()
+
+    @pytest.mark.asyncio
+    async def test_writes_and_causal_reads_go_to_the_primary(self, primary, replica):
+        replica.ready = True
+        repository = ReplicatedPersonRepository(primary, replica)
+
+        await repository.save_many([])
+        session = AsyncMock(has_ended=False)
+        reset = causal_session.set(session)
+        try:
+            await repository.get_all(10)
+        finally:
+            causal_session.reset(reset)
+
+        primary.save_many.assert_awaited_once_with([])
+        primary.get_all.assert_awaited_once_with(10, None, None, None)
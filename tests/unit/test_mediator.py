@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from features.mediator import Mediator, build_mediator
+from features.create_person.create_person_command import CreatePersonCommand
+from features.get_person.get_all_person_query import GetAllPersonQuery
+from features.get_person.get_person_query import GetPersonQuery
+from features.get_person.stream_all_person_query import StreamAllPersonQuery
+from infra.person_repository import PersonRepository
+from models.person_page import PersonPage
+
+
+class TestMediator:
+    @pytest.fixture
+    def mock_repository(self):
+        repo = MagicMock(spec=PersonRepository)
+        repo.save = AsyncMock(return_value="507f1f77bcf86cd799439011")
+        repo.get_by_id = AsyncMock(return_value=None)
+        repo.get_all = AsyncMock(return_value=PersonPage(items=[]))
+        return repo
+
+    def test_send_dispatches_by_message_type(self):
+        mediator = Mediator()
+        mediator.register(GetPersonQuery, lambda query: f"person {query.id}")
+
+        assert mediator.send(GetPersonQuery(id="123")) == "person 123"
+
+    def test_send_without_handler(self):
+        with pytest.raises(LookupError, match="GetPersonQuery"):
+            Mediator().send(GetPersonQuery(id="123"))
+
+    def test_stream_query_does_not_use_get_all_handler(self):
+        mediator = Mediator()
+        mediator.register(GetAllPersonQuery, lambda query: "page")
+
+        with pytest.raises(LookupError, match="StreamAllPersonQuery"):
+            mediator.send(StreamAllPersonQuery())
+
+    @pytest.mark.asyncio
+    async def test_build_mediator_registers_handlers(self, mock_repository):
+        mediator = build_mediator(mock_repository)
+        cmd = CreatePersonCommand(name="John Doe", age=30, street="Main St", number=1, neighbor="Downtown", city="Test City", is_pep=False)
+
+        id = await mediator.send(cmd)
+        page = await mediator.send(GetAllPersonQuery(limit=10))
+        mediator.send(StreamAllPersonQuery(limit=10))
+
+        assert mock_repository.save.call_args[0][0].id == id
+        assert page.items == []
+        assert mock_repository.get_all.call_args[0][0] == 10
+        mock_repository.stream_all.assert_called_once()
@@ -0,0 +1,86 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from infra.metrics import (
+    HTTP_REQUEST_DURATION, MONGO_COMMAND_DURATION, MONGO_POOL_CHECKOUT_WAIT, MONGO_POOL_IN_USE,
+    Counter, Gauge, Histogram, MetricsMiddleware, MetricsRegistry, MongoCommandListener, MongoPoolListener,
+    person_cache_metrics)
+
+
+class TestMetrics:
+    def test_histogram_samples(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+        histogram.observe("/a", value=0.05)
+        histogram.observe("/a", value=0.1)
+        histogram.observe("/a", value=5)
+
+        assert list(histogram.samples()) == [
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1.0"} 2',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+            'latency_seconds_sum{route="/a"} 5.15',
+            'latency_seconds_count{route="/a"} 3'
+        ]
+
+    def test_counter_and_gauge(self):
+        counter = Counter("errors_total", "Errors", ("reason",))
+        gauge = Gauge("in_use", "In use")
+
+        counter.inc('say "hi"')
+        counter.inc('say "hi"')
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        assert list(counter.samples()) == ['errors_total{reason="say \\"hi\\""} 2']
+        assert list(gauge.samples()) == ["in_use 1"]
+
+    def test_registry_render(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc()
+
+        rendered = registry.render(person_cache_metrics({"hits": 3, "misses": 1, "evictions": 0, "size": 1}))
+
+        assert "# TYPE requests_total counter\nrequests_total 1\n" in rendered
+        assert "person_cache_hits_total 3\n" in rendered
+        assert "# TYPE person_cache_entries gauge\nperson_cache_entries 1\n" in rendered
+
+    def test_middleware_records_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/things/{id}")
+        def read_thing(id: str):
+            return {"id": id}
+
+        with TestClient(app) as client:
+            client.get("/things/1")
+            client.get("/things/2")
+            client.get("/nowhere")
+
+        series = HTTP_REQUEST_DURATION.values
+        assert sum(series[("GET", "/things/{id}", "200")][0]) == 2
+        assert ("GET", "unmatched", "404") in series
+
+    def test_command_listener(self):
+        listener = MongoCommandListener()
+
+        listener.succeeded(SimpleNamespace(command_name="find_test", duration_micros=2000))
+        listener.failed(SimpleNamespace(command_name="find_test", duration_micros=1000))
+
+        assert MONGO_COMMAND_DURATION.values[("find_test", "success")][1] == pytest.approx(0.002)
+        assert MONGO_COMMAND_DURATION.values[("find_test", "failure")][1] == pytest.approx(0.001)
+
+    def test_pool_listener(self):
+        listener = MongoPoolListener()
+        in_use = MONGO_POOL_IN_USE.values.get((), 0)
+        waits = sum(MONGO_POOL_CHECKOUT_WAIT.values.get((), [[0]])[0])
+
+        listener.connection_checked_out(SimpleNamespace(duration=0.003))
+        listener.connection_checked_out(SimpleNamespace(duration=0.001))
+        listener.connection_checked_in(SimpleNamespace())
+
+        assert MONGO_POOL_IN_USE.values[()] == in_use + 1
+        assert sum(MONGO_POOL_CHECKOUT_WAIT.values[()][0]) == waits + 2
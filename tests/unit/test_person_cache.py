@@ -0,0 +1,265 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from models.person import Person
+from infra.causal import causal_session
+from infra.person_cache import CachedPersonRepository, InMemoryCacheBackend, LRUCache, PersonCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1, 60)
+        cache.set("b", 2, 60)
+        cache.get("a")
+        cache.set("c", 3, 60)
+
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get("b") is None
+        assert cache.evictions == 1
+
+    def test_expires_entries(self):
+        clock = FakeClock()
+        cache = LRUCache(max_size=2, clock=clock)
+        cache.set("a", 1, 10)
+
+        clock.now = 10
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestPersonCache:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock):
+        return PersonCache(max_size=2, ttl_seconds=60, negative_ttl_seconds=5, clock=clock)
+
+    @pytest.fixture
+    def sample_person(self):
+        return Person(id="person-123", name="John Doe", age=30, is_pep=False)
+
+    @pytest.mark.asyncio
+    async def test_read_through(self, cache, sample_person):
+        loader = AsyncMock(return_value=sample_person)
+
+        first = await cache.get_or_load("person-123", loader)
+        second = await cache.get_or_load("person-123", loader)
+
+        loader.assert_awaited_once_with("person-123")
+        assert first == second == sample_person
+        assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_reloads(self, cache, clock, sample_person):
+        loader = AsyncMock(return_value=sample_person)
+
+        await cache.get_or_load("person-123", loader)
+        clock.now = 60
+        await cache.get_or_load("person-123", loader)
+
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_negative_results_are_cached_briefly(self, cache, clock):
+        loader = AsyncMock(return_value=None)
+
+        assert await cache.get_or_load("missing", loader) is None
+        assert await cache.get_or_load("missing", loader) is None
+        assert loader.await_count == 1
+
+        clock.now = 5
+        await cache.get_or_load("missing", loader)
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self, cache, sample_person):
+        release = asyncio.Event()
+
+        async def slow_loader(id):
+            await release.wait()
+            return sample_person
+
+        loader = AsyncMock(side_effect=slow_loader)
+        waiters = [asyncio.create_task(cache.get_or_load("person-123", loader)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        loader.assert_awaited_once()
+        assert all(result == sample_person for result in results)
+
+    @pytest.mark.asyncio
+    async def test_loader_error_is_shared_and_not_cached(self, cache, sample_person):
+        release = asyncio.Event()
+
+        async def failing_loader(id):
+            await release.wait()
+            raise RuntimeError("Database error")
+
+        loader = AsyncMock(side_effect=failing_loader)
+        waiters = [asyncio.create_task(cache.get_or_load("person-123", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await cache.get_or_load("person-123", AsyncMock(return_value=sample_person)) == sample_person
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_strand_waiters(self, cache, sample_person):
+        release = asyncio.Event()
+
+        async def slow_loader(id):
+            await release.wait()
+            return sample_person
+
+        owner = asyncio.create_task(cache.get_or_load("person-123", slow_loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("person-123", slow_loader))
+        await asyncio.sleep(0)
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.wait_for(waiter, 1) == sample_person
+        assert owner.cancelled()
+        assert cache.inflight == {}
+        assert await cache.get_or_load("person-123", AsyncMock()) == sample_person
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_load_is_not_overwritten(self, cache, sample_person):
+        release = asyncio.Event()
+
+        async def slow_loader(id):
+            await release.wait()
+            return None
+
+        loading = asyncio.create_task(cache.get_or_load("person-123", slow_loader))
+        await asyncio.sleep(0)
+        await cache.invalidate("person-123")
+        release.set()
+        await loading
+
+        loader = AsyncMock(return_value=sample_person)
+        assert await cache.get_or_load("person-123", loader) == sample_person
+        loader.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_eviction_counter(self, cache, sample_person):
+        loader = AsyncMock(return_value=sample_person)
+
+        for id in ("a", "b", "c"):
+            await cache.get_or_load(id, loader)
+
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_backend(self, clock, sample_person):
+        backend = InMemoryCacheBackend(clock)
+        first_worker = PersonCache(max_size=2, ttl_seconds=60, negative_ttl_seconds=5, backend=backend, clock=clock)
+        second_worker = PersonCache(max_size=2, ttl_seconds=60, negative_ttl_seconds=5, backend=backend, clock=clock)
+
+        await first_worker.get_or_load("person-123", AsyncMock(return_value=sample_person))
+        loader = AsyncMock()
+        result = await second_worker.get_or_load("person-123", loader)
+
+        loader.assert_not_awaited()
+        assert result == sample_person
+
+        await second_worker.invalidate("person-123")
+        assert await backend.get("person:person-123") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_backend_keeps_the_version(self, clock, sample_person):
+        backend = InMemoryCacheBackend(clock)
+        first_worker = PersonCache(max_size=2, ttl_seconds=60, negative_ttl_seconds=5, backend=backend, clock=clock)
+        second_worker = PersonCache(max_size=2, ttl_seconds=60, negative_ttl_seconds=5, backend=backend, clock=clock)
+        versioned = sample_person.model_copy(update={"version": "v1"})
+
+        await first_worker.get_or_load("person-123", AsyncMock(return_value=versioned))
+        result = await second_worker.get_or_load("person-123", AsyncMock())
+
+        assert result.version == "v1"
+        assert "version" not in result.model_dump()
+
+
+class TestCachedPersonRepository:
+    @pytest.fixture
+    def repository(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def cache(self):
+        return PersonCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=5)
+
+    @pytest.mark.asyncio
+    async def test_save_invalidates_negative_entry(self, repository, cache):
+        person = Person(id="person-123", name="John Doe", age=30, is_pep=False)
+        cached = CachedPersonRepository(repository, cache)
+        repository.get_by_id.return_value = None
+
+        assert await cached.get_by_id("person-123") is None
+        await cached.save(person)
+        repository.get_by_id.return_value = person
+
+        assert await cached.get_by_id("person-123") == person
+        assert repository.get_by_id.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_causal_reads_bypass_cache(self, repository, cache):
+        cached = CachedPersonRepository(repository, cache)
+        repository.get_by_id.return_value = None
+        await cached.get_by_id("person-123")
+
+        reset = causal_session.set(MagicMock(has_ended=False))
+        try:
+            await cached.get_by_id("person-123")
+        finally:
+            causal_session.reset(reset)
+
+        assert repository.get_by_id.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_save_many_invalidates_every_item(self, repository, cache):
+        people = [Person(id=f"person-{i}", name="John Doe", age=30, is_pep=False) for i in range(2)]
+        cached = CachedPersonRepository(repository, cache)
+        repository.get_by_id.return_value = None
+        repository.save_many.return_value = [None, None]
+
+        for person in people:
+            await cached.get_by_id(person.id)
+        assert await cached.save_many(people) == [None, None]
+
+        assert cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_projected_reads_bypass_the_cache(self, repository, cache):
+        cached = CachedPersonRepository(repository, cache)
+
+        await cached.get_by_id("person-123", ["name"])
+        await cached.get_by_id("person-123", ["name"])
+
+        assert repository.get_by_id.await_count == 2
+        assert cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_other_calls_are_delegated(self, repository, cache):
+        cached = CachedPersonRepository(repository, cache)
+
+        await cached.get_all(10)
+
+        repository.get_all.assert_awaited_once_with(10, None, None, None)
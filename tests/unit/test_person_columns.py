@@ -0,0 +1,58 @@
+from uuid import UUID
+from bson.binary import Binary
+from models.person_columns import MISSING, PersonColumns, UUIDColumn, format_uuid, pack_uuid
+
+
+class TestPersonColumns:
+    def test_pack_uuid_round_trip(self):
+        value = "9b2f8a3e-5d4c-4f6a-8e1b-0123456789ab"
+
+        packed = pack_uuid(value)
+
+        assert len(packed) == 16
+        assert format_uuid(packed) == value
+
+    def test_pack_uuid_accepts_binary_uuids(self):
+        value = "9b2f8a3e-5d4c-4f6a-8e1b-0123456789ab"
+
+        assert format_uuid(pack_uuid(Binary.from_uuid(UUID(value)))) == value
+        assert pack_uuid(Binary(bytes(16), 0)) is None
+
+    def test_pack_uuid_rejects_non_canonical_text(self):
+        assert pack_uuid("9B2F8A3E-5D4C-4F6A-8E1B-0123456789AB") is None
+        assert pack_uuid("person-123") is None
+        assert pack_uuid(None) is None
+
+    def test_uuid_column_keeps_other_values_as_is(self):
+        column = UUIDColumn()
+        column.append("9b2f8a3e-5d4c-4f6a-8e1b-0123456789ab")
+        column.append("legacy-id")
+        column.append(MISSING)
+
+        assert len(column) == 3
+        assert len(column.packed) == 48
+        assert [column[row] for row in range(3)] == ["9b2f8a3e-5d4c-4f6a-8e1b-0123456789ab", "legacy-id", MISSING]
+
+    def test_repeated_strings_are_shared(self):
+        docs = [
+            {"name": f"Person {i}", "address": {"street": "".join(["Main", " Street"]), "neighbor": "".join(["Down", "town"]), "city": "".join(["Test", " City"])}}
+            for i in range(2)
+        ]
+        assert docs[0]["address"]["city"] is not docs[1]["address"]["city"]
+
+        columns = PersonColumns.from_documents(docs)
+
+        assert columns.cities[0] is columns.cities[1]
+        assert columns.neighbors[0] is columns.neighbors[1]
+        assert columns.streets[0] is columns.streets[1]
+
+    def test_missing_fields(self):
+        columns = PersonColumns.from_documents([{"name": "John Doe"}])
+
+        assert len(columns) == 1
+        assert columns.ids[0] is MISSING
+        assert columns.ages[0] == -1
+        assert columns.cities[0] is MISSING
+
+    def test_instances_have_no_dict(self):
+        assert not hasattr(PersonColumns(), "__dict__")
@@ -0,0 +1,45 @@
+import pytest
+from bson import ObjectId
+from models.person import Person
+from models.address import Address
+from infra.person_documents import build_projection, is_person_id, to_document, to_person
+
+
+class TestPersonDocuments:
+    def test_projection_collapses_nested_fields(self):
+        """Test that an address subfield is dropped when the whole address is requested"""
+        assert build_projection(["address.city", "address"]) == {"_id": 0, "address": 1, "version": 1}
+
+    @pytest.mark.parametrize("fields", [["password"], ["address.owner"], ["name.first"]])
+    def test_projection_rejects_unknown_fields(self, fields):
+        """Test that unknown fields raise ValueError"""
+        with pytest.raises(ValueError, match="Unknown field"):
+            build_projection(fields)
+
+    def test_stored_documents_are_not_revalidated(self):
+        """Test that reads trust documents validated on write"""
+        person = to_person({"_id": ObjectId(), "id": "person-1", "name": "", "age": 30, "is_pep": False})
+
+        assert isinstance(person, Person)
+        assert person.name == ""
+        assert person.address is None
+
+    def test_round_trip(self):
+        """Test that a stored person reads back equal, version included"""
+        person = Person(
+            id="018bcfe5-6800-7000-8000-0123456789ab",
+            name="John Doe",
+            age=30,
+            address=Address(id="018bcfe5-6800-7001-8000-0123456789ab", street="Main Street", number=1, neighbor="Downtown", city="Lisbon"),
+            is_pep=False)
+
+        for storage in ("string", "binary"):
+            document = to_document(person, storage)
+            read = to_person(document)
+
+            assert read.model_dump() == person.model_dump()
+            assert read.version == document["version"]
+
+    def test_is_person_id(self):
+        assert is_person_id("018bcfe5-6800-7000-8000-0123456789ab")
+        assert not is_person_id("../settings")
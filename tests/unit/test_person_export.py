@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import pytest
+from models.person_columns import PersonColumns
+from infra.person_export import create_export_writer, export_file_name
+
+DOCS = [
+    {
+        "id": "9b2f8a3e-5d4c-4f6a-8e1b-000000000001",
+        "name": "John, \"Johnny\" Doe",
+        "age": 30,
+        "address": {"id": "1c2d3e4f-5a6b-4c7d-8e9f-000000000001", "street": "Main Street", "number": 123, "neighbor": "Downtown", "city": "Test City"},
+        "is_pep": True
+    },
+    {"id": "9b2f8a3e-5d4c-4f6a-8e1b-000000000002", "name": "Jane Smith", "age": 25, "address": None, "is_pep": False}
+]
+
+
+class TestPersonExport:
+    def export(self, format: str) -> bytes:
+        writer = create_export_writer(format)
+        return writer.header() + writer.write(PersonColumns.from_documents(DOCS[:1])) + writer.write(PersonColumns.from_documents(DOCS[1:])) + writer.close()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("csv").decode())))
+
+        assert rows[0] == {
+            "id": DOCS[0]["id"],
+            "name": "John, \"Johnny\" Doe",
+            "age": "30",
+            "address_id": DOCS[0]["address"]["id"],
+            "street": "Main Street",
+            "number": "123",
+            "neighbor": "Downtown",
+            "city": "Test City",
+            "is_pep": "true"
+        }
+        assert rows[1]["city"] == "" and rows[1]["is_pep"] == "false"
+
+    def test_ndjson(self):
+        assert [json.loads(line) for line in self.export("ndjson").decode().splitlines()] == DOCS
+
+    def test_parquet(self):
+        parquet = pytest.importorskip("pyarrow.parquet")
+
+        data = self.export("parquet")
+        table = parquet.read_table(io.BytesIO(data))
+
+        assert table.num_rows == 2
+        assert parquet.ParquetFile(io.BytesIO(data)).num_row_groups == 2
+        assert table.column("city").to_pylist() == ["Test City", None]
+        assert table.column("is_pep").to_pylist() == [True, False]
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown export format"):
+            create_export_writer("xlsx")
+
+    def test_export_file_name(self):
+        assert export_file_name("job-1", "parquet") == "job-1.parquet"
@@ -0,0 +1,63 @@
+import pytest
+from uuid import UUID
+from bson.binary import Binary, UUID_SUBTYPE
+from infra.person_ids import ULIDGenerator, UUID7Generator, id_generator, public_id, stored_id
+
+
+class FrozenClock:
+    def __init__(self, ms: int):
+        self.ns = ms * 1_000_000
+
+    def __call__(self) -> int:
+        return self.ns
+
+
+class TestPersonIds:
+    def test_uuid7_layout(self):
+        clock = FrozenClock(1_700_000_000_123)
+
+        value = UUID(UUID7Generator(clock)())
+
+        assert value.version == 7
+        assert value.variant == "specified in RFC 4122"
+        assert value.int >> 80 == 1_700_000_000_123
+
+    @pytest.mark.parametrize("generator", [UUID7Generator, ULIDGenerator])
+    def test_ids_are_ordered_within_and_across_milliseconds(self, generator):
+        clock = FrozenClock(1_700_000_000_000)
+        new_id = generator(clock)
+
+        ids = [new_id() for _ in range(5000)]
+        clock.ns += 1_000_000
+        ids += [new_id() for _ in range(10)]
+
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_uuid7_counter_overflow_borrows_the_next_millisecond(self):
+        clock = FrozenClock(1_700_000_000_000)
+        new_id = UUID7Generator(clock)
+
+        ids = [UUID(new_id()) for _ in range(4097)]
+
+        assert ids[-1].int >> 80 == 1_700_000_000_001
+        assert all(value.version == 7 for value in ids)
+
+    def test_id_generator_by_name(self):
+        assert UUID(id_generator("uuid4")()).version == 4
+        assert UUID(id_generator("uuid7")()).version == 7
+        assert len(id_generator("ulid")()) == 36
+        with pytest.raises(ValueError):
+            id_generator("snowflake")
+
+    def test_stored_id_round_trip(self):
+        value = "018bcfe5-6800-7000-8000-0123456789ab"
+
+        binary = stored_id(value, "binary")
+
+        assert isinstance(binary, Binary)
+        assert binary.subtype == UUID_SUBTYPE
+        assert len(binary) == 16
+        assert public_id(binary) == value
+        assert stored_id(value, "string") == value
+        assert public_id(value) == value
@@ -0,0 +1,69 @@
+import json
+import warnings
+from models.person import Person
+from models.address import Address
+from models.person_columns import PersonColumns
+from infra.person_json import render_columns, render_people, render_person
+from infra.person_documents import to_person
+
+DOCS = [
+    {
+        "id": "9b2f8a3e-5d4c-4f6a-8e1b-000000000001",
+        "name": 'Jos\u00e9 "Zé" \\ Silva\n',
+        "age": 30,
+        "address": {"id": "1c2d3e4f-5a6b-4c7d-8e9f-000000000001", "street": "Main Street", "number": 123, "neighbor": "Downtown", "city": "São Paulo"},
+        "is_pep": False
+    },
+    {"id": "legacy-id", "name": "Jane Smith", "age": 0, "address": None, "is_pep": True},
+    {"id": "9b2f8a3e-5d4c-4f6a-8e1b-000000000003", "name": "No Address", "age": 150, "is_pep": False}
+]
+
+
+class TestPersonJson:
+    def test_render_person(self):
+        person = Person(
+            id="person-123",
+            name="John Doe",
+            age=30,
+            address=Address(id="addr-123", street="Main Street", number=123, neighbor="Downtown", city="Test City"),
+            is_pep=False
+        )
+
+        assert json.loads(render_person(person)) == person.model_dump()
+
+    def test_render_people_from_trusted_models(self):
+        people = [
+            Person.model_construct(
+                id=f"person-{i}",
+                name="John Doe",
+                age=30,
+                address=Address.model_construct(id="addr-1", street="Main Street", number=1, neighbor="Downtown", city="Test City"),
+                is_pep=False)
+            for i in range(2)
+        ]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            data = json.loads(render_people(people))
+
+        assert [p["id"] for p in data] == ["person-0", "person-1"]
+        assert data[0]["address"]["city"] == "Test City"
+
+    def test_render_people_partial(self):
+        people = [Person.model_construct(id="person-1", name="John Doe")]
+
+        assert json.loads(render_people(people, partial=True)) == [{"id": "person-1", "name": "John Doe"}]
+
+    def test_render_empty_list(self):
+        assert render_people([]) == b"[]"
+
+    def test_render_columns_matches_models(self):
+        assert render_columns(PersonColumns.from_documents(DOCS)) == render_people([to_person(doc) for doc in DOCS])
+
+    def test_render_columns_partial_matches_models(self):
+        docs = [{"name": "John Doe", "address": {"city": "Test City"}}, {"id": "person-2", "is_pep": True}]
+
+        assert render_columns(PersonColumns.from_documents(docs), partial=True) == render_people([to_person(doc) for doc in docs], partial=True)
+
+    def test_render_empty_columns(self):
+        assert render_columns(PersonColumns()) == b"[]"
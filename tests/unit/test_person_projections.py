@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from uuid import UUID
+from unittest.mock import MagicMock
+from bson import ObjectId
+from bson.binary import Binary
+from bson.timestamp import Timestamp
+from pymongo.errors import OperationFailure
+from infra.metrics import PERSON_PROJECTION_LAG
+from infra.person_projections import SEARCH_FIELDS, PersonProjections, PersonSearchProjection, ProjectionConsumer
+from tests.mongo_stand_in import create_collection
+
+
+def person_doc(name: str, city: str = "Test City", is_pep: bool = False, _id=None) -> dict:
+    return {
+        "_id": _id or ObjectId(),
+        "id": f"id-{name}",
+        "name": name,
+        "age": 30,
+        "address": {"id": "addr", "street": "Main Street", "number": 1, "neighbor": "Downtown", "city": city},
+        "is_pep": is_pep
+    }
+
+
+class TestPersonProjections:
+    def test_upsert_updates_every_projection(self):
+        projections = PersonProjections()
+        john = person_doc("John", "Lisbon", is_pep=True)
+        projections.upsert(john)
+        projections.upsert(person_doc("Joana", "Lisbon"))
+        projections.upsert(person_doc("Mary", "Porto"))
+
+        assert projections.count_by_city() == {"Lisbon": 2, "Porto": 1}
+        assert projections.count_by_city("Faro") == {"Faro": 0}
+        assert [person.name for person in projections.pep_persons(10)] == ["John"]
+        assert [person.name for person in projections.find_by_name_prefix("jo", 10)] == ["Joana", "John"]
+        assert [person.name for person in projections.find_by_name_prefix("jo", 1)] == ["Joana"]
+
+    def test_upsert_replaces_and_delete_removes(self):
+        projections = PersonProjections()
+        john = person_doc("John", "Lisbon", is_pep=True)
+        projections.upsert(john)
+        projections.upsert(john)
+        projections.upsert({**john, "name": "Jack", "address": {**john["address"], "city": "Porto"}, "is_pep": False})
+
+        assert projections.count_by_city() == {"Porto": 1}
+        assert projections.pep_persons(10) == []
+        assert [person.name for person in projections.find_by_name_prefix("J", 10)] == ["Jack"]
+
+        projections.delete(john["_id"])
+        projections.delete(john["_id"])
+
+        assert projections.count_by_city() == {}
+        assert projections.find_by_name_prefix("J", 10) == []
+
+    def test_search_follows_upserts_and_deletes(self):
+        projections = PersonProjections()
+        john = person_doc("John Smith")
+        projections.upsert(john)
+        projections.upsert(person_doc("Jane Smith"))
+        projections.upsert({**john, "name": "Johnny Smith"})
+        projections.delete(person_doc("x", _id=ObjectId())["_id"])
+
+        assert [hit.name for hit in projections.search_names("smith", 10)] == ["Jane Smith", "Johnny Smith"]
+        assert projections.search_names("jhon", 10) == []
+        assert [hit.id for hit in projections.search_names("jonny", 10)] == [john["id"]]
+
+        projections.delete(john["_id"])
+        projections.clear()
+        assert projections.search_names("smith", 10) == []
+
+    @pytest.mark.asyncio
+    async def test_search_projection_loads_only_names(self):
+        collection = create_collection(name="persons_search_projection")
+        john, jane = person_doc("John Smith"), person_doc("Jane Smith")
+        collection.collection.insert_many([john, jane, {"_id": ObjectId(), "id": "id-nameless"}])
+        search = PersonSearchProjection()
+        consumer = ProjectionConsumer(collection, search, source="polling", fields=SEARCH_FIELDS)
+
+        await consumer.load()
+        consumer.apply_change({"operationType": "update", "fullDocument": {**john, "name": "Johnny Smith"}, "documentKey": {"_id": john["_id"]}})
+        consumer.apply_change({"operationType": "delete", "documentKey": {"_id": jane["_id"]}})
+        collection.collection.drop()
+
+        assert [name for _, _, name in search.search.search("smith", 10)] == ["Johnny Smith"]
+        assert set(search.entries) == {john["_id"]}
+
+        search.clear()
+        assert search.search.search("smith", 10) == []
+
+    def test_binary_ids_are_summarised_as_strings(self):
+        projections = PersonProjections()
+        person_id = "018bcfe5-6800-7000-8000-0123456789ab"
+        projections.upsert({**person_doc("John", is_pep=True), "id": Binary.from_uuid(UUID(person_id))})
+
+        assert projections.pep_persons(10)[0].id == person_id
+
+    def test_documents_without_optional_fields(self):
+        projections = PersonProjections()
+        projections.upsert({"_id": ObjectId(), "address": None})
+
+        assert projections.count_by_city() == {}
+        assert projections.find_by_name_prefix("a", 10) == []
+
+    def test_apply_change_stream_events(self):
+        projections = PersonProjections()
+        consumer = ProjectionConsumer(MagicMock(), projections)
+        john = person_doc("John", is_pep=True)
+
+        consumer.apply_change({"operationType": "insert", "fullDocument": john, "documentKey": {"_id": john["_id"]}, "clusterTime": Timestamp(1, 1)})
+        assert PERSON_PROJECTION_LAG.values[()] > 0
+        consumer.apply_change({"operationType": "update", "fullDocument": {**john, "is_pep": False}, "documentKey": {"_id": john["_id"]}})
+        assert projections.pep_persons(10) == []
+        consumer.apply_change({"operationType": "delete", "documentKey": {"_id": john["_id"]}})
+        assert projections.count_by_city() == {}
+
+    @pytest.mark.asyncio
+    async def test_polling_consumer_catches_up_with_inserts(self):
+        collection = create_collection()
+        collection.collection.insert_many([person_doc("John", is_pep=True), person_doc("Mary")])
+        projections = PersonProjections()
+        consumer = ProjectionConsumer(collection, projections, source="polling", poll_interval_ms=5)
+
+        consumer.start()
+        try:
+            await asyncio.wait_for(self._wait_until(lambda: projections.ready), 1)
+            collection.collection.insert_one(person_doc("Joana", is_pep=True))
+            await asyncio.wait_for(self._wait_until(lambda: len(projections.pep_persons(10)) == 2), 1)
+        finally:
+            await consumer.close()
+
+        assert projections.count_by_city() == {"Test City": 3}
+        assert consumer.task.done()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_polling_without_replica_set(self):
+        collection = create_collection()
+        collection.watch = MagicMock(side_effect=OperationFailure("The $changeStream stage is only supported on replica sets", 40573))
+        projections = PersonProjections()
+        consumer = ProjectionConsumer(collection, projections, poll_interval_ms=5)
+
+        consumer.start()
+        try:
+            await asyncio.wait_for(self._wait_until(lambda: projections.ready), 1)
+        finally:
+            await consumer.close()
+
+        assert consumer.source == "polling"
+
+    async def _wait_until(self, condition):
+        while not condition():
+            await asyncio.sleep(0.005)
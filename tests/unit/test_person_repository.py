@@ -1,181 +1,560 @@
-import pytest
-from unittest.mock import AsyncMock, MagicMock
-from models.person import Person
-from models.address import Address
-from infra.person_repository import PersonRepository
-from bson import ObjectId
-
-
-class TestPersonRepository:
-    @pytest.fixture
-    def mock_collection(self):
-        """Create a mock MongoDB collection"""
-        collection = AsyncMock()
-        
-        # Mock the find method to return a cursor mock directly (not as coroutine)
-        cursor_mock = AsyncMock()
-        collection.find = MagicMock(return_value=cursor_mock)
-        
-        return collection
-
-    @pytest.fixture
-    def person_repository(self, mock_collection):
-        """Create PersonRepository with mocked collection"""
-        return PersonRepository(mock_collection)
-
-    @pytest.fixture
-    def sample_person(self):
-        """Create a sample Person for testing"""
-        return Person(
-            id="person-123",
-            name="John Doe",
-            age=30,
-            address=Address(
-                id="addr-123",
-                street="Main Street",
-                number=123,
-                neighbor="Downtown",
-                city="Test City"
-            ),
-            is_pep=False
-        )
-
-    @pytest.mark.asyncio
-    async def test_save_person(self, person_repository, mock_collection, sample_person):
-        """Test saving a person"""
-        # Mock the insert_one result
-        mock_result = MagicMock()
-        mock_result.inserted_id = ObjectId("507f1f77bcf86cd799439011")
-        mock_collection.insert_one.return_value = mock_result
-
-        # Call save method
-        result = await person_repository.save(sample_person)
-
-        # Verify the call
-        mock_collection.insert_one.assert_called_once()
-        call_args = mock_collection.insert_one.call_args[0][0]
-
-        # Check that the person data was passed correctly
-        assert call_args["id"] == "person-123"
-        assert call_args["name"] == "John Doe"
-        assert call_args["age"] == 30
-        assert call_args["is_pep"] is False
-        assert "address" in call_args
-
-        # Check return value
-        assert result == "507f1f77bcf86cd799439011"
-
-    @pytest.mark.asyncio
-    async def test_get_all_persons(self, person_repository, mock_collection):
-        """Test getting all persons"""
-        # Mock documents from database
-        mock_docs = [
-            {
-                "_id": ObjectId("507f1f77bcf86cd799439011"),
-                "id": "person-1",
-                "name": "John Doe",
-                "age": 30,
-                "is_pep": False
-            },
-            {
-                "_id": ObjectId("507f1f77bcf86cd799439012"),
-                "id": "person-2",
-                "name": "Jane Smith",
-                "age": 25,
-                "is_pep": True
-            }
-        ]
-        
-        # Mock the find method to return a mock cursor
-        mock_cursor = AsyncMock()
-        mock_cursor.to_list.return_value = mock_docs
-        mock_collection.find.return_value = mock_cursor
-
-        # Call get_all method
-        result = await person_repository.get_all()
-
-        # Verify the call
-        mock_collection.find.assert_called_once()
-        mock_cursor.to_list.assert_called_once_with(length=None)
-
-        # Check results
-        assert len(result) == 2
-        assert isinstance(result[0], Person)
-        assert result[0].id == "person-1"
-        assert result[0].name == "John Doe"
-        assert result[1].id == "person-2"
-        assert result[1].name == "Jane Smith"
-
-    @pytest.mark.asyncio
-    async def test_get_all_persons_empty(self, person_repository, mock_collection):
-        """Test getting all persons when collection is empty"""
-        mock_cursor = AsyncMock()
-        mock_cursor.to_list.return_value = []
-        mock_collection.find.return_value = mock_cursor
-        
-        result = await person_repository.get_all()
-        assert result == []
-
-    @pytest.mark.asyncio
-    async def test_get_person_by_id_found(self, person_repository, mock_collection, sample_person):
-        """Test getting a person by ID when found"""
-        person_id = "507f1f77bcf86cd799439011"
-        mock_doc = {
-            "_id": ObjectId(person_id),
-            "id": "person-123",
-            "name": "John Doe",
-            "age": 30,
-            "is_pep": False
-        }
-        mock_collection.find_one.return_value = mock_doc
-
-        # Call get_by_id method
-        result = await person_repository.get_by_id(person_id)
-
-        # Verify the call
-        mock_collection.find_one.assert_called_once_with({"_id": ObjectId(person_id)})
-
-        # Check result
-        assert result is not None
-        assert isinstance(result, Person)
-        assert result.id == "person-123"
-        assert result.name == "John Doe"
-
-    @pytest.mark.asyncio
-    async def test_get_person_by_id_not_found(self, person_repository, mock_collection):
-        """Test getting a person by ID when not found"""
-        person_id = "507f1f77bcf86cd799439011"
-        mock_collection.find_one.return_value = None
-
-        result = await person_repository.get_by_id(person_id)
-
-        mock_collection.find_one.assert_called_once_with({"_id": ObjectId(person_id)})
-        assert result is None
-
-    @pytest.mark.asyncio
-    async def test_get_person_by_id_with_address(self, person_repository, mock_collection):
-        """Test getting a person by ID that has an address"""
-        person_id = "507f1f77bcf86cd799439011"
-        mock_doc = {
-            "_id": ObjectId(person_id),
-            "id": "person-123",
-            "name": "John Doe",
-            "age": 30,
-            "address": {
-                "id": "addr-123",
-                "street": "Main Street",
-                "number": 123,
-                "neighbor": "Downtown",
-                "city": "Test City"
-            },
-            "is_pep": False
-        }
-        mock_collection.find_one.return_value = mock_doc
-
-        result = await person_repository.get_by_id(person_id)
-
-        assert result is not None
-        assert result.address is not None
-        assert isinstance(result.address, Address)
-        assert result.address.street == "Main Street"
-        assert result.address.city == "Test City"
\ No newline at end of file
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from models.person import Person
+from models.address import Address
+from infra.person_documents import to_person
+from infra.person_repository import PERSON_INDEXES, PersonRepository
+from infra.cursor import encode_cursor
+from models.person_filter import PersonFilter
+from itertools import combinations
+
+FILTER_VALUES = {
+    "name": "Jo",
+    "min_age": 18,
+    "max_age": 65,
+    "city": "Test City",
+    "neighbor": "Downtown",
+    "is_pep": True
+}
+from uuid import UUID
+from bson import ObjectId
+from bson.binary import Binary
+from pymongo.errors import BulkWriteError
+
+
+class TestPersonRepository:
+    @pytest.fixture
+    def mock_collection(self):
+        """Create a mock MongoDB collection"""
+        collection = AsyncMock()
+        
+        # Mock the find method to return a cursor mock directly (not as coroutine)
+        cursor_mock = AsyncMock()
+        collection.find = MagicMock(return_value=cursor_mock)
+        
+        return collection
+
+    @pytest.fixture
+    def person_repository(self, mock_collection):
+        """Create PersonRepository with mocked collection"""
+        return PersonRepository(mock_collection)
+
+    @pytest.fixture
+    def sample_person(self):
+        """Create a sample Person for testing"""
+        return Person(
+            id="person-123",
+            name="John Doe",
+            age=30,
+            address=Address(
+                id="addr-123",
+                street="Main Street",
+                number=123,
+                neighbor="Downtown",
+                city="Test City"
+            ),
+            is_pep=False
+        )
+
+    @pytest.mark.asyncio
+    async def test_save_person(self, person_repository, mock_collection, sample_person):
+        """Test saving a person"""
+        # Mock the insert_one result
+        mock_result = MagicMock()
+        mock_result.inserted_id = ObjectId("507f1f77bcf86cd799439011")
+        mock_collection.insert_one.return_value = mock_result
+
+        # Call save method
+        result = await person_repository.save(sample_person)
+
+        # Verify the call
+        mock_collection.insert_one.assert_called_once()
+        call_args = mock_collection.insert_one.call_args[0][0]
+
+        # Check that the person data was passed correctly
+        assert call_args["id"] == "person-123"
+        assert call_args["name"] == "John Doe"
+        assert call_args["age"] == 30
+        assert call_args["is_pep"] is False
+        assert "address" in call_args
+
+        # Check return value
+        assert result == "507f1f77bcf86cd799439011"
+
+    @pytest.mark.asyncio
+    async def test_save_stores_content_version(self, person_repository, mock_collection, sample_person):
+        """Test that save stores a content hash that changes with the person"""
+        await person_repository.save(sample_person)
+        await person_repository.save(sample_person.model_copy(update={"age": 31}))
+
+        first, second = [call[0][0] for call in mock_collection.insert_one.call_args_list]
+        assert len(first["version"]) == 16
+        assert first["version"] != second["version"]
+        assert to_person(first).version == first["version"]
+        assert "version" not in to_person(first).model_dump()
+
+    @pytest.mark.asyncio
+    async def test_save_through_coalescer(self, mock_collection, sample_person):
+        """Test that save hands the document to the write coalescer when one is configured"""
+        coalescer = MagicMock()
+        coalescer.insert = AsyncMock(return_value=ObjectId("507f1f77bcf86cd799439011"))
+        person_repository = PersonRepository(mock_collection, coalescer=coalescer)
+
+        result = await person_repository.save(sample_person)
+
+        assert result == "507f1f77bcf86cd799439011"
+        assert coalescer.insert.call_args[0][0]["id"] == sample_person.id
+        mock_collection.insert_one.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_save_many_in_chunks(self, mock_collection, sample_person):
+        """Test that bulk saves are written with unordered insert_many chunks"""
+        person_repository = PersonRepository(mock_collection, bulk_chunk_size=2)
+        people = [sample_person.model_copy(update={"id": f"person-{i}"}) for i in range(5)]
+
+        errors = await person_repository.save_many(people)
+
+        assert errors == [None] * 5
+        assert mock_collection.insert_many.call_count == 3
+        chunks = [call[0][0] for call in mock_collection.insert_many.call_args_list]
+        assert [[doc["id"] for doc in chunk] for chunk in chunks] == [["person-0", "person-1"], ["person-2", "person-3"], ["person-4"]]
+        assert all(call[1] == {"ordered": False} for call in mock_collection.insert_many.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_save_many_reports_write_errors(self, mock_collection, sample_person):
+        """Test that write errors are mapped back to their item position"""
+        person_repository = PersonRepository(mock_collection, bulk_chunk_size=2)
+        people = [sample_person.model_copy(update={"id": f"person-{i}"}) for i in range(4)]
+        mock_collection.insert_many.side_effect = [
+            None,
+            BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "E11000 duplicate key error"}]})
+        ]
+
+        errors = await person_repository.save_many(people)
+
+        assert errors == [None, None, None, "E11000 duplicate key error"]
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons(self, person_repository, mock_collection):
+        """Test getting all persons"""
+        # Mock documents from database
+        mock_docs = [
+            {
+                "_id": ObjectId("507f1f77bcf86cd799439011"),
+                "id": "person-1",
+                "name": "John Doe",
+                "age": 30,
+                "is_pep": False
+            },
+            {
+                "_id": ObjectId("507f1f77bcf86cd799439012"),
+                "id": "person-2",
+                "name": "Jane Smith",
+                "age": 25,
+                "is_pep": True
+            }
+        ]
+        
+        # Mock the find method to return a mock cursor
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list.return_value = mock_docs
+        mock_collection.find.return_value = mock_cursor
+
+        # Call get_all method
+        result = await person_repository.get_all(10)
+
+        # Verify the call
+        mock_collection.find.assert_called_once_with({}, None, sort=[("_id", 1)], limit=11)
+        mock_cursor.to_list.assert_called_once_with(length=11)
+
+        # Check results
+        assert len(result.items) == 2
+        assert isinstance(result.items[0], Person)
+        assert result.items[0].id == "person-1"
+        assert result.items[0].name == "John Doe"
+        assert result.items[1].id == "person-2"
+        assert result.items[1].name == "Jane Smith"
+        assert result.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons_next_page(self, person_repository, mock_collection):
+        """Test that a full page returns a cursor that resumes after its last item"""
+        mock_docs = [
+            {"_id": ObjectId(f"507f1f77bcf86cd79943901{i}"), "id": f"person-{i}", "name": "John Doe", "age": 30, "is_pep": False}
+            for i in range(3)
+        ]
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list.return_value = mock_docs
+        mock_collection.find.return_value = mock_cursor
+
+        result = await person_repository.get_all(2)
+
+        assert [p.id for p in result.items] == ["person-0", "person-1"]
+        assert result.next_cursor == encode_cursor(mock_docs[1]["_id"])
+
+        await person_repository.get_all(2, result.next_cursor)
+
+        assert mock_collection.find.call_args[0][0] == {"_id": {"$gt": mock_docs[1]["_id"]}}
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons_filtered(self, person_repository, mock_collection):
+        """Test that filters are turned into Mongo predicates"""
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list.return_value = []
+        mock_collection.find.return_value = mock_cursor
+        after = encode_cursor(ObjectId("507f1f77bcf86cd799439011"))
+        filters = PersonFilter(name="Jo.", min_age=18, max_age=65, city="Test City", neighbor="Downtown", is_pep=False)
+
+        await person_repository.get_all(10, after, filters)
+
+        mock_collection.find.assert_called_once_with({
+            "name": {"$regex": "^Jo\\."},
+            "age": {"$gte": 18, "$lte": 65},
+            "address.city": "Test City",
+            "address.neighbor": "Downtown",
+            "is_pep": False,
+            "_id": {"$gt": ObjectId("507f1f77bcf86cd799439011")}
+        }, None, sort=[("_id", 1)], limit=11)
+
+    @pytest.mark.parametrize("filters", [
+        PersonFilter(**dict(combination))
+        for size in range(1, len(FILTER_VALUES) + 1)
+        for combination in combinations(FILTER_VALUES.items(), size)
+    ])
+    def test_every_filter_combination_has_an_index(self, person_repository, filters):
+        """Test that some declared index leads with a field of every filter combination"""
+        predicates = person_repository._build_filter(filters, None)
+        leading_fields = {next(iter(index.document["key"])) for index in PERSON_INDEXES}
+
+        assert leading_fields & predicates.keys()
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons_invalid_cursor(self, person_repository):
+        """Test that a malformed cursor raises ValueError"""
+        with pytest.raises(ValueError):
+            await person_repository.get_all(10, "not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_stream_all_persons(self, person_repository, mock_collection):
+        """Test streaming persons from the cursor in batches"""
+        mock_docs = [
+            {"_id": ObjectId(), "id": "person-1", "name": "John Doe", "age": 30, "is_pep": False},
+            {"_id": ObjectId(), "id": "person-2", "name": "Jane Smith", "age": 25, "is_pep": True}
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.__aiter__.return_value = mock_docs
+        mock_collection.find.return_value = mock_cursor
+
+        result = [columns async for columns in person_repository.stream_all()]
+
+        mock_collection.find.assert_called_once_with({}, None, sort=[("_id", 1)], batch_size=500)
+        assert len(result) == 1
+        assert result[0].names == ["John Doe", "Jane Smith"]
+        assert result[0].next_cursor == encode_cursor(mock_docs[-1]["_id"])
+
+    @pytest.mark.asyncio
+    async def test_stream_all_yields_one_batch_per_batch_size(self, mock_collection):
+        """Test that streamed rows are grouped into columnar batches"""
+        person_repository = PersonRepository(mock_collection, batch_size=2)
+        mock_cursor = MagicMock()
+        mock_docs = [{"_id": ObjectId(), "name": f"Person {i}"} for i in range(5)]
+        mock_cursor.__aiter__.return_value = mock_docs
+        mock_collection.find.return_value = mock_cursor
+
+        result = [columns async for columns in person_repository.stream_all()]
+
+        assert [len(columns) for columns in result] == [2, 2, 1]
+        assert [columns.next_cursor for columns in result] == [encode_cursor(mock_docs[i]["_id"]) for i in (1, 3, 4)]
+
+    @pytest.mark.asyncio
+    async def test_stream_all_with_batch_size_and_fields(self, person_repository, mock_collection):
+        """Test that a caller can tune the batch size and that projections keep _id"""
+        mock_cursor = MagicMock()
+        mock_cursor.__aiter__.return_value = []
+        mock_collection.find.return_value = mock_cursor
+
+        result = [columns async for columns in person_repository.stream_all(fields=["name"], batch_size=2000)]
+
+        assert result == []
+        mock_collection.find.assert_called_once_with({}, {"_id": 1, "name": 1, "version": 1}, sort=[("_id", 1)], batch_size=2000)
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons_empty(self, person_repository, mock_collection):
+        """Test getting all persons when collection is empty"""
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list.return_value = []
+        mock_collection.find.return_value = mock_cursor
+        
+        result = await person_repository.get_all(10)
+        assert result.items == []
+        assert result.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_get_stats_pushes_aggregation_to_mongo(self, person_repository, mock_collection):
+        """Test that stats run as one hinted $facet pipeline allowed to spill to disk"""
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{
+            "totals": [{"_id": None, "total": 4, "peps": 1, "average_age": 32.5}],
+            "ages": [{"_id": 20, "count": 1}, {"_id": 30, "count": 3}, {"_id": "other", "count": 0}],
+            "cities": [{"_id": "Lisbon", "count": 3}]
+        }])
+        mock_collection.aggregate = MagicMock(return_value=cursor)
+
+        stats = await person_repository.get_stats(PersonFilter(city="Lisbon", min_age=18), 10, 5)
+
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        assert pipeline[0] == {"$match": {"age": {"$gte": 18}, "address.city": "Lisbon"}}
+        assert set(pipeline[1]["$facet"]) == {"totals", "ages", "cities"}
+        assert mock_collection.aggregate.call_args[1] == {"allowDiskUse": True, "hint": "city_neighbor_id"}
+        assert stats.total == 4
+        assert stats.pep_ratio == 0.25
+        assert [(bucket.min_age, bucket.max_age, bucket.count) for bucket in stats.age_histogram] == [(20, 29, 1), (30, 39, 3)]
+        assert stats.cities[0].city == "Lisbon"
+
+    def test_stats_hint_only_for_filtered_fields(self, person_repository):
+        """Test that no index is forced without a filter that leads it"""
+        assert person_repository._stats_hint(None) is None
+        assert person_repository._stats_hint(PersonFilter()) is None
+        assert person_repository._stats_hint(PersonFilter(is_pep=True, max_age=40)) == "is_pep_id_age"
+
+    @pytest.mark.asyncio
+    async def test_get_stats_against_stand_in(self):
+        """Test the pipeline semantics on mongomock"""
+        from tests.mongo_stand_in import create_collection
+        collection = create_collection(name="persons_stats")
+        await collection.drop()
+        await collection.insert_many([
+            {"id": str(i), "name": f"Person {i}", "age": i, "address": {"city": f"City {i % 3}"}, "is_pep": i % 4 == 0}
+            for i in range(12)
+        ] + [{"id": "no-address", "name": "Nobody", "age": 150, "address": None, "is_pep": False}])
+
+        stats = await PersonRepository(collection).get_stats(None, 5, 2)
+        empty = await PersonRepository(collection).get_stats(PersonFilter(city="Nowhere"), 5, 2)
+
+        assert stats.total == 13
+        assert stats.pep_count == 3
+        assert [(bucket.min_age, bucket.count) for bucket in stats.age_histogram] == [(0, 5), (5, 5), (10, 2), (150, 1)]
+        assert [(city.city, city.count) for city in stats.cities] == [("City 0", 4), ("City 1", 4)]
+        assert empty.total == 0
+        assert empty.pep_ratio == 0.0
+        assert empty.age_histogram == []
+
+    @pytest.mark.asyncio
+    async def test_get_person_by_id_found(self, person_repository, mock_collection, sample_person):
+        """Test getting a person by ID when found"""
+        person_id = "9b2f8a3e-5d4c-4f6a-8e1b-2c3d4e5f6a7b"
+        mock_doc = {
+            "_id": ObjectId("507f1f77bcf86cd799439011"),
+            "id": person_id,
+            "name": "John Doe",
+            "age": 30,
+            "is_pep": False
+        }
+        mock_collection.find_one.return_value = mock_doc
+
+        # Call get_by_id method
+        result = await person_repository.get_by_id(person_id)
+
+        # Verify the call
+        mock_collection.find_one.assert_called_once_with({"id": person_id}, {"_id": 0})
+
+        # Check result
+        assert result is not None
+        assert isinstance(result, Person)
+        assert result.id == person_id
+        assert result.name == "John Doe"
+
+    @pytest.mark.asyncio
+    async def test_get_person_by_id_not_found(self, person_repository, mock_collection):
+        """Test getting a person by ID when not found"""
+        person_id = "9b2f8a3e-5d4c-4f6a-8e1b-2c3d4e5f6a7b"
+        mock_collection.find_one.return_value = None
+
+        result = await person_repository.get_by_id(person_id)
+
+        mock_collection.find_one.assert_called_once_with({"id": person_id}, {"_id": 0})
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_get_person_by_malformed_id(self, person_repository, mock_collection):
+        """Test that a malformed id is not found without querying the database"""
+        result = await person_repository.get_by_id("invalid-id-format")
+
+        mock_collection.find_one.assert_not_called()
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_ensure_indexes(self, person_repository, mock_collection):
+        """Test that the unique id index is created at startup"""
+        mock_collection.find.return_value = MagicMock()
+
+        await person_repository.ensure_indexes()
+
+        mock_collection.create_indexes.assert_called_once_with(PERSON_INDEXES)
+        assert PERSON_INDEXES[0].document["key"] == {"id": 1}
+        assert PERSON_INDEXES[0].document["unique"] is True
+
+    @pytest.mark.asyncio
+    async def test_migrate_missing_ids(self, mock_collection):
+        """Test that documents without an id are backfilled in batches"""
+        person_repository = PersonRepository(mock_collection, batch_size=2)
+        legacy_docs = [{"_id": ObjectId()} for _ in range(3)]
+        mock_cursor = MagicMock()
+        mock_cursor.__aiter__.return_value = legacy_docs
+        mock_collection.find.return_value = mock_cursor
+
+        migrated = await person_repository.migrate_missing_ids()
+
+        assert migrated == 3
+        mock_collection.find.assert_called_once_with({"id": {"$exists": False}}, {"_id": 1}, batch_size=2)
+        assert mock_collection.bulk_write.call_count == 2
+        updates = [update for call in mock_collection.bulk_write.call_args_list for update in call[0][0]]
+        assigned_ids = {update._doc["$set"]["id"] for update in updates}
+        assert len(assigned_ids) == 3
+
+    @pytest.mark.asyncio
+    async def test_get_person_by_id_with_address(self, person_repository, mock_collection):
+        """Test getting a person by ID that has an address"""
+        person_id = "9b2f8a3e-5d4c-4f6a-8e1b-2c3d4e5f6a7b"
+        mock_doc = {
+            "_id": ObjectId("507f1f77bcf86cd799439011"),
+            "id": person_id,
+            "name": "John Doe",
+            "age": 30,
+            "address": {
+                "id": "addr-123",
+                "street": "Main Street",
+                "number": 123,
+                "neighbor": "Downtown",
+                "city": "Test City"
+            },
+            "is_pep": False
+        }
+        mock_collection.find_one.return_value = mock_doc
+
+        result = await person_repository.get_by_id(person_id)
+
+        assert result is not None
+        assert result.address is not None
+        assert isinstance(result.address, Address)
+        assert result.address.street == "Main Street"
+        assert result.address.city == "Test City"
+
+    @pytest.mark.asyncio
+    async def test_get_all_persons_with_fields(self, person_repository, mock_collection):
+        """Test that requested fields become a projection and partial models"""
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list.return_value = [{"_id": ObjectId(), "id": "person-1", "name": "John Doe"}]
+        mock_collection.find.return_value = mock_cursor
+
+        result = await person_repository.get_all(10, fields=["id", "name"])
+
+        assert mock_collection.find.call_args[0][1] == {"_id": 1, "id": 1, "name": 1, "version": 1}
+        assert result.items[0].model_dump(exclude_unset=True) == {"id": "person-1", "name": "John Doe"}
+
+    @pytest.mark.asyncio
+    async def test_get_person_by_id_with_fields(self, person_repository, mock_collection):
+        """Test projecting nested address fields on a single read"""
+        person_id = "9b2f8a3e-5d4c-4f6a-8e1b-2c3d4e5f6a7b"
+        mock_collection.find_one.return_value = {"id": person_id, "address": {"city": "Test City"}}
+
+        result = await person_repository.get_by_id(person_id, ["id", "address.city"])
+
+        mock_collection.find_one.assert_called_once_with({"id": person_id}, {"_id": 0, "id": 1, "address.city": 1, "version": 1})
+        assert isinstance(result.address, Address)
+        assert result.model_dump(exclude_unset=True) == {"id": person_id, "address": {"city": "Test City"}}
+
+    @pytest.mark.asyncio
+    async def test_binary_id_storage(self, mock_collection, sample_person):
+        """Test that binary storage writes BSON UUIDs and reads back the string form"""
+        person_repository = PersonRepository(mock_collection, id_storage="binary")
+        person_id = "018bcfe5-6800-7000-8000-0123456789ab"
+        address_id = "018bcfe5-6800-7001-8000-0123456789ab"
+        person = sample_person.model_copy(update={
+            "id": person_id,
+            "address": sample_person.address.model_copy(update={"id": address_id})
+        })
+
+        await person_repository.save(person)
+        await PersonRepository(mock_collection).save(person)
+
+        binary, text = [call[0][0] for call in mock_collection.insert_one.call_args_list]
+        assert binary["id"] == Binary.from_uuid(UUID(person_id))
+        assert binary["address"]["id"] == Binary.from_uuid(UUID(address_id))
+        assert binary["version"] == text["version"]
+        read = to_person(binary)
+        assert read.id == person_id
+        assert read.address.id == address_id
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_with_binary_storage_finds_legacy_string_ids(self, mock_collection):
+        """Test that binary storage also looks up ids stored as strings"""
+        person_repository = PersonRepository(mock_collection, id_storage="binary")
+        person_id = "9b2f8a3e-5d4c-4f6a-8e1b-2c3d4e5f6a7b"
+        mock_collection.find_one.return_value = None
+
+        await person_repository.get_by_id(person_id)
+
+        mock_collection.find_one.assert_called_once_with(
+            {"id": {"$in": [Binary.from_uuid(UUID(person_id)), person_id]}}, {"_id": 0})
+
+    @pytest.mark.asyncio
+    async def test_binary_id_storage_against_stand_in(self):
+        """Test saving, reading and streaming binary ids on mongomock"""
+        from tests.mongo_stand_in import create_collection
+        from benchmarks.load import seed
+        collection = create_collection(name="persons_binary_ids")
+        await collection.drop()
+        person_repository = PersonRepository(collection, id_storage="binary")
+
+        ids = await seed(person_repository, 3)
+        found = await person_repository.get_by_id(ids[1])
+        streamed = [columns async for columns in person_repository.stream_all()]
+
+        assert isinstance((await collection.find_one({}))["id"], Binary)
+        assert found.id == ids[1]
+        assert [streamed[0].ids[row] for row in range(3)] == ids
+
+    @pytest.mark.asyncio
+    async def test_reads_use_their_read_handles(self, sample_person):
+        """Test that routed reads leave the write handle, and other reads and writes keep it"""
+        from tests.mongo_stand_in import create_collection
+        primary = create_collection(name="persons_primary")
+        secondary = create_collection(name="persons_secondary")
+        await primary.drop()
+        await secondary.drop()
+        await secondary.insert_one({"id": "person-456", "name": "Jane Doe", "age": 40, "is_pep": True})
+        person_repository = PersonRepository(primary, read_collections={"list": secondary, "export": secondary})
+
+        await person_repository.save(sample_person)
+        page = await person_repository.get_all(10)
+        exported = [columns async for columns in person_repository.stream_all(read="export")]
+        found = await person_repository.get_by_id("2f1c6a4e-0000-4000-8000-000000000000")
+
+        assert await primary.count_documents({}) == 1
+        assert [person.id for person in page.items] == ["person-456"]
+        assert exported[0].names == ["Jane Doe"]
+        assert found is None
+
+    @pytest.mark.asyncio
+    async def test_causal_write_skips_coalescer(self, mock_collection, sample_person):
+        """Test that a write in a causal session goes straight to MongoDB with the session"""
+        from infra.causal import causal_session
+        coalescer = MagicMock()
+        coalescer.insert = AsyncMock()
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+        person_repository = PersonRepository(mock_collection, coalescer=coalescer)
+        session = MagicMock(has_ended=False)
+
+        reset = causal_session.set(session)
+        try:
+            await person_repository.save(sample_person)
+        finally:
+            causal_session.reset(reset)
+
+        coalescer.insert.assert_not_called()
+        assert mock_collection.insert_one.call_args.kwargs == {"session": session}
+
+    def test_unknown_id_storage(self, mock_collection):
+        with pytest.raises(ValueError, match="Unknown id storage"):
+            PersonRepository(mock_collection, id_storage="hex")
@@ -0,0 +1,60 @@
+from infra.person_search import PersonSearchIndex, fold, trigrams
+
+
+class TestPersonSearchIndex:
+    def index(self, *names) -> PersonSearchIndex:
+        index = PersonSearchIndex()
+        for number, name in enumerate(names):
+            index.add(f"person-{number}", name)
+        return index
+
+    def test_fold_ignores_case_and_accents(self):
+        assert fold("JOSÉ Conceição") == "jose conceicao"
+
+    def test_trigrams_are_padded(self):
+        assert trigrams("ana") == {"  a", " an", "ana", "na "}
+
+    def test_misspelled_and_partial_names(self):
+        index = self.index("Maria Silva Santos", "Mario Souza", "John Doe")
+
+        assert [id for _, id, _ in index.search("Mraia Slva", 10)] == ["person-0"]
+        assert [id for _, id, _ in index.search("silva", 10)] == ["person-0"]
+        assert index.search("Xavier", 10) == []
+
+    def test_ranked_best_first(self):
+        index = self.index("Marta Lima", "Maria Lima", "Mariana Lima")
+
+        hits = index.search("maria", 10)
+
+        assert [name for _, _, name in hits] == ["Maria Lima", "Mariana Lima", "Marta Lima"]
+        assert hits[0][0] == 1.0
+        assert hits[0][0] > hits[1][0] > hits[2][0]
+
+    def test_every_query_word_must_match(self):
+        index = self.index("Maria Silva", "Maria Costa", "Ana Silva")
+
+        assert [name for _, _, name in index.search("maria silva", 10)] == ["Maria Silva"]
+
+    def test_people_sharing_a_name_and_limit(self):
+        index = self.index("Ana Lima", "Ana Lima", "Ana Lima")
+
+        assert [id for _, id, _ in index.search("ana", 2)] == ["person-0", "person-1"]
+
+    def test_rename_and_remove(self):
+        index = self.index("Maria Silva", "Ana Silva")
+        index.add("person-0", "Joana Costa")
+        index.remove("person-1")
+
+        assert index.search("silva", 10) == []
+        assert [id for _, id, _ in index.search("joana", 10)] == ["person-0"]
+        assert len(index) == 1
+
+        index.add("person-1", "Ana Silva")
+        assert [id for _, id, _ in index.search("silva", 10)] == ["person-1"]
+
+    def test_clear(self):
+        index = self.index("Maria Silva")
+        index.clear()
+
+        assert index.search("maria", 10) == []
+        assert len(index) == 0
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+from server import main, server_options, worker_count
+from settings import DevelopmentSettings, ProductionSettings
+
+
+class TestServer:
+    def test_one_worker_per_cpu_by_default(self):
+        with patch("server.os.cpu_count", return_value=8):
+            options = server_options(DevelopmentSettings())
+
+        assert options["workers"] == 8
+        assert options["loop"] == "auto"
+        assert options["http"] == "auto"
+        assert options["limit_max_requests"] == 100000
+        assert options["timeout_keep_alive"] == 65
+
+    def test_production_settings_from_env(self, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        monkeypatch.setenv("WEB_BACKLOG", "4096")
+        monkeypatch.setenv("WEB_MAX_REQUESTS", "500")
+        monkeypatch.setenv("WEB_MAX_REQUESTS_JITTER", "50")
+
+        options = server_options(ProductionSettings())
+
+        assert options["workers"] == 3
+        assert options["backlog"] == 4096
+        assert options["limit_max_requests"] == 500
+        assert options["limit_max_requests_jitter"] == 50
+
+    def test_single_worker_is_not_recycled(self, monkeypatch):
+        # Without a supervisor a recycled worker would stop the server.
+        monkeypatch.setenv("WEB_CONCURRENCY", "1")
+
+        options = server_options(ProductionSettings())
+
+        assert worker_count(ProductionSettings()) == 1
+        assert options["limit_max_requests"] is None
+
+    def test_main_runs_the_app_import_string(self, monkeypatch):
+        monkeypatch.setenv("ENV", "production")
+        monkeypatch.setenv("WEB_CONCURRENCY", "2")
+
+        with patch("server.uvicorn.run") as run:
+            main(["--port", "9000", "--loop", "asyncio", "--http", "h11"])
+
+        run.assert_called_once()
+        assert run.call_args.args == ("main:app",)
+        assert run.call_args.kwargs["port"] == 9000
+        assert run.call_args.kwargs["workers"] == 2
+        assert run.call_args.kwargs["loop"] == "asyncio"
+        assert run.call_args.kwargs["http"] == "h11"
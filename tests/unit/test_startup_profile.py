@@ -0,0 +1,32 @@
+import sys
+from infra.startup_profile import ImportProfiler
+
+
+class TestImportProfiler:
+    def test_times_modules_imported_while_installed(self, tmp_path, monkeypatch):
+        (tmp_path / "profiled_parent.py").write_text("import profiled_child\n")
+        (tmp_path / "profiled_child.py").write_text("VALUE = sum(range(1000))\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        profiler = ImportProfiler()
+
+        profiler.install()
+        try:
+            import profiled_parent
+        finally:
+            profiler.uninstall()
+            sys.modules.pop("profiled_parent", None)
+            sys.modules.pop("profiled_child", None)
+
+        assert profiler not in sys.meta_path
+        parent_cumulative, parent_own = profiler.timings["profiled_parent"]
+        child_cumulative, child_own = profiler.timings["profiled_child"]
+        assert child_cumulative == child_own
+        assert parent_cumulative >= child_cumulative + parent_own - 1e-9
+        assert {name for name, _, _ in profiler.report()} >= {"profiled_parent", "profiled_child"}
+        assert profiler.total_ms() >= child_own * 1000
+
+    def test_report_is_sorted_by_self_time(self):
+        profiler = ImportProfiler()
+        profiler.timings = {"a": (0.003, 0.001), "b": (0.002, 0.002), "c": (0.005, 0.0005)}
+
+        assert [name for name, _, _ in profiler.report(limit=2)] == ["b", "a"]
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ServerSelectionTimeoutError, WriteError
+from infra.write_coalescer import WriteCoalescer
+
+
+class TestWriteCoalescer:
+    @pytest.fixture
+    def mock_collection(self):
+        collection = MagicMock()
+        collection.insert_many = AsyncMock()
+        return collection
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_is_full(self, mock_collection):
+        coalescer = WriteCoalescer(mock_collection, max_batch_size=3, max_delay_ms=10_000)
+        docs = [{"id": f"person-{i}"} for i in range(3)]
+
+        ids = await asyncio.wait_for(asyncio.gather(*(coalescer.insert(doc) for doc in docs)), timeout=1)
+
+        mock_collection.insert_many.assert_awaited_once_with(docs, ordered=False)
+        assert ids == [doc["_id"] for doc in docs]
+        assert all(isinstance(id, ObjectId) for id in ids)
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_deadline(self, mock_collection):
+        coalescer = WriteCoalescer(mock_collection, max_batch_size=100, max_delay_ms=1)
+
+        ids = await asyncio.wait_for(asyncio.gather(coalescer.insert({"id": "a"}), coalescer.insert({"id": "b"})), timeout=1)
+
+        assert len(ids) == 2
+        mock_collection.insert_many.assert_awaited_once()
+        assert len(mock_collection.insert_many.call_args[0][0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_write_errors_reach_their_own_caller(self, mock_collection):
+        mock_collection.insert_many.side_effect = BulkWriteError({"writeErrors": [
+            {"index": 1, "code": 11000, "errmsg": "E11000 duplicate key error"},
+            {"index": 2, "code": 121, "errmsg": "Document failed validation"}
+        ]})
+        coalescer = WriteCoalescer(mock_collection, max_batch_size=3, max_delay_ms=10_000)
+
+        results = await asyncio.gather(
+            coalescer.insert({"id": "a"}),
+            coalescer.insert({"id": "b"}),
+            coalescer.insert({"id": "c"}),
+            return_exceptions=True)
+
+        assert isinstance(results[0], ObjectId)
+        assert isinstance(results[1], DuplicateKeyError)
+        assert isinstance(results[2], WriteError) and not isinstance(results[2], DuplicateKeyError)
+        assert results[2].code == 121
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_reaches_every_caller(self, mock_collection):
+        mock_collection.insert_many.side_effect = ServerSelectionTimeoutError("no servers")
+        coalescer = WriteCoalescer(mock_collection, max_batch_size=2, max_delay_ms=10_000)
+
+        results = await asyncio.gather(coalescer.insert({"id": "a"}), coalescer.insert({"id": "b"}), return_exceptions=True)
+
+        assert all(isinstance(result, ServerSelectionTimeoutError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_writes(self, mock_collection):
+        coalescer = WriteCoalescer(mock_collection, max_batch_size=100, max_delay_ms=10_000)
+        pending = asyncio.create_task(coalescer.insert({"id": "a"}))
+        await asyncio.sleep(0)
+
+        await coalescer.close()
+
+        assert isinstance(await pending, ObjectId)
+        mock_collection.insert_many.assert_awaited_once()